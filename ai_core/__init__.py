@@ -1 +1,9 @@
-"""AI Core package: ML/DL/RL/GenAI brain for trading system."""
\ No newline at end of file
+"""AI Core package: ML/DL/RL/GenAI brain for trading system."""
+
+import os
+
+from .core import imports as _imports
+
+# Profile every import from here on; the slowest are logged at startup
+if os.getenv("IMPORT_PROFILE", "false").lower() == "true":
+    _imports.import_profiler.install()
@@ -0,0 +1,68 @@
+"""Keyset pagination and streaming helpers for list endpoints.
+
+List endpoints page with an opaque cursor holding the sort key of the last
+row returned, so each page is an index seek rather than an ``OFFSET`` scan.
+The cursor for the next page is returned in the ``X-Next-Cursor`` header to
+keep response bodies unchanged.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, List
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode a row's sort key as an opaque, URL-safe cursor."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """Decode a cursor produced by :func:`encode_cursor`, coercing each value."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if len(values) != len(types):
+            raise ValueError("cursor length mismatch")
+        return [
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(values, types)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def set_next_cursor(response: Response, rows: List[Any], limit: int, *key: str) -> None:
+    """Advertise the next page's cursor if this page was full."""
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*(last[k] for k in key))
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def iter_json_array(rows: Iterable[dict]) -> Iterator[str]:
+    """Serialize rows as a JSON array one element at a time."""
+    yield "["
+    first = True
+    for row in rows:
+        if not first:
+            yield ","
+        yield json.dumps(row, default=_json_default)
+        first = False
+    yield "]"
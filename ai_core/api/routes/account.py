@@ -1,11 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
-from ai_core.strategy_engine.broker.ibkr_service import IBKRService
-from ai_core.risk_manager.risk_manager import RiskManager
+from ai_core.core.container import get_ibkr_service, get_risk_manager
 from pydantic import BaseModel
+
 router = APIRouter()
-ibkr_service = IBKRService()
-risk_manager = RiskManager()
 
 class RiskLimitsUpdate(BaseModel):
     max_daily_loss_percent: float
@@ -14,7 +12,7 @@ class RiskLimitsUpdate(BaseModel):
     max_drawdown_limit_percent: float
 
 @router.get("/summary")
-def get_account_summary():
+def get_account_summary(ibkr_service=Depends(get_ibkr_service)):
     """Get account summary from IBKR"""
     
     if not ibkr_service.is_connected():
@@ -36,7 +34,7 @@ def get_account_summary():
     }
 
 @router.get("/positions")
-def get_positions():
+def get_positions(ibkr_service=Depends(get_ibkr_service)):
     """Get current positions"""
     
     if not ibkr_service.is_connected():
@@ -50,7 +48,7 @@ def get_positions():
     }
 
 @router.get("/market-data")
-def get_market_data():
+def get_market_data(ibkr_service=Depends(get_ibkr_service)):
     """Get current market data"""
     
     if not ibkr_service.is_connected():
@@ -65,7 +63,7 @@ def get_market_data():
     }
 
 @router.get("/risk-assessment")
-def get_portfolio_risk_assessment():
+def get_portfolio_risk_assessment(risk_manager=Depends(get_risk_manager)):
     """Get current portfolio risk assessment"""
     
     risk_assessment = risk_manager.assess_portfolio_risk()
@@ -78,7 +76,7 @@ def get_portfolio_risk_assessment():
     }
 
 @router.post("/risk-limits")
-def update_risk_limits(limits: RiskLimitsUpdate):
+def update_risk_limits(limits: RiskLimitsUpdate, risk_manager=Depends(get_risk_manager)):
     """Update risk management limits"""
     
     success = risk_manager.update_risk_limits({
@@ -94,7 +92,7 @@ def update_risk_limits(limits: RiskLimitsUpdate):
     return {"message": "Risk limits updated successfully"}
 
 @router.get("/connection-status")
-def get_connection_status():
+def get_connection_status(ibkr_service=Depends(get_ibkr_service)):
     """Get broker connection status"""
     
     return {
@@ -104,7 +102,7 @@ def get_connection_status():
     }
 
 @router.post("/reconnect")
-async def reconnect_broker():
+async def reconnect_broker(ibkr_service=Depends(get_ibkr_service)):
     """Attempt to reconnect to IBKR"""
     
     try:
@@ -120,7 +118,10 @@ async def reconnect_broker():
         raise HTTPException(status_code=500, detail=f"Reconnection error: {str(e)}")
 
 @router.get("/performance-metrics")
-def get_account_performance_metrics():
+def get_account_performance_metrics(
+    ibkr_service=Depends(get_ibkr_service),
+    risk_manager=Depends(get_risk_manager)
+):
     """Get account performance metrics"""
     
     # This would typically pull from your database of historical account snapshots
@@ -0,0 +1,94 @@
+import asyncio
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from ai_core.core.config import settings
+from ai_core.core.profiler import loop_monitor, profiler, task_stacks, task_stacks_folded
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Check X-Admin-Token; admin routes are disabled while ADMIN_TOKEN is unset"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Admin routes are disabled; set ADMIN_TOKEN to enable them")
+    if not hmac.compare_digest(x_admin_token or "", settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+class SlowCallbackConfig(BaseModel):
+    enabled: bool = True
+    threshold_ms: Optional[float] = None
+
+
+@router.post("/profiler/start")
+def start_profiler(
+    seconds: float = Query(30, gt=0),
+    interval_ms: float = Query(5, ge=1, le=1000),
+):
+    """Start sampling all threads for up to ``seconds``"""
+    if seconds > settings.profiler_max_seconds:
+        raise HTTPException(status_code=400, detail=f"seconds must be <= {settings.profiler_max_seconds}")
+    try:
+        profiler.start(seconds, interval_ms / 1000.0)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return profiler.status()
+
+
+@router.post("/profiler/stop", response_class=PlainTextResponse)
+async def stop_profiler():
+    """Stop the profiler and return the folded stacks"""
+    await asyncio.to_thread(profiler.stop)
+    return profiler.folded()
+
+
+@router.get("/profiler")
+def get_profiler_status():
+    return profiler.status()
+
+
+@router.get("/profiler/folded", response_class=PlainTextResponse)
+def get_profile():
+    """Folded stacks of the current or last run (flamegraph.pl / speedscope input)"""
+    return profiler.folded()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(5, ge=1, le=1000),
+):
+    """Sample for ``seconds`` and return folded stacks in one call"""
+    start_profiler(seconds, interval_ms)
+    await asyncio.sleep(seconds)
+    return await stop_profiler()
+
+
+@router.get("/tasks")
+async def get_task_stacks(format: str = Query("json", pattern="^(json|folded)$")):
+    """Await stacks of every pending asyncio task"""
+    if format == "folded":
+        return PlainTextResponse(task_stacks_folded())
+    return {"tasks": task_stacks()}
+
+
+@router.get("/loop")
+def get_loop_status():
+    """Event loop lag and recent slow callbacks"""
+    return loop_monitor.status()
+
+
+@router.post("/loop/slow-callbacks")
+async def configure_slow_callbacks(config: SlowCallbackConfig):
+    """Toggle slow-callback detection; runs on the loop thread it instruments"""
+    if config.enabled:
+        loop_monitor.enable_slow_callbacks(config.threshold_ms)
+    else:
+        loop_monitor.disable_slow_callbacks()
+    return loop_monitor.status()
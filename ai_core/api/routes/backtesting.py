@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ai_core.database.database import get_db
-from ai_core.backtesting.engine import BacktestingEngine
-from ai_core.database.models import BacktestResult
+from ai_core.core.config import settings
+from ai_core.core.container import get_backtest_jobs, get_backtesting_engine, get_walk_forward_runner
+from ai_core.core.imports import lazy_import
+from ai_core.database.models import BacktestJob, BacktestResult
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
+# numpy/pandas/pyarrow load on the first artifact read, not at API startup
+artifacts = lazy_import("ai_core.backtesting.artifacts")
+
 router = APIRouter()
-backtesting_engine = BacktestingEngine()
 
 class BacktestRequest(BaseModel):
     strategy_id: int
@@ -17,9 +21,9 @@ class BacktestRequest(BaseModel):
     initial_capital: float = 100000
     symbols: Optional[List[str]] = ['EURUSD', 'GBPUSD', 'XAUUSD']
 
-@router.post("/run")
-async def run_backtest(request: BacktestRequest, db: Session = Depends(get_db)):
-    """Run a backtest for a strategy"""
+@router.post("/run", status_code=202)
+async def run_backtest(request: BacktestRequest, backtest_jobs=Depends(get_backtest_jobs)):
+    """Queue a backtest for a strategy and return its job"""
     
     try:
         start_date = datetime.fromisoformat(request.start_date.replace('Z', '+00:00'))
@@ -33,32 +37,93 @@ async def run_backtest(request: BacktestRequest, db: Session = Depends(get_db)):
     if request.initial_capital <= 0:
         raise HTTPException(status_code=400, detail="Initial capital must be positive")
     
-    results = await backtesting_engine.run_backtest(
+    # Backtests run in the worker pool; poll /jobs/{job_id} for progress
+    return await backtest_jobs.submit(
         strategy_id=request.strategy_id,
         start_date=start_date,
         end_date=end_date,
         initial_capital=request.initial_capital,
         symbols=request.symbols
     )
+
+@router.get("/jobs")
+async def list_backtest_jobs(
+    strategy_id: Optional[int] = None,
+    status: Optional[str] = None,
+    limit: int = 50,
+    backtest_jobs=Depends(get_backtest_jobs)
+):
+    """List recent backtest jobs"""
+    jobs = await backtest_jobs.list_jobs(strategy_id=strategy_id, status=status, limit=min(limit, 500))
+    return {"jobs": jobs}
+
+@router.get("/jobs/{job_id}")
+async def get_backtest_job(job_id: str, backtest_jobs=Depends(get_backtest_jobs)):
+    """Get status and progress of a backtest job"""
+    job = await backtest_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    return job
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_backtest_job(job_id: str, backtest_jobs=Depends(get_backtest_jobs)):
+    """Cancel a queued or running backtest job"""
+    job = await backtest_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    return job
+
+@router.get("/jobs/{job_id}/result")
+def get_backtest_job_result(
+    job_id: str,
+    points: int = settings.backtest_chart_points,
+    db: Session = Depends(get_db)
+):
+    """Get the result of a completed backtest job"""
+    job = db.query(BacktestJob).filter(BacktestJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    if job.status != 'COMPLETED':
+        raise HTTPException(status_code=409, detail=f"Backtest job is {job.status.lower()}")
     
-    if 'error' in results:
-        raise HTTPException(status_code=400, detail=results['error'])
-    
-    return results
+    result = get_detailed_backtest_result(job.result_id, points, db) if job.result_id else None
+    return {"job_id": job.id, "summary": job.summary, "result": result}
 
 @router.get("/results/{strategy_id}")
-async def get_backtest_results(strategy_id: int):
+async def get_backtest_results(strategy_id: int, backtesting_engine=Depends(get_backtesting_engine)):
     """Get historical backtest results for a strategy"""
     
     results = await backtesting_engine.get_backtest_results(strategy_id)
     return {"strategy_id": strategy_id, "results": results}
 
-@router.get("/results/detailed/{result_id}")
-def get_detailed_backtest_result(result_id: int, db: Session = Depends(get_db)):
-    """Get detailed backtest result including equity curve and trades"""
+def _get_result(db: Session, result_id: int) -> BacktestResult:
     result = db.query(BacktestResult).filter(BacktestResult.id == result_id).first()
     if not result:
         raise HTTPException(status_code=404, detail="Backtest result not found")
+    return result
+
+def _load_artifact(result: BacktestResult, name: str, start: Optional[datetime] = None,
+                   end: Optional[datetime] = None):
+    """Equity curve or trades as a DataFrame, from artifacts or legacy JSON."""
+    path = result.equity_curve_path if name == artifacts.EQUITY_CURVE else result.trade_history_path
+    if path:
+        return artifacts.read_artifact(path, name, start, end)
+    
+    records = result.equity_curve if name == artifacts.EQUITY_CURVE else result.trade_history
+    frame = artifacts.frame_from_records(records or [], artifacts.TIME_COLUMNS[name])
+    return artifacts.slice_window(frame, artifacts.TIME_COLUMNS[name][0], start, end)
+
+@router.get("/results/detailed/{result_id}")
+def get_detailed_backtest_result(
+    result_id: int,
+    points: int = settings.backtest_chart_points,
+    db: Session = Depends(get_db)
+):
+    """Get detailed backtest result including a chart-sized equity curve and trades"""
+    result = _get_result(db, result_id)
+    equity = artifacts.downsample_equity(_load_artifact(result, artifacts.EQUITY_CURVE), points)
+    trades = _load_artifact(result, artifacts.TRADES)
+    
     return {
         "id": result.id,
         "strategy_id": result.strategy_id,
@@ -75,14 +140,113 @@ def get_detailed_backtest_result(result_id: int, db: Session = Depends(get_db)):
         "sharpe_ratio": result.sharpe_ratio,
         "max_drawdown": result.max_drawdown,
         "avg_trade_duration": result.avg_trade_duration,
-        "equity_curve": result.equity_curve,
-        "trade_history": result.trade_history,
+        "equity_curve": artifacts.frame_to_records(equity),
+        "trade_history": artifacts.frame_to_records(trades),
         "monthly_returns": result.monthly_returns,
         "created_at": result.created_at.isoformat()
     }
 
+@router.get("/results/{result_id}/equity")
+def get_backtest_equity(
+    result_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    points: Optional[int] = settings.backtest_chart_points,
+    db: Session = Depends(get_db)
+):
+    """Equity curve for a time window, LTTB-downsampled to at most ``points``"""
+    result = _get_result(db, result_id)
+    equity = _load_artifact(result, artifacts.EQUITY_CURVE, start, end)
+    total_points = len(equity)
+    if points:
+        equity = artifacts.downsample_equity(equity, points)
+    
+    return {
+        "result_id": result_id,
+        "total_points": total_points,
+        "points": len(equity),
+        "equity_curve": artifacts.frame_to_records(equity)
+    }
+
+@router.get("/results/{result_id}/trades")
+def get_backtest_trades(
+    result_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    offset: int = 0,
+    limit: int = 500,
+    db: Session = Depends(get_db)
+):
+    """Trades entered within a time window, paged"""
+    result = _get_result(db, result_id)
+    trades = _load_artifact(result, artifacts.TRADES, start, end)
+    
+    return {
+        "result_id": result_id,
+        "total": len(trades),
+        "offset": offset,
+        "trades": artifacts.frame_to_records(trades.iloc[offset:offset + limit])
+    }
+
+class WalkForwardRequest(BaseModel):
+    strategy_id: int
+    start_date: str  # ISO format
+    end_date: str    # ISO format
+    train_days: int = 90
+    test_days: int = 30
+    step_days: Optional[int] = None  # defaults to test_days
+    anchored: bool = False
+    initial_capital: float = 100000
+    symbols: Optional[List[str]] = ['EURUSD', 'GBPUSD', 'XAUUSD']
+
+@router.post("/walk-forward", status_code=202)
+async def run_walk_forward(request: WalkForwardRequest, backtest_jobs=Depends(get_backtest_jobs)):
+    """Queue a walk-forward analysis and return its job"""
+    
+    try:
+        start_date = datetime.fromisoformat(request.start_date.replace('Z', '+00:00'))
+        end_date = datetime.fromisoformat(request.end_date.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use ISO format.")
+    
+    if start_date >= end_date:
+        raise HTTPException(status_code=400, detail="Start date must be before end date")
+    
+    if request.train_days <= 0 or request.test_days <= 0 or (request.step_days is not None and request.step_days <= 0):
+        raise HTTPException(status_code=400, detail="train_days, test_days and step_days must be positive")
+    
+    if (end_date - start_date).days < request.train_days + request.test_days:
+        raise HTTPException(status_code=400, detail="Date range is too short for a single train/test fold")
+    
+    # Folds run in the backtest worker pool; the finished job's summary has the report_id
+    return await backtest_jobs.submit_walk_forward(
+        strategy_id=request.strategy_id,
+        start_date=start_date,
+        end_date=end_date,
+        train_days=request.train_days,
+        test_days=request.test_days,
+        step_days=request.step_days,
+        anchored=request.anchored,
+        initial_capital=request.initial_capital,
+        symbols=request.symbols
+    )
+
+@router.get("/walk-forward/strategy/{strategy_id}")
+async def get_walk_forward_reports(strategy_id: int, walk_forward_runner=Depends(get_walk_forward_runner)):
+    """Get walk-forward reports for a strategy"""
+    reports = await walk_forward_runner.get_reports(strategy_id)
+    return {"strategy_id": strategy_id, "reports": reports}
+
+@router.get("/walk-forward/{report_id}")
+async def get_walk_forward_report(report_id: int, walk_forward_runner=Depends(get_walk_forward_runner)):
+    """Get a walk-forward report"""
+    report = await walk_forward_runner.get_report(report_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Walk-forward report not found")
+    return report
+
 @router.get("/performance/comparison")
-async def compare_strategies(strategy_ids: str, db: Session = Depends(get_db)):
+async def compare_strategies(strategy_ids: str, backtesting_engine=Depends(get_backtesting_engine)):
     """Compare performance of multiple strategies"""
     
     try:
@@ -114,8 +278,7 @@ async def compare_strategies(strategy_ids: str, db: Session = Depends(get_db)):
 async def optimize_strategy_parameters(
     strategy_id: int,
     parameter_ranges: dict,
-    optimization_metric: str = 'sharpe_ratio',
-    db: Session = Depends(get_db)
+    optimization_metric: str = 'sharpe_ratio'
 ):
     """Optimize strategy parameters using grid search"""
     
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ai_core.database.database import get_db
+from ai_core.api.pagination import clamp_limit, decode_cursor, set_next_cursor
+from ai_core.database.database import get_db, get_async_db
 from ai_core.database.models import Strategy
+from ai_core.core.container import get_strategy_manager
+from ai_core.strategy_engine import artifacts
 from ai_core.strategy_engine.rule_based import StrategyManager
 from pydantic import BaseModel
+import asyncio
 import os
-import shutil
 
 router = APIRouter()
-strategy_manager = StrategyManager()
 
 class StrategyCreate(BaseModel):
     name: str
@@ -24,11 +28,11 @@ class StrategyUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 @router.post("/", response_model=dict)
-async def create_strategy(strategy: StrategyCreate, db: Session = Depends(get_db)):
+async def create_strategy(strategy: StrategyCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new trading strategy"""
     
     # Check if strategy name already exists
-    existing = db.query(Strategy).filter(Strategy.name == strategy.name).first()
+    existing = await db.scalar(select(Strategy).where(Strategy.name == strategy.name))
     if existing:
         raise HTTPException(status_code=400, detail="Strategy name already exists")
     
@@ -40,8 +44,8 @@ async def create_strategy(strategy: StrategyCreate, db: Session = Depends(get_db
     )
     
     db.add(db_strategy)
-    db.commit()
-    db.refresh(db_strategy)
+    await db.commit()
+    await db.refresh(db_strategy)
     
     return {
         "id": db_strategy.id,
@@ -53,55 +57,145 @@ async def create_strategy(strategy: StrategyCreate, db: Session = Depends(get_db
 async def upload_strategy_file(
     strategy_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    shadow: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    strategy_manager=Depends(get_strategy_manager)
 ):
-    """Upload strategy file (Python script, C++ binary, or ML model)"""
+    """Upload strategy file (Python script, C++ binary, or ML model).
     
-    strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
+    The file is stored as a new content-addressed version and, if the
+    strategy is active, loaded in the background and swapped in without
+    interrupting the running version. With ``shadow=true`` the new version
+    only runs alongside the live one; see ``/{strategy_id}/shadow``.
+    """
+    
+    strategy = await db.get(Strategy, strategy_id)
     if not strategy:
         raise HTTPException(status_code=404, detail="Strategy not found")
     
-    # Create strategies directory if it doesn't exist
-    strategies_dir = "strategies"
-    os.makedirs(strategies_dir, exist_ok=True)
+    artifact = await asyncio.to_thread(artifacts.store_artifact, strategy_id, file.file, file.filename)
+    await strategy_manager.deploy_artifact(strategy_id, artifact.file_path, shadow=shadow)
     
-    # Save uploaded file
-    file_extension = os.path.splitext(file.filename)[1]
-    filename = f"strategy_{strategy_id}{file_extension}"
-    file_path = os.path.join(strategies_dir, filename)
+    return {
+        "message": "Strategy file uploaded successfully",
+        "file_path": artifact.file_path,
+        "version": artifact.version,
+        "shadow": shadow,
+    }
+
+@router.get("/{strategy_id}/versions")
+async def get_strategy_versions(strategy_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Stored artifact versions, newest first"""
+    strategy = await db.get(Strategy, strategy_id)
+    if not strategy:
+        raise HTTPException(status_code=404, detail="Strategy not found")
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    versions = await asyncio.to_thread(artifacts.list_versions, strategy_id)
+    return {
+        "strategy_id": strategy_id,
+        "current_version": artifacts.artifact_version(strategy.file_path),
+        "versions": [version.to_dict(strategy.file_path) for version in versions],
+    }
+
+@router.post("/{strategy_id}/versions/{version}/deploy")
+async def deploy_strategy_version(
+    strategy_id: int,
+    version: str,
+    shadow: bool = False,
+    strategy_manager=Depends(get_strategy_manager)
+):
+    """Switch to (or shadow) a previously uploaded version, e.g. to roll back"""
+    artifact = await asyncio.to_thread(artifacts.find_version, strategy_id, version)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Strategy version not found")
     
-    # Update strategy with file path
-    strategy.file_path = file_path
-    db.commit()
+    if not await strategy_manager.deploy_artifact(strategy_id, artifact.file_path, shadow=shadow):
+        raise HTTPException(status_code=404, detail="Strategy not found")
     
-    return {"message": "Strategy file uploaded successfully", "file_path": file_path}
+    return {"message": "Strategy version deployed", "version": version, "shadow": shadow}
+
+@router.get("/{strategy_id}/shadow")
+def get_strategy_shadow(strategy_id: int, strategy_manager=Depends(get_strategy_manager)):
+    """Signal agreement and latency of the shadow version against the live one"""
+    run = strategy_manager.warm_pool.get_shadow(strategy_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="No shadow version running")
+    return run.to_dict()
+
+@router.post("/{strategy_id}/shadow/promote")
+async def promote_strategy_shadow(strategy_id: int, strategy_manager=Depends(get_strategy_manager)):
+    """Make the shadow version live without reloading it"""
+    if not await strategy_manager.promote_shadow(strategy_id):
+        raise HTTPException(status_code=409, detail="No ready shadow version to promote")
+    return {"message": "Shadow version promoted"}
+
+@router.delete("/{strategy_id}/shadow")
+def stop_strategy_shadow(strategy_id: int, strategy_manager=Depends(get_strategy_manager)):
+    """Discard the shadow version"""
+    if strategy_manager.warm_pool.stop_shadow(strategy_id) is None:
+        raise HTTPException(status_code=404, detail="No shadow version running")
+    return {"message": "Shadow version stopped"}
+
+STRATEGY_LIST_COLUMNS = (
+    Strategy.id,
+    Strategy.name,
+    Strategy.description,
+    Strategy.strategy_type,
+    Strategy.is_active,
+    Strategy.total_trades,
+    Strategy.winning_trades,
+    Strategy.total_pnl,
+    Strategy.sharpe_ratio,
+    Strategy.max_drawdown,
+    Strategy.created_at,
+    Strategy.updated_at,
+)
 
 @router.get("/", response_model=List[dict])
-def get_strategies(db: Session = Depends(get_db)):
-    """Get all trading strategies"""
-    strategies = db.query(Strategy).all()
+def get_strategies(
+    response: Response,
+    is_active: Optional[bool] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get trading strategies ordered by id.
+    
+    Without ``limit`` every strategy is returned. With it, pass the
+    ``X-Next-Cursor`` response header back as ``cursor`` to fetch the next
+    page.
+    """
+    query = db.query(*STRATEGY_LIST_COLUMNS)
+    
+    if is_active is not None:
+        query = query.filter(Strategy.is_active == is_active)
+    
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.filter(Strategy.id > last_id)
+    
+    query = query.order_by(Strategy.id)
+    if limit is None:
+        rows = query.all()
+    else:
+        limit = clamp_limit(limit)
+        rows = query.limit(limit).all()
+        set_next_cursor(response, [row._mapping for row in rows], limit, "id")
     
     return [
         {
-            "id": s.id,
-            "name": s.name,
-            "description": s.description,
-            "strategy_type": s.strategy_type,
-            "is_active": s.is_active,
-            "total_trades": s.total_trades,
-            "winning_trades": s.winning_trades,
-            "total_pnl": s.total_pnl,
-            "sharpe_ratio": s.sharpe_ratio,
-            "max_drawdown": s.max_drawdown,
-            "created_at": s.created_at.isoformat(),
-            "updated_at": s.updated_at.isoformat()
+            **row._asdict(),
+            "created_at": row.created_at.isoformat(),
+            "updated_at": row.updated_at.isoformat()
         }
-        for s in strategies
+        for row in rows
     ]
 
+@router.get("/pool")
+def get_strategy_pool(strategy_manager=Depends(get_strategy_manager)):
+    """Load state of warm, loading and failed strategies"""
+    return {"strategies": strategy_manager.warm_pool.status()}
+
 @router.get("/{strategy_id}", response_model=dict)
 def get_strategy(strategy_id: int, db: Session = Depends(get_db)):
     """Get specific strategy details"""
@@ -155,11 +249,12 @@ def update_strategy(strategy_id: int, strategy_update: StrategyUpdate, db: Sessi
         strategy.is_active = strategy_update.is_active
     
     db.commit()
+    StrategyManager.notify_strategy_changed(strategy_id, bool(strategy.is_active))
     
     return {"message": "Strategy updated successfully"}
 
 @router.post("/{strategy_id}/activate")
-async def activate_strategy(strategy_id: int, db: Session = Depends(get_db)):
+async def activate_strategy(strategy_id: int, strategy_manager=Depends(get_strategy_manager)):
     """Activate a trading strategy"""
     success = await strategy_manager.activate_strategy(strategy_id)
     
@@ -169,7 +264,7 @@ async def activate_strategy(strategy_id: int, db: Session = Depends(get_db)):
     return {"message": "Strategy activated successfully"}
 
 @router.post("/{strategy_id}/deactivate")
-async def deactivate_strategy(strategy_id: int, db: Session = Depends(get_db)):
+async def deactivate_strategy(strategy_id: int, strategy_manager=Depends(get_strategy_manager)):
     """Deactivate a trading strategy"""
     success = await strategy_manager.deactivate_strategy(strategy_id)
     
@@ -186,12 +281,14 @@ def delete_strategy(strategy_id: int, db: Session = Depends(get_db)):
     if not strategy:
         raise HTTPException(status_code=404, detail="Strategy not found")
     
-    # Remove strategy file if it exists
+    # Remove strategy files (stored versions and any legacy upload)
+    artifacts.remove_artifacts(strategy_id)
     if strategy.file_path and os.path.exists(strategy.file_path):
         os.remove(strategy.file_path)
     
     db.delete(strategy)
     db.commit()
+    StrategyManager.notify_strategy_changed(strategy_id, False)
     
     return {"message": "Strategy deleted successfully"}
 
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ai_core.database.database import get_db
+from ai_core.api.pagination import clamp_limit, decode_cursor, iter_json_array, set_next_cursor
+from ai_core.database.database import SessionLocal, get_db, get_async_db
+from ai_core.database import trade_summary
 from ai_core.database.models import Trade
-from ai_core.strategy_engine.broker.ibkr_service import IBKRService
-from ai_core.risk_manager.risk_manager import RiskManager
+from ai_core.core.container import get_ibkr_service, get_risk_manager
 from pydantic import BaseModel
 from datetime import datetime
 
 router = APIRouter()
-ibkr_service = IBKRService()
-risk_manager = RiskManager()
+
+EXPORT_BATCH_SIZE = 1000
 
 class TradeRequest(BaseModel):
     symbol: str
@@ -23,14 +28,20 @@ class TradeRequest(BaseModel):
     strategy_id: Optional[int] = None
 
 @router.post("/", response_model=dict)
-async def create_trade(trade_request: TradeRequest, db: Session = Depends(get_db)):
+async def create_trade(
+    trade_request: TradeRequest,
+    db: AsyncSession = Depends(get_async_db),
+    ibkr_service=Depends(get_ibkr_service),
+    risk_manager=Depends(get_risk_manager)
+):
     """Execute a new trade"""
     
     # Risk assessment
     account_data = ibkr_service.get_account_data()
     account_value = float(account_data.get('NetLiquidation', {}).get('value', 100000))
     
-    risk_assessment = risk_manager.assess_trade_risk(
+    risk_assessment = await asyncio.to_thread(
+        risk_manager.assess_trade_risk,
         symbol=trade_request.symbol,
         action=trade_request.action,
         quantity=trade_request.quantity,
@@ -72,8 +83,8 @@ async def create_trade(trade_request: TradeRequest, db: Session = Depends(get_db
     )
     
     db.add(db_trade)
-    db.commit()
-    db.refresh(db_trade)
+    await db.commit()
+    await db.refresh(db_trade)
     
     return {
         "trade_id": db_trade.id,
@@ -82,49 +93,96 @@ async def create_trade(trade_request: TradeRequest, db: Session = Depends(get_db
         "risk_assessment": risk_assessment
     }
 
+# Columns served by the list and export endpoints; avoids hydrating full entities
+TRADE_LIST_COLUMNS = (
+    Trade.id,
+    Trade.strategy_id,
+    Trade.symbol,
+    Trade.action,
+    Trade.quantity,
+    Trade.entry_price,
+    Trade.exit_price,
+    Trade.pnl,
+    Trade.commission,
+    Trade.status,
+    Trade.entry_time,
+    Trade.exit_time,
+    Trade.stop_loss,
+    Trade.take_profit,
+    Trade.risk_score,
+)
+
+def _filtered_trades(query, status: Optional[str], symbol: Optional[str], strategy_id: Optional[int]):
+    if status:
+        query = query.filter(Trade.status == status)
+    if symbol:
+        query = query.filter(Trade.symbol == symbol)
+    if strategy_id:
+        query = query.filter(Trade.strategy_id == strategy_id)
+    return query
+
+def _trade_row(row) -> dict:
+    trade = row._asdict()
+    trade["entry_time"] = trade["entry_time"].isoformat() if trade["entry_time"] else None
+    trade["exit_time"] = trade["exit_time"].isoformat() if trade["exit_time"] else None
+    return trade
+
 @router.get("/", response_model=List[dict])
 def get_trades(
+    response: Response,
     status: Optional[str] = None,
     symbol: Optional[str] = None,
     strategy_id: Optional[int] = None,
     limit: int = 50,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get trades with optional filters"""
+    """Get trades with optional filters, newest first.
     
-    query = db.query(Trade)
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch
+    the next page.
+    """
     
-    if status:
-        query = query.filter(Trade.status == status)
+    limit = clamp_limit(limit)
+    query = _filtered_trades(db.query(*TRADE_LIST_COLUMNS), status, symbol, strategy_id)
     
-    if symbol:
-        query = query.filter(Trade.symbol == symbol)
+    if cursor:
+        entry_time, trade_id = decode_cursor(cursor, datetime, int)
+        query = query.filter(tuple_(Trade.entry_time, Trade.id) < tuple_(entry_time, trade_id))
     
-    if strategy_id:
-        query = query.filter(Trade.strategy_id == strategy_id)
+    rows = query.order_by(Trade.entry_time.desc(), Trade.id.desc()).limit(limit).all()
+    trades = [_trade_row(row) for row in rows]
     
-    trades = query.order_by(Trade.entry_time.desc()).limit(limit).all()
-    
-    return [
-        {
-            "id": trade.id,
-            "strategy_id": trade.strategy_id,
-            "symbol": trade.symbol,
-            "action": trade.action,
-            "quantity": trade.quantity,
-            "entry_price": trade.entry_price,
-            "exit_price": trade.exit_price,
-            "pnl": trade.pnl,
-            "commission": trade.commission,
-            "status": trade.status,
-            "entry_time": trade.entry_time.isoformat(),
-            "exit_time": trade.exit_time.isoformat() if trade.exit_time else None,
-            "stop_loss": trade.stop_loss,
-            "take_profit": trade.take_profit,
-            "risk_score": trade.risk_score
-        }
-        for trade in trades
-    ]
+    set_next_cursor(response, [row._mapping for row in rows], limit, "entry_time", "id")
+    return trades
+
+@router.get("/export")
+def export_trades(
+    status: Optional[str] = None,
+    symbol: Optional[str] = None,
+    strategy_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Stream all matching trades as a JSON array, oldest first"""
+    
+    def rows():
+        # The session lives as long as the response body is being produced
+        with SessionLocal() as db:
+            query = _filtered_trades(db.query(*TRADE_LIST_COLUMNS), status, symbol, strategy_id)
+            if since:
+                query = query.filter(Trade.entry_time >= since)
+            if until:
+                query = query.filter(Trade.entry_time < until)
+            query = (
+                query.order_by(Trade.entry_time, Trade.id)
+                .execution_options(stream_results=True)
+                .yield_per(EXPORT_BATCH_SIZE)
+            )
+            for row in query:
+                yield _trade_row(row)
+    
+    return StreamingResponse(iter_json_array(rows()), media_type="application/json")
 
 @router.get("/{trade_id}", response_model=dict)
 def get_trade(trade_id: int, db: Session = Depends(get_db)):
@@ -154,9 +212,13 @@ def get_trade(trade_id: int, db: Session = Depends(get_db)):
     }
 
 @router.put("/{trade_id}/close")
-async def close_trade(trade_id: int, db: Session = Depends(get_db)):
+async def close_trade(
+    trade_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    ibkr_service=Depends(get_ibkr_service)
+):
     """Manually close an open trade"""
-    trade = db.query(Trade).filter(Trade.id == trade_id).first()
+    trade = await db.get(Trade, trade_id)
     
     if not trade:
         raise HTTPException(status_code=404, detail="Trade not found")
@@ -194,7 +256,9 @@ async def close_trade(trade_id: int, db: Session = Depends(get_db)):
     else:
         trade.pnl = (trade.entry_price - current_price) * trade.quantity
     
-    db.commit()
+    # Keep the analytics summary in step with the trade in one transaction
+    await trade_summary.record_closed_trade(db, trade)
+    await db.commit()
     
     return {
         "message": "Trade closed successfully",
@@ -206,43 +270,44 @@ async def close_trade(trade_id: int, db: Session = Depends(get_db)):
 def get_trading_summary(db: Session = Depends(get_db)):
     """Get trading analytics summary"""
     
-    # All trades
-    all_trades = db.query(Trade).all()
-    closed_trades = [t for t in all_trades if t.status == 'CLOSED']
-    open_trades = [t for t in all_trades if t.status == 'OPEN']
-    
-    if not closed_trades:
-        return {
-            "total_trades": len(all_trades),
-            "open_trades": len(open_trades),
-            "closed_trades": 0,
-            "win_rate": 0,
-            "total_pnl": 0,
-            "avg_pnl_per_trade": 0
-        }
-    
-    # Calculate metrics
-    winning_trades = len([t for t in closed_trades if t.pnl > 0])
-    total_pnl = sum(t.pnl for t in closed_trades)
-    avg_pnl = total_pnl / len(closed_trades)
-    win_rate = winning_trades / len(closed_trades)
-    
-    # Recent performance (last 30 days)
-    thirty_days_ago = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    recent_trades = [t for t in closed_trades if t.entry_time >= thirty_days_ago]
-    recent_pnl = sum(t.pnl for t in recent_trades) if recent_trades else 0
+    summary = trade_summary.summarize(db, window_days=30)
+    totals = summary["totals"]
+    recent = summary["recent"]
     
     return {
-        "total_trades": len(all_trades),
-        "open_trades": len(open_trades),
-        "closed_trades": len(closed_trades),
-        "winning_trades": winning_trades,
-        "losing_trades": len(closed_trades) - winning_trades,
-        "win_rate": win_rate,
-        "total_pnl": total_pnl,
-        "avg_pnl_per_trade": avg_pnl,
-        "recent_pnl_30d": recent_pnl,
-        "recent_trades_30d": len(recent_trades)
+        "total_trades": summary["total_trades"],
+        "open_trades": summary["open_trades"],
+        "closed_trades": summary["closed_trades"],
+        "winning_trades": int(totals["winning_trades"]),
+        "losing_trades": int(totals["losing_trades"]),
+        "win_rate": totals["win_rate"],
+        "total_pnl": totals["total_pnl"],
+        "avg_pnl_per_trade": totals["avg_pnl_per_trade"],
+        "profit_factor": totals["profit_factor"],
+        "total_commission": totals["commission"],
+        "recent_pnl_30d": recent["total_pnl"],
+        "recent_trades_30d": int(recent["closed_trades"]),
+        "recent_win_rate_30d": recent["win_rate"]
+    }
+
+@router.get("/analytics/breakdown")
+def get_trading_breakdown(
+    by: str = "strategy",
+    days: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Closed-trade analytics grouped by strategy, symbol or day"""
+    
+    if by not in trade_summary.BREAKDOWNS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported breakdown '{by}', expected one of: {', '.join(trade_summary.BREAKDOWNS)}"
+        )
+    
+    return {
+        "by": by,
+        "days": days,
+        "rows": trade_summary.breakdown(db, by, window_days=days)
     }
 
 @router.post("/calculate-position-size")
@@ -251,7 +316,9 @@ def calculate_position_size(
     entry_price: float,
     stop_loss: float,
     risk_percent: float = 1.0,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    ibkr_service=Depends(get_ibkr_service),
+    risk_manager=Depends(get_risk_manager)
 ):
     """Calculate optimal position size for a trade"""
     
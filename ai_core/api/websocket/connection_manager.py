@@ -3,6 +3,7 @@ from fastapi import WebSocket
 import json
 
 from ai_core.core.logger import get_logger
+from ai_core.core.metrics import WS_BROADCAST_LATENCY, timed
 
 logger = get_logger(__name__)
 
@@ -32,6 +33,7 @@ class ConnectionManager:
             logger.error(f"Error sending personal message: {e}")
             self.disconnect(websocket)
     
+    @timed(WS_BROADCAST_LATENCY)
     async def broadcast(self, message: str):
         """Broadcast message to all connected clients"""
         disconnected_connections = []
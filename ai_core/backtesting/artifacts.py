@@ -0,0 +1,165 @@
+"""Columnar storage for backtest equity curves and trade histories.
+
+Large per-bar outputs are written as compressed Parquet files next to the
+database rather than into JSON columns on ``BacktestResult``. Readers can
+select a time window (pushed down to Parquet row groups) and downsample the
+equity curve with LTTB so charts never transfer more points than they draw.
+When ``pyarrow`` is unavailable, gzip-compressed JSON lines are used instead.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ai_core.core.config import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+EQUITY_CURVE = "equity_curve"
+TRADES = "trades"
+
+# Datetime columns per artifact; the first one is the window/sort key
+TIME_COLUMNS = {
+    EQUITY_CURVE: ("timestamp",),
+    TRADES: ("entry_time", "exit_time"),
+}
+
+ROW_GROUP_SIZE = 50_000
+
+
+def artifact_format() -> str:
+    return "parquet" if pq is not None else "jsonl.gz"
+
+
+def frame_from_records(records: Iterable[Dict[str, Any]], time_columns: Sequence[str] = ()) -> pd.DataFrame:
+    """Build a DataFrame from result dicts, parsing datetime columns."""
+    frame = pd.DataFrame.from_records(list(records))
+    for column in time_columns:
+        if column in frame:
+            frame[column] = pd.to_datetime(frame[column])
+    return frame
+
+
+def frame_to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON-ready dicts: ISO timestamps and ``None`` for missing values."""
+    frame = frame.copy()
+    for column in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[column]):
+            frame[column] = frame[column].map(lambda ts: ts.isoformat() if pd.notna(ts) else None)
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def write_artifacts(strategy_id: int, equity_curve: List[Dict[str, Any]],
+                    trades: List[Dict[str, Any]], base_dir: Optional[str] = None) -> Dict[str, str]:
+    """Write a backtest's equity curve and trades; returns their paths and format."""
+    fmt = artifact_format()
+    directory = os.path.join(base_dir or settings.backtest_artifact_dir, str(strategy_id), uuid.uuid4().hex)
+    os.makedirs(directory, exist_ok=True)
+
+    paths = {"format": fmt}
+    for name, records in ((EQUITY_CURVE, equity_curve), (TRADES, trades)):
+        path = os.path.join(directory, f"{name}.{fmt}")
+        _write_frame(frame_from_records(records, TIME_COLUMNS[name]), path, fmt)
+        paths[name] = path
+    return paths
+
+
+def _write_frame(frame: pd.DataFrame, path: str, fmt: str) -> None:
+    if fmt == "parquet":
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        pq.write_table(
+            table, path,
+            compression=settings.backtest_artifact_compression,
+            row_group_size=ROW_GROUP_SIZE,
+        )
+    else:
+        frame.to_json(path, orient="records", lines=True, date_format="iso", compression="gzip")
+
+
+def read_artifact(path: str, name: str, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read an artifact, optionally restricted to ``[start, end)`` on its time key."""
+    time_columns = TIME_COLUMNS[name]
+    key = time_columns[0]
+
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read Parquet backtest artifacts")
+        filters = []
+        if start is not None:
+            filters.append((key, ">=", pd.Timestamp(start)))
+        if end is not None:
+            filters.append((key, "<", pd.Timestamp(end)))
+        return pq.read_table(path, columns=columns, filters=filters or None).to_pandas()
+
+    frame = pd.read_json(path, lines=True, compression="gzip", convert_dates=list(time_columns))
+    frame = slice_window(frame, key, start, end)
+    return frame[columns] if columns else frame
+
+
+def slice_window(frame: pd.DataFrame, column: str, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None) -> pd.DataFrame:
+    """Rows with ``start <= frame[column] < end``."""
+    if frame.empty or column not in frame:
+        return frame
+    mask = np.ones(len(frame), dtype=bool)
+    if start is not None:
+        mask &= (frame[column] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (frame[column] < pd.Timestamp(end)).to_numpy()
+    return frame[mask]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling; returns the kept indices.
+
+    Keeps the first and last points and, for each bucket in between, the point
+    forming the largest triangle with the previously kept point and the mean
+    of the next bucket, which preserves peaks and drawdowns visually.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(max(int((i + 2) * every) + 1, end + 1), n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def downsample_equity(frame: pd.DataFrame, points: int,
+                      time_column: str = "timestamp", value_column: str = "equity") -> pd.DataFrame:
+    """Reduce an equity curve to at most ``points`` rows with LTTB."""
+    if len(frame) <= points or value_column not in frame:
+        return frame
+    x = frame[time_column].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    return frame.iloc[lttb_indices(x, frame[value_column].to_numpy(), points)]
+
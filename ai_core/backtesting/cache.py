@@ -0,0 +1,140 @@
+"""On-disk cache of backtest inputs.
+
+Historical bars are cached per ``(symbol, timeframe, start, end)`` and
+indicator series per ``(symbol, timeframe, start, end, indicator, params)``,
+so repeated runs and overlapping walk-forward folds reuse work instead of
+refetching data and recomputing indicators. Files are written atomically so
+concurrent worker processes can share the cache directory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ai_core.core.config import settings
+from ai_core.core.logger import get_logger
+from .panel import FIELDS, MarketPanel
+
+logger = get_logger(__name__)
+
+Source = Tuple[str, datetime, datetime]
+
+
+def cache_key(*parts: Any) -> str:
+    raw = json.dumps(parts, default=str, sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()[:24]
+
+
+def _atomic_save(path: str, writer: Callable[[Any], None]) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            writer(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class BacktestDataCache:
+    """Cache historical bars, aligned panels and indicator arrays on disk."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.backtest_cache_dir
+
+    def _path(self, kind: str, key: str, suffix: str = '') -> str:
+        return os.path.join(self.directory, kind, key + suffix)
+
+    # -- bars ----------------------------------------------------------------
+
+    def _bars_path(self, symbol: str, source: Source) -> str:
+        timeframe, start, end = source
+        return self._path('bars', cache_key(symbol, timeframe, start, end), '.npz')
+
+    def read_bars(self, symbol: str, source: Source) -> Optional[pd.DataFrame]:
+        path = self._bars_path(symbol, source)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            index = pd.DatetimeIndex(data['timestamp'])
+            return pd.DataFrame({field: data[field] for field in FIELDS if field in data}, index=index)
+
+    def write_bars(self, symbol: str, source: Source, frame: pd.DataFrame) -> None:
+        arrays = {'timestamp': frame.index.values.astype('datetime64[ns]')}
+        for field in FIELDS:
+            if field in frame:
+                arrays[field] = frame[field].to_numpy(dtype=np.float64)
+        _atomic_save(self._bars_path(symbol, source), lambda f: np.savez(f, **arrays))
+
+    async def load_panel(self, market_data_service: Any, symbols: Sequence[str], timeframe: str,
+                         start: datetime, end: datetime) -> MarketPanel:
+        """Build a panel for ``symbols``, fetching only bars that are not cached."""
+        source = (timeframe, start, end)
+        frames: Dict[str, pd.DataFrame] = {}
+        for symbol in symbols:
+            frame = await asyncio.to_thread(self.read_bars, symbol, source)
+            if frame is None:
+                logger.debug(f"Backtest data cache miss for {symbol} {timeframe} {start} - {end}")
+                records = await market_data_service.get_historical_data(symbol, timeframe, start, end)
+                frame = pd.DataFrame(records)
+                if frame.empty:
+                    frame = pd.DataFrame(columns=list(FIELDS), index=pd.DatetimeIndex([]))
+                else:
+                    frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+                    frame = frame.set_index('timestamp')
+                await asyncio.to_thread(self.write_bars, symbol, source, frame)
+            frames[symbol] = frame
+
+        panel = await asyncio.to_thread(MarketPanel.from_frames, frames)
+        panel.source = source
+        panel.cache = self
+        return panel
+
+    # -- panels ----------------------------------------------------------------
+
+    def store_panel(self, panel: MarketPanel) -> str:
+        """Persist a panel for memory-mapped loading by worker processes."""
+        key = cache_key(list(panel.symbols), panel.source)
+        directory = self._path('panels', key)
+        if not os.path.exists(os.path.join(directory, 'meta.json')):
+            parent = os.path.dirname(directory)
+            os.makedirs(parent, exist_ok=True)
+            tmp = tempfile.mkdtemp(dir=parent)
+            panel.save(tmp)
+            try:
+                os.replace(tmp, directory)
+            except OSError:
+                shutil.rmtree(tmp, ignore_errors=True)  # Another process stored it first
+        return directory
+
+    def open_panel(self, directory: str) -> MarketPanel:
+        panel = MarketPanel.load(directory)
+        panel.cache = self
+        return panel
+
+    # -- indicators -------------------------------------------------------------
+
+    def indicator(self, symbol: str, source: Source, name: str, field: str,
+                  params: Dict[str, Any], compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """Return a cached indicator series, computing and storing it on a miss."""
+        timeframe, start, end = source
+        path = self._path('indicators', cache_key(symbol, timeframe, start, end, name, field, params), '.npy')
+        if os.path.exists(path):
+            return np.load(path, mmap_mode='r')
+        values = np.asarray(compute(), dtype=np.float64)
+        _atomic_save(path, lambda f: np.save(f, values))
+        return values
+
@@ -1,10 +1,13 @@
-import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from ai_core.core.logger import get_logger
 from ai_core.database.models import Strategy, BacktestResult, Trade
-from ai_core.database.database import SessionLocal
+from ai_core.database.database import AsyncSessionLocal
+from sqlalchemy import select
+from .artifacts import EQUITY_CURVE, TRADES, write_artifacts
+from .execution import SIDES, ExecutionSimulator, Fill
+from .panel import MarketPanel
 from ..strategy_engine.market_data.market_data_service import MarketDataService
 from ..strategy_engine.rule_based import StrategyManager
 
@@ -12,17 +15,26 @@ import asyncio
 
 logger = get_logger(__name__)
 
+class BacktestCancelled(Exception):
+    """Raised from a progress callback to stop a running backtest."""
+
 class BacktestingEngine:
     """Backtesting engine for trading strategies"""
     
-    def __init__(self):
+    def __init__(self, execution: Optional[ExecutionSimulator] = None):
         self.market_data_service = MarketDataService()
         self.strategy_manager = StrategyManager()
+        self.execution = execution or ExecutionSimulator()
         
     async def run_backtest(self, strategy_id: int, start_date: datetime, 
                           end_date: datetime, initial_capital: float = 100000,
-                          symbols: List[str] = None) -> Dict[str, Any]:
-        """Run backtest for a strategy"""
+                          symbols: List[str] = None,
+                          progress_callback: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Run backtest for a strategy.
+        
+        ``progress_callback`` receives the completed fraction periodically and
+        may raise :class:`BacktestCancelled` to abort the run.
+        """
         
         if not symbols:
             symbols = ['EURUSD', 'GBPUSD', 'XAUUSD']
@@ -30,229 +42,260 @@ class BacktestingEngine:
         logger.info(f"Starting backtest for strategy {strategy_id} from {start_date} to {end_date}")
         
         try:
-            # Load strategy
-            strategy_instance = await self.strategy_manager.load_strategy(strategy_id)
+            strategy_instance = await self.build_strategy(strategy_id)
             if not strategy_instance:
                 return {'error': 'Failed to load strategy'}
             
-            # Get historical data for all symbols
-            historical_data = {}
+            # Get historical data for all symbols, aligned once into a T x S panel
+            records = {}
             for symbol in symbols:
-                data = await self.market_data_service.get_historical_data(
+                records[symbol] = await self.market_data_service.get_historical_data(
                     symbol, '1H', start_date, end_date
                 )
-                historical_data[symbol] = pd.DataFrame(data)
-                historical_data[symbol]['timestamp'] = pd.to_datetime(historical_data[symbol]['timestamp'])
-                historical_data[symbol].set_index('timestamp', inplace=True)
-            
-            # Initialize backtest state
-            backtest_state = {
-                'capital': initial_capital,
-                'positions': {},  # symbol -> position info
-                'trades': [],
-                'equity_curve': [],
-                'daily_returns': [],
-                'drawdowns': []
-            }
+            panel = MarketPanel.from_records(records)
             
-            # Get all unique timestamps and sort them
-            all_timestamps = set()
-            for symbol_data in historical_data.values():
-                all_timestamps.update(symbol_data.index)
-            
-            timestamps = sorted(list(all_timestamps))
-            
-            # Run simulation through each timestamp
-            for i, timestamp in enumerate(timestamps):
-                # Prepare market data for this timestamp
-                current_market_data = {}
-                for symbol, data in historical_data.items():
-                    if timestamp in data.index:
-                        row = data.loc[timestamp]
-                        current_market_data[symbol] = {
-                            'symbol': symbol,
-                            'timestamp': timestamp.isoformat(),
-                            'open': row['open'],
-                            'high': row['high'],
-                            'low': row['low'],
-                            'close': row['close'],
-                            'volume': row['volume'],
-                            'bid': row['close'] - 0.0002,
-                            'ask': row['close'] + 0.0002,
-                            'last': row['close']
-                        }
-                
-                if not current_market_data:
-                    continue
-                
-                # Update position values
-                self._update_positions(backtest_state, current_market_data)
-                
-                # Get strategy signal
-                try:
-                    signal = strategy_instance.predict(current_market_data)
-                    if signal and signal.get('confidence', 0) > 0.5:  # Confidence threshold
-                        await self._process_signal(backtest_state, signal, current_market_data, timestamp)
-                except Exception as e:
-                    logger.warning(f"Strategy prediction error at {timestamp}: {e}")
-                
-                # Record equity
-                current_equity = self._calculate_equity(backtest_state, current_market_data)
-                backtest_state['equity_curve'].append({
-                    'timestamp': timestamp.isoformat(),
-                    'equity': current_equity,
-                    'cash': backtest_state['capital'],
-                    'positions_value': current_equity - backtest_state['capital']
-                })
-                
-                # Calculate daily return if we have previous equity
-                if len(backtest_state['equity_curve']) > 1:
-                    prev_equity = backtest_state['equity_curve'][-2]['equity']
-                    daily_return = (current_equity - prev_equity) / prev_equity
-                    backtest_state['daily_returns'].append(daily_return)
-                
-                # Progress logging
-                if i % 100 == 0:
-                    logger.info(f"Backtest progress: {i}/{len(timestamps)} ({i/len(timestamps)*100:.1f}%)")
+            backtest_state = self.simulate(strategy_instance, panel, initial_capital, progress_callback)
             
             # Calculate final metrics
             results = self._calculate_backtest_metrics(backtest_state, initial_capital)
             
             # Save results to database
-            await self._save_backtest_results(strategy_id, start_date, end_date, 
-                                            initial_capital, backtest_state, results)
+            results['result_id'] = await self._save_backtest_results(
+                strategy_id, start_date, end_date, initial_capital, backtest_state, results
+            )
             
             logger.info(f"Backtest completed. Final equity: ${results['final_capital']:,.2f}")
             
             return results
             
+        except BacktestCancelled:
+            logger.info(f"Backtest for strategy {strategy_id} cancelled")
+            raise
         except Exception as e:
             logger.error(f"Backtest error: {e}")
             return {'error': str(e)}
     
-    async def _process_signal(self, backtest_state: Dict, signal: Dict, 
-                             market_data: Dict, timestamp: datetime):
-        """Process trading signal during backtest"""
+    async def build_strategy(self, strategy_id: int) -> Optional[Any]:
+        """A fresh strategy instance for one simulation.
+        
+        Built directly rather than through the live warm pool, so no warm-up
+        ``predict`` or live ``prepare()`` leaves state in it before the run.
+        """
+        strategy = await self.strategy_manager.fetch_strategy(strategy_id)
+        if strategy is None:
+            return None
+        return await asyncio.to_thread(self.strategy_manager.build_strategy, strategy)
+    
+    def simulate(self, strategy_instance: Any, panel: MarketPanel, initial_capital: float,
+                 progress_callback: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Run the bar loop over an aligned panel and return the final backtest state.
+        
+        Strategies defining ``predict_panel(view)`` see every symbol at once
+        through a :class:`PanelView` and may return one signal or a list;
+        other strategies get ``predict(market_data)`` with the bars at each step.
+        """
+        backtest_state = {
+            'capital': initial_capital,
+            'positions': {},  # symbol -> position info
+            'trades': [],
+            'pending_orders': [],  # orders waiting out the simulated latency
+            'equity_curve': [],
+            'daily_returns': [],
+            'drawdowns': []
+        }
+        predict_panel = getattr(strategy_instance, 'predict_panel', None)
+        total = len(panel)
+        
+        for i in range(total):
+            timestamp = panel.datetimes[i]
+            current_market_data = panel.bars_at(i)
+            if not current_market_data:
+                continue
+            for bar in current_market_data.values():
+                half_spread = self.execution.spread(bar)
+                bar['bid'] = bar['close'] - half_spread
+                bar['ask'] = bar['close'] + half_spread
+            
+            # Orders due at this bar fill at its open, before its range can hit their stops
+            self._fill_pending_orders(backtest_state, current_market_data, i, timestamp)
+            
+            # Resolve stop loss / take profit inside this bar
+            self._update_positions(backtest_state, current_market_data, timestamp)
+            
+            # Get strategy signal(s)
+            try:
+                if callable(predict_panel):
+                    signals = predict_panel(panel.view(i))
+                else:
+                    signals = strategy_instance.predict(current_market_data)
+            except Exception as e:
+                logger.warning(f"Strategy prediction error at {timestamp}: {e}")
+                signals = None
+            if isinstance(signals, dict):
+                signals = [signals]
+            for signal in signals or ():
+                if signal and signal.get('confidence', 0) > 0.5:  # Confidence threshold
+                    self._process_signal(backtest_state, signal, current_market_data, timestamp, i)
+            
+            # Record equity
+            current_equity = self._calculate_equity(backtest_state, current_market_data)
+            backtest_state['equity_curve'].append({
+                'timestamp': timestamp.isoformat(),
+                'equity': current_equity,
+                'cash': backtest_state['capital'],
+                'positions_value': current_equity - backtest_state['capital']
+            })
+            
+            # Calculate daily return if we have previous equity
+            if len(backtest_state['equity_curve']) > 1:
+                prev_equity = backtest_state['equity_curve'][-2]['equity']
+                daily_return = (current_equity - prev_equity) / prev_equity
+                backtest_state['daily_returns'].append(daily_return)
+            
+            # Progress logging
+            if i % 100 == 0:
+                logger.info(f"Backtest progress: {i}/{total} ({i/total*100:.1f}%)")
+                if progress_callback:
+                    progress_callback(i / total)
+        
+        return backtest_state
+    
+    def _process_signal(self, backtest_state: Dict, signal: Dict, 
+                        market_data: Dict, timestamp: datetime, bar_index: int):
+        """Turn a trading signal into an order, filled now or after the simulated latency"""
         symbol = signal.get('symbol', 'EURUSD')
         signal_type = signal.get('signal', 'HOLD')
         confidence = signal.get('confidence', 0)
         
-        if signal_type == 'HOLD' or confidence < 0.5:
+        if signal_type not in SIDES or confidence < 0.5:
             return
         
         if symbol not in market_data:
             return
         
-        current_price = market_data[symbol]['close']
+        order = {'symbol': symbol, 'action': signal_type, 'confidence': confidence}
+        if self.execution.latency_bars > 0:
+            order['due_index'] = bar_index + self.execution.latency_bars
+            backtest_state['pending_orders'].append(order)
+            return
+        
+        self._execute_order(backtest_state, order, market_data[symbol], timestamp, delayed=False)
+    
+    def _fill_pending_orders(self, backtest_state: Dict, market_data: Dict,
+                             bar_index: int, timestamp: datetime):
+        """Execute queued orders that have become due and have a bar to trade on"""
+        still_pending = []
+        for order in backtest_state['pending_orders']:
+            if order['due_index'] <= bar_index and order['symbol'] in market_data:
+                self._execute_order(backtest_state, order, market_data[order['symbol']], timestamp, delayed=True)
+            else:
+                still_pending.append(order)
+        backtest_state['pending_orders'] = still_pending
+    
+    def _execute_order(self, backtest_state: Dict, order: Dict, bar: Dict,
+                       timestamp: datetime, delayed: bool):
+        """Size and fill an entry order, reversing any existing position"""
+        symbol = order['symbol']
+        action = order['action']
+        reference_price = bar['open'] if delayed else bar['close']
         
         # Position sizing (risk 1% of capital per trade)
         risk_per_trade = backtest_state['capital'] * 0.01
-        stop_loss_distance = current_price * 0.002  # 0.2% stop loss
+        stop_loss_distance = reference_price * 0.002  # 0.2% stop loss
         position_size = risk_per_trade / stop_loss_distance
         
         # Limit position size to available capital
         max_position_value = backtest_state['capital'] * 0.1  # Max 10% per position
-        max_position_size = max_position_value / current_price
+        max_position_size = max_position_value / reference_price
         position_size = min(position_size, max_position_size)
         
-        if position_size * current_price > backtest_state['capital'] * 0.1:
+        if position_size <= 0:
             return  # Not enough capital
         
         # Check if we already have a position in this symbol
         if symbol in backtest_state['positions']:
             # Close existing position first
-            await self._close_position(backtest_state, symbol, current_price, timestamp)
-        
-        # Open new position
-        if signal_type in ['BUY', 'SELL']:
-            trade = {
-                'id': len(backtest_state['trades']) + 1,
-                'symbol': symbol,
-                'action': signal_type,
-                'quantity': position_size,
-                'entry_price': current_price,
-                'entry_time': timestamp,
-                'stop_loss': current_price - stop_loss_distance if signal_type == 'BUY' 
-                            else current_price + stop_loss_distance,
-                'take_profit': current_price + (stop_loss_distance * 2) if signal_type == 'BUY'
-                              else current_price - (stop_loss_distance * 2),
-                'status': 'OPEN',
-                'confidence': confidence
-            }
-            
-            backtest_state['positions'][symbol] = trade
-            backtest_state['trades'].append(trade)
-            
-            # Update capital (assuming no commission for simplicity)
-            position_value = position_size * current_price
-            backtest_state['capital'] -= position_value if signal_type == 'BUY' else -position_value
+            position = backtest_state['positions'][symbol]
+            exit_action = 'SELL' if position['action'] == 'BUY' else 'BUY'
+            exit_fill = self.execution.market_fill(
+                exit_action, position['quantity'], bar, reference=reference_price, reason='signal'
+            )
+            self._close_position(backtest_state, symbol, exit_fill, timestamp)
+        
+        fill = (self.execution.delayed_fill(action, position_size, bar) if delayed
+                else self.execution.market_fill(action, position_size, bar))
+        entry_price = fill.price
+        stop_loss_distance = entry_price * 0.002
+        
+        trade = {
+            'id': len(backtest_state['trades']) + 1,
+            'symbol': symbol,
+            'action': action,
+            'quantity': position_size,
+            'entry_price': entry_price,
+            'entry_time': timestamp,
+            'stop_loss': entry_price - stop_loss_distance if action == 'BUY' 
+                        else entry_price + stop_loss_distance,
+            'take_profit': entry_price + (stop_loss_distance * 2) if action == 'BUY'
+                          else entry_price - (stop_loss_distance * 2),
+            'status': 'OPEN',
+            'confidence': order['confidence'],
+            'commission': fill.commission
+        }
+        
+        backtest_state['positions'][symbol] = trade
+        backtest_state['trades'].append(trade)
+        
+        # Longs pay for the position, shorts receive the sale proceeds
+        backtest_state['capital'] -= SIDES[action] * position_size * entry_price + fill.commission
     
-    async def _close_position(self, backtest_state: Dict, symbol: str, 
-                             current_price: float, timestamp: datetime):
-        """Close an open position"""
+    def _close_position(self, backtest_state: Dict, symbol: str, fill: Fill, timestamp: datetime):
+        """Close an open position at the given fill"""
         if symbol not in backtest_state['positions']:
             return
         
         position = backtest_state['positions'][symbol]
+        side = SIDES[position['action']]
         
-        # Calculate P&L
-        if position['action'] == 'BUY':
-            pnl = (current_price - position['entry_price']) * position['quantity']
-        else:  # SELL
-            pnl = (position['entry_price'] - current_price) * position['quantity']
+        # P&L net of entry and exit commissions
+        gross_pnl = side * (fill.price - position['entry_price']) * position['quantity']
+        commission = position.get('commission', 0.0) + fill.commission
         
         # Update trade record
-        position['exit_price'] = current_price
+        position['exit_price'] = fill.price
         position['exit_time'] = timestamp
-        position['pnl'] = pnl
+        position['exit_reason'] = fill.reason
+        position['commission'] = commission
+        position['pnl'] = gross_pnl - commission
         position['status'] = 'CLOSED'
         
-        # Update capital
-        if position['action'] == 'BUY':
-            backtest_state['capital'] += position['quantity'] * current_price
-        else:  # SELL
-            backtest_state['capital'] += position['quantity'] * (2 * position['entry_price'] - current_price)
+        # Reverse the entry cash flow at the exit price
+        backtest_state['capital'] += side * position['quantity'] * fill.price - fill.commission
         
         # Remove from open positions
         del backtest_state['positions'][symbol]
     
-    def _update_positions(self, backtest_state: Dict, market_data: Dict):
-        """Update open positions with current market prices"""
-        positions_to_close = []
-        
-        for symbol, position in backtest_state['positions'].items():
+    def _update_positions(self, backtest_state: Dict, market_data: Dict, timestamp: datetime):
+        """Close positions whose stop loss or take profit traded during this bar"""
+        for symbol in list(backtest_state['positions']):
             if symbol not in market_data:
                 continue
             
-            current_price = market_data[symbol]['close']
-            
-            # Check stop loss and take profit
-            if position['action'] == 'BUY':
-                if current_price <= position['stop_loss'] or current_price >= position['take_profit']:
-                    positions_to_close.append((symbol, current_price))
-            else:  # SELL
-                if current_price >= position['stop_loss'] or current_price <= position['take_profit']:
-                    positions_to_close.append((symbol, current_price))
-        
-        # Close positions that hit stop loss or take profit
-        for symbol, price in positions_to_close:
-            asyncio.create_task(self._close_position(backtest_state, symbol, price, 
-                                                   datetime.now()))  # Timestamp will be updated
+            fill = self.execution.check_exit(backtest_state['positions'][symbol], market_data[symbol])
+            if fill is not None:
+                self._close_position(backtest_state, symbol, fill, timestamp)
     
     def _calculate_equity(self, backtest_state: Dict, market_data: Dict) -> float:
         """Calculate current portfolio equity"""
         equity = backtest_state['capital']
         
         for symbol, position in backtest_state['positions'].items():
+            # Symbols without a bar at this timestamp keep their last mark
             if symbol in market_data:
-                current_price = market_data[symbol]['close']
-                if position['action'] == 'BUY':
-                    position_value = position['quantity'] * current_price
-                    equity += position_value
-                else:  # SELL
-                    # For short positions, add the difference
-                    unrealized_pnl = (position['entry_price'] - current_price) * position['quantity']
-                    equity += unrealized_pnl
+                position['last_price'] = market_data[symbol]['close']
+            current_price = position.get('last_price', position['entry_price'])
+            # Longs hold an asset worth qty * price, shorts owe it
+            equity += SIDES[position['action']] * position['quantity'] * current_price
         
         return equity
     
@@ -335,10 +378,14 @@ class BacktestingEngine:
     
     async def _save_backtest_results(self, strategy_id: int, start_date: datetime,
                                    end_date: datetime, initial_capital: float,
-                                   backtest_state: Dict, results: Dict):
-        """Save backtest results to database"""
-        db = SessionLocal()
+                                   backtest_state: Dict, results: Dict) -> Optional[int]:
+        """Save backtest results to database; returns the new result id"""
         try:
+            # Columnar artifacts are written off the event loop
+            artifact_paths = await asyncio.to_thread(
+                write_artifacts, strategy_id, results['equity_curve'], results['trades']
+            )
+            
             backtest_result = BacktestResult(
                 strategy_id=strategy_id,
                 start_date=start_date,
@@ -354,26 +401,30 @@ class BacktestingEngine:
                 sharpe_ratio=results['sharpe_ratio'],
                 max_drawdown=results['max_drawdown'],
                 avg_trade_duration=results['avg_trade_duration'],
-                trade_history=results['trades'],
-                equity_curve=results['equity_curve']
+                artifact_format=artifact_paths['format'],
+                equity_curve_path=artifact_paths[EQUITY_CURVE],
+                trade_history_path=artifact_paths[TRADES]
             )
             
-            db.add(backtest_result)
-            db.commit()
+            async with AsyncSessionLocal() as db:
+                db.add(backtest_result)
+                await db.commit()
             logger.info(f"Backtest results saved for strategy {strategy_id}")
+            return backtest_result.id
             
         except Exception as e:
             logger.error(f"Error saving backtest results: {e}")
-        finally:
-            db.close()
+            return None
     
     async def get_backtest_results(self, strategy_id: int) -> List[Dict[str, Any]]:
         """Get historical backtest results for a strategy"""
-        db = SessionLocal()
-        try:
-            results = db.query(BacktestResult).filter(
-                BacktestResult.strategy_id == strategy_id
-            ).order_by(BacktestResult.created_at.desc()).all()
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(
+                select(BacktestResult)
+                .where(BacktestResult.strategy_id == strategy_id)
+                .order_by(BacktestResult.created_at.desc())
+            )
+            results = rows.scalars().all()
             
             return [
                 {
@@ -390,7 +441,4 @@ class BacktestingEngine:
                     'created_at': result.created_at.isoformat()
                 }
                 for result in results
-            ]
-            
-        finally:
-            db.close()
\ No newline at end of file
+            ]
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""Deterministic execution simulation for backtests.
+
+The simulator turns orders into fills using pluggable spread, slippage and
+commission models, resolves stop-loss/take-profit exits inside each bar from
+its high/low (or from tick prices when the bar carries them), and models
+latency as a whole number of bars between decision and fill. Nothing here
+reads the wall clock or schedules tasks, so identical inputs always produce
+identical fills.
+
+The core helpers (:func:`apply_costs`, :func:`intrabar_exits`) are plain
+numpy expressions that work on scalars or on arrays of positions/bars alike.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ai_core.core.config import settings
+
+SIDES = {'BUY': 1, 'SELL': -1}
+
+EXIT_NONE = 0
+EXIT_STOP = 1
+EXIT_TAKE = 2
+EXIT_REASONS = {EXIT_STOP: 'stop_loss', EXIT_TAKE: 'take_profit'}
+
+
+# -- vectorizable core -------------------------------------------------------
+
+def apply_costs(reference, side, half_spread, slippage):
+    """Fill price after crossing half the spread and slipping against the order."""
+    return reference + side * (half_spread + slippage)
+
+
+def intrabar_exits(side, stop, take, open_, high, low):
+    """Resolve stop-loss/take-profit hits from bar extremes.
+
+    Returns ``(reason, price)`` where ``reason`` is ``EXIT_NONE``,
+    ``EXIT_STOP`` or ``EXIT_TAKE`` and ``price`` is the trigger level, or the
+    bar open when the market gapped through it (``nan`` when nothing hit).
+    Without tick data the path inside a bar is unknown, so when both levels
+    fall within one bar the stop is assumed to have been hit first.
+    """
+    side, stop, take = np.asarray(side), np.asarray(stop), np.asarray(take)
+    open_, high, low = np.asarray(open_), np.asarray(high), np.asarray(low)
+    is_long = side > 0
+
+    stop_hit = np.where(is_long, low <= stop, high >= stop)
+    take_hit = np.where(is_long, high >= take, low <= take)
+    gap_stop = np.where(is_long, open_ <= stop, open_ >= stop)
+    gap_take = np.where(is_long, open_ >= take, open_ <= take)
+
+    reason = np.where(stop_hit, EXIT_STOP, np.where(take_hit, EXIT_TAKE, EXIT_NONE))
+    # An open already beyond the take-profit fills there before the stop can trade
+    reason = np.where(gap_take, EXIT_TAKE, reason)
+
+    price = np.where(
+        reason == EXIT_STOP, np.where(gap_stop, open_, stop),
+        np.where(reason == EXIT_TAKE, np.where(gap_take, open_, take), np.nan),
+    )
+    return reason, price
+
+
+def first_touch(prices: Sequence[float], side: int, stop: float, take: float) -> Tuple[int, float]:
+    """Resolve an exit against a bar's ticks in time order."""
+    prices = np.asarray(prices, dtype=np.float64)
+    if side > 0:
+        stop_mask, take_mask = prices <= stop, prices >= take
+    else:
+        stop_mask, take_mask = prices >= stop, prices <= take
+
+    n = len(prices)
+    stop_idx = int(np.argmax(stop_mask)) if stop_mask.any() else n
+    take_idx = int(np.argmax(take_mask)) if take_mask.any() else n
+    if stop_idx == n and take_idx == n:
+        return EXIT_NONE, float('nan')
+    if stop_idx <= take_idx:
+        return EXIT_STOP, float(prices[stop_idx])
+    return EXIT_TAKE, float(prices[take_idx])
+
+
+# -- cost models -----------------------------------------------------------
+
+class FixedSpread:
+    """Constant half-spread in price units."""
+
+    def __init__(self, half_spread: float):
+        self.half_spread = half_spread
+
+    def __call__(self, bar: Dict[str, Any]) -> float:
+        return self.half_spread
+
+
+class QuotedSpread:
+    """Half the bar's quoted bid/ask spread, falling back to a constant."""
+
+    def __init__(self, fallback: float):
+        self.fallback = fallback
+
+    def __call__(self, bar: Dict[str, Any]) -> float:
+        bid, ask = bar.get('bid'), bar.get('ask')
+        if bid is None or ask is None or ask < bid:
+            return self.fallback
+        return (ask - bid) / 2.0
+
+
+class FixedSlippage:
+    """Slippage proportional to price, in basis points."""
+
+    def __init__(self, bps: float = 0.0):
+        self.bps = bps
+
+    def __call__(self, bar: Dict[str, Any]) -> float:
+        return bar['close'] * self.bps / 10_000
+
+
+class RangeSlippage:
+    """Slippage as a fraction of the bar's high-low range (volatility proxy)."""
+
+    def __init__(self, fraction: float = 0.1):
+        self.fraction = fraction
+
+    def __call__(self, bar: Dict[str, Any]) -> float:
+        return (bar['high'] - bar['low']) * self.fraction
+
+
+class Commission:
+    """Per-unit plus notional-rate commission with an optional minimum."""
+
+    def __init__(self, per_unit: float = 0.0, rate: float = 0.0, minimum: float = 0.0):
+        self.per_unit = per_unit
+        self.rate = rate
+        self.minimum = minimum
+
+    def __call__(self, quantity, price):
+        fee = np.abs(quantity) * (self.per_unit + self.rate * price)
+        return np.maximum(fee, self.minimum) if self.minimum else fee
+
+
+# -- simulator ---------------------------------------------------------------
+
+@dataclass(slots=True)
+class Fill:
+    price: float
+    commission: float
+    reason: str
+
+
+class ExecutionSimulator:
+    """Fill orders and resolve protective exits for the backtesting engine."""
+
+    def __init__(self, spread=None, slippage=None, commission=None, latency_bars: Optional[int] = None):
+        self.spread = spread or FixedSpread(settings.backtest_half_spread)
+        self.slippage = slippage or FixedSlippage(settings.backtest_slippage_bps)
+        self.commission = commission or Commission(
+            per_unit=settings.backtest_commission_per_unit,
+            rate=settings.backtest_commission_rate,
+        )
+        self.latency_bars = settings.backtest_latency_bars if latency_bars is None else latency_bars
+
+    def market_fill(self, action: str, quantity: float, bar: Dict[str, Any],
+                    reference: Optional[float] = None, reason: str = 'signal') -> Fill:
+        """Fill a market order against ``bar`` (at its close unless ``reference`` is given)."""
+        side = SIDES[action]
+        price = float(apply_costs(
+            bar['close'] if reference is None else reference, side, self.spread(bar), self.slippage(bar)
+        ))
+        return Fill(price, float(self.commission(quantity, price)), reason)
+
+    def delayed_fill(self, action: str, quantity: float, bar: Dict[str, Any]) -> Fill:
+        """Fill an order that became due at ``bar``; it trades at the open."""
+        return self.market_fill(action, quantity, bar, reference=bar['open'])
+
+    def check_exit(self, position: Dict[str, Any], bar: Dict[str, Any]) -> Optional[Fill]:
+        """Return the fill if the position's stop-loss or take-profit traded in ``bar``."""
+        side = SIDES[position['action']]
+        stop, take = position['stop_loss'], position['take_profit']
+
+        ticks = bar.get('ticks')
+        if ticks is not None and len(ticks):
+            reason, level = first_touch(ticks, side, stop, take)
+        else:
+            reason, level = intrabar_exits(side, stop, take, bar['open'], bar['high'], bar['low'])
+            reason, level = int(reason), float(level)
+
+        if reason == EXIT_NONE:
+            return None
+
+        quantity = position['quantity']
+        if reason == EXIT_STOP:
+            # Stops become market orders: pay the spread and slip against the exit
+            price = float(apply_costs(level, -side, self.spread(bar), self.slippage(bar)))
+        else:
+            price = level  # Resting limit order fills at its level (or better on a gap)
+        return Fill(price, float(self.commission(quantity, price)), EXIT_REASONS[reason])
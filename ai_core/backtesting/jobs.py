@@ -0,0 +1,425 @@
+"""Background execution of backtests.
+
+Backtests are CPU-bound, so running them inside a request handler stalls the
+event loop that also serves trading routes and the WebSocket stream. Jobs are
+persisted in ``backtest_jobs`` and executed in a separate process pool at a
+lower CPU priority. Workers write progress and results back to the database
+and poll it for cancellation requests, so job state survives the request that
+created it and is visible to every API process.
+
+Each job records the API process that owns it, which refreshes
+``heartbeat_at`` while the job is active. Any process may fail active jobs
+whose owner stopped heartbeating; the owner's later status writes are
+conditional on the job still being active, so they never resurrect it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import multiprocessing
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, inspect, or_, select, text, update
+
+from ai_core.core.config import settings
+from ai_core.core.logger import get_logger
+from ai_core.database.database import AsyncSessionLocal, SessionLocal, dispose_engines, engine
+from ai_core.database.models import BacktestJob
+
+logger = get_logger(__name__)
+
+ACTIVE_STATUSES = ('PENDING', 'RUNNING')
+STALE_HEARTBEATS = 4  # missed heartbeat intervals before another process fails a job
+
+# host:pid:nonce of this API process
+INSTANCE_ID = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def job_to_dict(job: BacktestJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "strategy_id": job.strategy_id,
+        "status": job.status,
+        "progress": job.progress,
+        "parameters": job.parameters,
+        "cancel_requested": job.cancel_requested,
+        "result_id": job.result_id,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "owner": job.owner,
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+    }
+
+
+# -- worker process ---------------------------------------------------------
+
+def _init_worker(nice: int) -> None:
+    # Research jobs yield the CPU to the API and trading processes
+    if nice and hasattr(os, "nice"):
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+
+
+def _update_job(job_id: str, statuses: Optional[Sequence[str]] = None, **values: Any) -> bool:
+    """Update a job, only while its status is in ``statuses`` if given; False if nothing matched."""
+    with SessionLocal() as db:
+        query = db.query(BacktestJob).filter(BacktestJob.id == job_id)
+        if statuses is not None:
+            query = query.filter(BacktestJob.status.in_(statuses))
+        updated = query.update(values, synchronize_session=False)
+        db.commit()
+        return updated > 0
+
+
+def metrics_summary(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Headline metrics without the per-bar payloads; non-finite floats become None."""
+    summary = {}
+    for key, value in results.items():
+        if key in ('equity_curve', 'trades'):
+            continue
+        if isinstance(value, float):
+            value = float(value) if math.isfinite(value) else None
+        summary[key] = value
+    return summary
+
+
+class _JobProgress:
+    """Progress callback run inside the worker; also checks for cancellation."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._last = 0.0
+
+    def __call__(self, fraction: float) -> None:
+        now = time.monotonic()
+        if now - self._last < settings.backtest_progress_interval:
+            return
+        self._last = now
+
+        from .engine import BacktestCancelled
+
+        with SessionLocal() as db:
+            job = db.get(BacktestJob, self.job_id)
+            # A job failed by recovery meanwhile is abandoned like a cancelled one
+            if job is None or job.cancel_requested or job.status != 'RUNNING':
+                raise BacktestCancelled()
+            job.progress = fraction
+            job.heartbeat_at = datetime.utcnow()
+            db.commit()
+
+
+async def _run_walk_forward(job_id: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    from .walk_forward import WalkForwardRunner
+
+    report = await WalkForwardRunner().run(
+        strategy_id=parameters['strategy_id'],
+        start_date=datetime.fromisoformat(parameters['start_date']),
+        end_date=datetime.fromisoformat(parameters['end_date']),
+        train_days=parameters['train_days'],
+        test_days=parameters['test_days'],
+        step_days=parameters.get('step_days'),
+        anchored=parameters.get('anchored', False),
+        initial_capital=parameters['initial_capital'],
+        symbols=parameters.get('symbols'),
+        progress_callback=_JobProgress(job_id),
+    )
+    if 'error' in report:
+        return report
+    return {'result_id': report['backtest_result_id'], 'report_id': report['id'], **report['summary']}
+
+
+async def _run_in_worker(job_id: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    from .engine import BacktestingEngine
+
+    try:
+        if parameters.get('kind') == 'walk_forward':
+            return await _run_walk_forward(job_id, parameters)
+        return await BacktestingEngine().run_backtest(
+            strategy_id=parameters['strategy_id'],
+            start_date=datetime.fromisoformat(parameters['start_date']),
+            end_date=datetime.fromisoformat(parameters['end_date']),
+            initial_capital=parameters['initial_capital'],
+            symbols=parameters.get('symbols'),
+            progress_callback=_JobProgress(job_id),
+        )
+    finally:
+        # Pooled async connections are bound to this event loop
+        await dispose_engines()
+
+
+def run_backtest_job(job_id: str, parameters: Dict[str, Any]) -> str:
+    """Worker-process entry point; returns the job's final status."""
+    # The engine (numpy/pandas) is only imported in workers, not by the API process
+    from .engine import BacktestCancelled
+
+    with SessionLocal() as db:
+        job = db.get(BacktestJob, job_id)
+        if job is None:
+            return 'FAILED'
+        if job.status != 'PENDING':
+            return job.status  # failed by recovery while queued
+        if job.cancel_requested:
+            job.status = 'CANCELLED'
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            return job.status
+
+    now = datetime.utcnow()
+    if not _update_job(job_id, ('PENDING',), status='RUNNING', started_at=now, heartbeat_at=now):
+        return 'FAILED'
+
+    try:
+        results = asyncio.run(_run_in_worker(job_id, parameters))
+    except BacktestCancelled:
+        return _finish(job_id, status='CANCELLED')
+    except Exception as e:
+        return _finish(job_id, status='FAILED', error=str(e))
+
+    if 'error' in results:
+        return _finish(job_id, status='FAILED', error=results['error'])
+
+    return _finish(
+        job_id,
+        status='COMPLETED',
+        progress=1.0,
+        result_id=results.get('result_id'),
+        summary=metrics_summary(results),
+    )
+
+
+def _finish(job_id: str, **values: Any) -> str:
+    """Record a running job's outcome unless it was failed or cancelled meanwhile."""
+    if _update_job(job_id, ('RUNNING',), finished_at=datetime.utcnow(), **values):
+        return values['status']
+    logger.warning(f"Backtest job {job_id} is no longer running; discarding its {values['status']} outcome")
+    with SessionLocal() as db:
+        job = db.get(BacktestJob, job_id)
+        return job.status if job else 'FAILED'
+
+
+def ensure_job_columns() -> None:
+    """Add ``backtest_jobs`` columns newer than the table (``create_all`` does not alter tables)."""
+    existing = {column['name'] for column in inspect(engine).get_columns('backtest_jobs')}
+    with engine.begin() as conn:
+        if 'owner' not in existing:
+            conn.execute(text("ALTER TABLE backtest_jobs ADD COLUMN owner VARCHAR(64)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_backtest_jobs_owner ON backtest_jobs (owner)"))
+        if 'heartbeat_at' not in existing:
+            conn.execute(text("ALTER TABLE backtest_jobs ADD COLUMN heartbeat_at TIMESTAMP"))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists but belongs to another user
+    return True
+
+
+# -- API process ------------------------------------------------------------
+
+class BacktestJobManager:
+    """Submit, track and cancel backtest jobs running in a process pool."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.backtest_max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: never inherit the API process's pooled DB connections or loop
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(settings.backtest_worker_nice,),
+            )
+        return self._executor
+
+    async def submit(self, strategy_id: int, start_date: datetime, end_date: datetime,
+                     initial_capital: float, symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Persist a new job and queue it; returns immediately."""
+        return await self._enqueue(strategy_id, {
+            'strategy_id': strategy_id,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'initial_capital': initial_capital,
+            'symbols': symbols,
+        })
+
+    async def submit_walk_forward(self, strategy_id: int, start_date: datetime, end_date: datetime,
+                                  train_days: int, test_days: int, step_days: Optional[int] = None,
+                                  anchored: bool = False, initial_capital: float = 100000,
+                                  symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Queue a walk-forward analysis; the finished job's summary carries its ``report_id``."""
+        return await self._enqueue(strategy_id, {
+            'kind': 'walk_forward',
+            'strategy_id': strategy_id,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'train_days': train_days,
+            'test_days': test_days,
+            'step_days': step_days,
+            'anchored': anchored,
+            'initial_capital': initial_capital,
+            'symbols': symbols,
+        })
+
+    async def _enqueue(self, strategy_id: int, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        job = BacktestJob(
+            id=uuid.uuid4().hex,
+            strategy_id=strategy_id,
+            status='PENDING',
+            progress=0.0,
+            parameters=parameters,
+            cancel_requested=False,
+            created_at=datetime.utcnow(),
+            owner=INSTANCE_ID,
+            heartbeat_at=datetime.utcnow(),
+        )
+        async with AsyncSessionLocal() as db:
+            db.add(job)
+            await db.commit()
+        self._start_heartbeat()
+
+        future = self._get_executor().submit(run_backtest_job, job.id, parameters)
+        self._futures[job.id] = future
+        future.add_done_callback(partial(self._on_done, job.id))
+        logger.info(f"Queued backtest job {job.id} for strategy {strategy_id}")
+        return job_to_dict(job)
+
+    def _on_done(self, job_id: str, future: Future) -> None:
+        # Runs on the pool's management thread
+        self._futures.pop(job_id, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            # The worker died before it could record an outcome
+            logger.error(f"Backtest job {job_id} crashed: {error}")
+            if isinstance(error, BrokenProcessPool):
+                self._executor = None  # Start a fresh pool on the next submit
+            _update_job(job_id, ACTIVE_STATUSES, status='FAILED', error=str(error) or type(error).__name__,
+                        finished_at=datetime.utcnow())
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(BacktestJob, job_id)
+            return job_to_dict(job) if job else None
+
+    async def list_jobs(self, strategy_id: Optional[int] = None, status: Optional[str] = None,
+                        limit: int = 50) -> List[Dict[str, Any]]:
+        query = select(BacktestJob).order_by(BacktestJob.created_at.desc()).limit(limit)
+        if strategy_id is not None:
+            query = query.where(BacktestJob.strategy_id == strategy_id)
+        if status:
+            query = query.where(BacktestJob.status == status)
+        async with AsyncSessionLocal() as db:
+            jobs = (await db.execute(query)).scalars().all()
+            return [job_to_dict(job) for job in jobs]
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job outright, or ask a running one to stop."""
+        async with AsyncSessionLocal() as db:
+            job = await db.get(BacktestJob, job_id)
+            if job is None:
+                return None
+            if job.status in ACTIVE_STATUSES:
+                future = self._futures.get(job_id)
+                if future is not None and future.cancel():
+                    job.status = 'CANCELLED'
+                    job.finished_at = datetime.utcnow()
+                else:
+                    job.cancel_requested = True
+                await db.commit()
+            return job_to_dict(job)
+
+    async def recover(self) -> int:
+        """Fail active jobs whose owning process is gone; returns how many.
+
+        Jobs owned by a dead process on this host fail immediately, others
+        once their heartbeat is stale, so a restart never touches jobs that
+        another live API process is running.
+        """
+        await asyncio.to_thread(ensure_job_columns)
+        async with AsyncSessionLocal() as db:
+            owners = (await db.execute(
+                select(BacktestJob.owner).distinct().where(
+                    BacktestJob.status.in_(ACTIVE_STATUSES),
+                    BacktestJob.owner.like(f"{INSTANCE_ID.split(':')[0]}:%"),
+                )
+            )).scalars().all()
+        dead = [owner for owner in owners if owner != INSTANCE_ID and not _pid_alive(int(owner.split(':')[1]))]
+        failed = await self._fail_jobs('Interrupted by server restart', BacktestJob.owner.in_(dead)) if dead else 0
+        failed += await self.fail_stale()
+        self._start_heartbeat()
+        return failed
+
+    async def fail_stale(self) -> int:
+        """Fail active jobs of other processes whose heartbeat is stale."""
+        cutoff = datetime.utcnow() - timedelta(seconds=STALE_HEARTBEATS * settings.backtest_job_heartbeat_interval)
+        last_seen = func.coalesce(BacktestJob.heartbeat_at, BacktestJob.started_at, BacktestJob.created_at)
+        return await self._fail_jobs(
+            'Owning process stopped responding',
+            or_(BacktestJob.owner.is_(None), BacktestJob.owner != INSTANCE_ID),
+            last_seen < cutoff,
+        )
+
+    async def _fail_jobs(self, error: str, *where: Any) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(BacktestJob)
+                .where(BacktestJob.status.in_(ACTIVE_STATUSES), *where)
+                .values(status='FAILED', error=error, finished_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        if result.rowcount:
+            logger.warning(f"Marked {result.rowcount} interrupted backtest jobs as failed: {error}")
+        return result.rowcount or 0
+
+    def _start_heartbeat(self) -> None:
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat())
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(settings.backtest_job_heartbeat_interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(BacktestJob)
+                        .where(BacktestJob.owner == INSTANCE_ID, BacktestJob.status.in_(ACTIVE_STATUSES))
+                        .values(heartbeat_at=datetime.utcnow())
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+                await self.fail_stale()
+            except Exception as e:
+                logger.error(f"Backtest job heartbeat failed: {e}")
+
+    def shutdown(self) -> None:
+        """Stop accepting work and drop queued jobs; running workers finish on their own."""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
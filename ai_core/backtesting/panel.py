@@ -0,0 +1,280 @@
+"""Aligned multi-symbol market data for backtests.
+
+A :class:`MarketPanel` holds one ``T x S`` float array per OHLCV field over
+the union of all symbols' timestamps, plus a boolean validity mask marking
+which symbols actually have a bar at each step. It is built once per run; the
+simulation loop then reads bars by integer position instead of doing pandas
+index lookups per timestamp and symbol.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class MarketPanel:
+    """``T x S`` arrays per field with a validity mask."""
+
+    def __init__(self, timestamps: np.ndarray, symbols: Sequence[str],
+                 fields: Dict[str, np.ndarray], valid: np.ndarray,
+                 ticks: Optional[np.ndarray] = None):
+        self.timestamps = timestamps
+        self.symbols = tuple(symbols)
+        self.fields = fields
+        self.valid = valid
+        self.ticks = ticks  # optional T x S object array of per-bar tick prices
+        self.datetimes: List[datetime] = list(pd.DatetimeIndex(timestamps).to_pydatetime())
+        self.symbol_index = {symbol: j for j, symbol in enumerate(self.symbols)}
+        # Set by BacktestDataCache: (timeframe, start, end) the data was loaded for
+        self.source: Optional[Tuple[str, datetime, datetime]] = None
+        self.cache: Optional[Any] = None
+        # Windows share their root panel's indicator cache
+        self._root: "MarketPanel" = self
+        self._offset = 0
+        self._indicators: Dict[Tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_frames(cls, frames: Mapping[str, pd.DataFrame]) -> "MarketPanel":
+        """Align per-symbol frames indexed by timestamp."""
+        symbols = list(frames)
+        cleaned = {}
+        for symbol, frame in frames.items():
+            if not frame.index.is_monotonic_increasing or frame.index.has_duplicates:
+                frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+            cleaned[symbol] = frame
+
+        indexes = [frame.index.values.astype('datetime64[ns]') for frame in cleaned.values()]
+        timestamps = np.unique(np.concatenate(indexes)) if indexes else np.array([], dtype='datetime64[ns]')
+        shape = (len(timestamps), len(symbols))
+
+        fields = {field: np.full(shape, np.nan) for field in FIELDS}
+        valid = np.zeros(shape, dtype=bool)
+        ticks = None
+
+        for j, symbol in enumerate(symbols):
+            frame = cleaned[symbol]
+            if frame.empty:
+                continue
+            rows = np.searchsorted(timestamps, frame.index.values.astype('datetime64[ns]'))
+            valid[rows, j] = True
+            for field in FIELDS:
+                if field in frame:
+                    fields[field][rows, j] = frame[field].to_numpy(dtype=np.float64)
+            if 'ticks' in frame:
+                if ticks is None:
+                    ticks = np.full(shape, None, dtype=object)
+                ticks[rows, j] = frame['ticks'].to_numpy()
+
+        return cls(timestamps, symbols, fields, valid, ticks)
+
+    @classmethod
+    def from_records(cls, records: Mapping[str, Iterable[Dict[str, Any]]]) -> "MarketPanel":
+        """Align per-symbol lists of bar dicts (as returned by the market data service)."""
+        frames = {}
+        for symbol, rows in records.items():
+            frame = pd.DataFrame(list(rows))
+            if frame.empty:
+                frame = pd.DataFrame(columns=list(FIELDS), index=pd.DatetimeIndex([]))
+            else:
+                frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+                frame = frame.set_index('timestamp')
+            frames[symbol] = frame
+        return cls.from_frames(frames)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def slice(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> "MarketPanel":
+        """Sub-panel with ``start <= timestamp < end`` (shares no state with self)."""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, np.datetime64(start, 'ns')))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamps, np.datetime64(end, 'ns')))
+        return MarketPanel(
+            self.timestamps[lo:hi],
+            self.symbols,
+            {field: values[lo:hi].copy() for field, values in self.fields.items()},
+            self.valid[lo:hi].copy(),
+            None if self.ticks is None else self.ticks[lo:hi].copy(),
+        )
+
+    def save(self, directory: str) -> None:
+        """Write the panel as raw ``.npy`` arrays that :meth:`load` can memory-map.
+
+        Tick lists are not persisted.
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'timestamps.npy'), self.timestamps.astype('datetime64[ns]'))
+        np.save(os.path.join(directory, 'valid.npy'), self.valid)
+        for field, values in self.fields.items():
+            np.save(os.path.join(directory, f'{field}.npy'), np.ascontiguousarray(values))
+        meta = {'symbols': list(self.symbols), 'fields': list(self.fields)}
+        if self.source is not None:
+            timeframe, start, end = self.source
+            meta['source'] = [timeframe, start.isoformat(), end.isoformat()]
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "MarketPanel":
+        """Load a panel written by :meth:`save`; arrays are read-only memory maps by default."""
+        mode = 'r' if mmap else None
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        panel = cls(
+            np.load(os.path.join(directory, 'timestamps.npy'), mmap_mode=mode),
+            meta['symbols'],
+            {field: np.load(os.path.join(directory, f'{field}.npy'), mmap_mode=mode) for field in meta['fields']},
+            np.load(os.path.join(directory, 'valid.npy'), mmap_mode=mode),
+        )
+        if 'source' in meta:
+            timeframe, start, end = meta['source']
+            panel.source = (timeframe, datetime.fromisoformat(start), datetime.fromisoformat(end))
+        return panel
+
+    def index_of(self, moment: datetime) -> int:
+        """Position of the first step at or after ``moment``."""
+        return int(np.searchsorted(self.timestamps, np.datetime64(moment, 'ns')))
+
+    def window(self, lo: int, hi: int) -> "MarketPanel":
+        """Zero-copy sub-panel of steps ``[lo, hi)`` sharing this panel's indicators."""
+        window = MarketPanel(
+            self.timestamps[lo:hi],
+            self.symbols,
+            {field: values[lo:hi] for field, values in self.fields.items()},
+            self.valid[lo:hi],
+            None if self.ticks is None else self.ticks[lo:hi],
+        )
+        window._root = self._root
+        window._offset = self._offset + lo
+        return window
+
+    def indicator(self, name: str, compute: Callable[..., np.ndarray],
+                  field: str = 'close', **params: Any) -> np.ndarray:
+        """``T x S`` indicator values, computed once per root panel.
+
+        ``compute(values, **params)`` receives one symbol's full ``field``
+        series and must be causal (value ``t`` only depends on data up to
+        ``t``), since it is evaluated over the whole loaded range and then
+        sliced for windows.
+        """
+        root = self._root
+        key = (name, field, tuple(sorted(params.items())))
+        values = root._indicators.get(key)
+        if values is None:
+            columns = []
+            for j, symbol in enumerate(root.symbols):
+                series = root.fields[field][:, j]
+                if root.cache is not None and root.source is not None:
+                    columns.append(root.cache.indicator(symbol, root.source, name, field, params,
+                                                        lambda: compute(series, **params)))
+                else:
+                    columns.append(compute(series, **params))
+            values = np.column_stack(columns) if columns else np.empty((len(root), 0))
+            root._indicators[key] = values
+        return values[self._offset:self._offset + len(self)]
+
+    def features(self, pipeline: Any) -> np.ndarray:
+        """``T x S x F`` values of a :class:`FeaturePipeline`, computed once per root panel.
+
+        Each symbol's features are computed over the steps where it has a bar
+        (NaN elsewhere), so gaps in one symbol do not shift its windows. When
+        the panel's timeframe is known, rows come from the feature store and
+        only missing ones are computed.
+        """
+        root = self._root
+        key = ('features', pipeline.hash)
+        values = root._indicators.get(key)
+        if values is None:
+            values = np.full((len(root), len(root.symbols), len(pipeline)), np.nan)
+            for j, symbol in enumerate(root.symbols):
+                rows = np.flatnonzero(root.valid[:, j])
+                if not len(rows):
+                    continue
+                bars = {field: root.fields[field][rows, j] for field in FIELDS}
+                if root.source is not None:
+                    from ai_core.core.container import get_feature_store
+                    values[rows, j] = get_feature_store().materialize(symbol, root.source[0], pipeline,
+                                                                      root.timestamps[rows], bars)
+                else:
+                    values[rows, j] = pipeline.transform(bars)
+            root._indicators[key] = values
+        return values[self._offset:self._offset + len(self)]
+
+    def bar(self, i: int, j: int) -> Dict[str, Any]:
+        """The bar for symbol column ``j`` at step ``i`` in the engine's dict format."""
+        close = float(self.fields['close'][i, j])
+        bar = {
+            'symbol': self.symbols[j],
+            'timestamp': self.datetimes[i].isoformat(),
+            'open': float(self.fields['open'][i, j]),
+            'high': float(self.fields['high'][i, j]),
+            'low': float(self.fields['low'][i, j]),
+            'close': close,
+            'volume': float(self.fields['volume'][i, j]),
+            'last': close,
+        }
+        if self.ticks is not None and self.ticks[i, j] is not None:
+            bar['ticks'] = self.ticks[i, j]
+        return bar
+
+    def bars_at(self, i: int) -> Dict[str, Dict[str, Any]]:
+        """Bars for every symbol that traded at step ``i``."""
+        return {self.symbols[j]: self.bar(i, j) for j in np.flatnonzero(self.valid[i])}
+
+    def view(self, i: int) -> "PanelView":
+        return PanelView(self, i)
+
+
+class PanelView:
+    """Point-in-time view for portfolio-level strategies.
+
+    Exposes the current cross-section of every symbol as 1-D arrays and
+    trailing history up to and including step ``i``, never beyond it.
+    """
+
+    __slots__ = ('panel', 'index')
+
+    def __init__(self, panel: MarketPanel, index: int):
+        self.panel = panel
+        self.index = index
+
+    @property
+    def symbols(self):
+        return self.panel.symbols
+
+    @property
+    def timestamp(self) -> datetime:
+        return self.panel.datetimes[self.index]
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.panel.valid[self.index]
+
+    def current(self, field: str = 'close') -> np.ndarray:
+        """Length-S array of ``field`` at this step (NaN where a symbol has no bar)."""
+        return self.panel.fields[field][self.index]
+
+    def history(self, field: str = 'close', lookback: Optional[int] = None) -> np.ndarray:
+        """``lookback x S`` array ending at this step (all history if None)."""
+        start = 0 if lookback is None else max(0, self.index + 1 - lookback)
+        return self.panel.fields[field][start:self.index + 1]
+
+    def indicator(self, name: str, compute: Callable[..., np.ndarray], field: str = 'close',
+                  lookback: Optional[int] = None, **params: Any) -> np.ndarray:
+        """Cached indicator history ending at this step; see :meth:`MarketPanel.indicator`."""
+        values = self.panel.indicator(name, compute, field, **params)
+        start = 0 if lookback is None else max(0, self.index + 1 - lookback)
+        return values[start:self.index + 1]
+
+    def features(self, pipeline: Any, lookback: Optional[int] = None) -> np.ndarray:
+        """``lookback x S x F`` pipeline features ending at this step; see :meth:`MarketPanel.features`."""
+        values = self.panel.features(pipeline)
+        start = 0 if lookback is None else max(0, self.index + 1 - lookback)
+        return values[start:self.index + 1]
@@ -0,0 +1,308 @@
+"""Walk-forward analysis on top of :class:`BacktestingEngine`.
+
+The requested range is split into rolling (or anchored) train/test folds.
+Market data for the whole range is loaded once through
+:class:`BacktestDataCache` and stored as a memory-mappable panel. Folds run
+in parallel in a bounded pool of worker processes (``WALK_FORWARD_FOLD_WORKERS``),
+each on zero-copy windows of the mapped panel, so overlapping folds share both
+the data and any cached indicator arrays. Strategies may implement
+``fit(train_panel)`` to be trained on each fold's training window before it
+is evaluated out of sample.
+
+Runs are queued as backtest jobs (:meth:`BacktestJobManager.submit_walk_forward`);
+the job's worker coordinates the folds, never the API process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from ai_core.core.config import settings
+from ai_core.core.logger import get_logger
+from ai_core.database.database import AsyncSessionLocal, dispose_engines
+from ai_core.database.models import WalkForwardReport
+from .cache import BacktestDataCache
+from .engine import BacktestingEngine
+from .execution import ExecutionSimulator
+from .jobs import metrics_summary
+
+logger = get_logger(__name__)
+
+
+@dataclass(slots=True)
+class Fold:
+    index: int
+    train_start: datetime
+    train_end: datetime
+    test_start: datetime
+    test_end: datetime
+
+
+def make_folds(start: datetime, end: datetime, train_days: int, test_days: int,
+               step_days: Optional[int] = None, anchored: bool = False) -> List[Fold]:
+    """Split ``[start, end)`` into consecutive train/test folds.
+
+    Rolling folds keep a fixed ``train_days`` window; anchored folds always
+    train from ``start``. Folds advance by ``step_days`` (default: ``test_days``).
+    """
+    if train_days <= 0 or test_days <= 0:
+        raise ValueError("train_days and test_days must be positive")
+    step = timedelta(days=step_days or test_days)
+    train, test = timedelta(days=train_days), timedelta(days=test_days)
+
+    folds = []
+    test_start = start + train
+    while test_start + test <= end:
+        train_start = start if anchored else test_start - train
+        folds.append(Fold(len(folds), train_start, test_start, test_start, test_start + test))
+        test_start += step
+    return folds
+
+
+# -- folds ------------------------------------------------------------------
+
+def run_fold(engine: BacktestingEngine, strategy: Any, panel: Any, fold: Dict[str, Any],
+             initial_capital: float) -> Dict[str, Any]:
+    """Fit on the train window, simulate the test window."""
+    train = panel.window(panel.index_of(fold['train_start']), panel.index_of(fold['train_end']))
+    test = panel.window(panel.index_of(fold['test_start']), panel.index_of(fold['test_end']))
+
+    fit = getattr(strategy, 'fit', None)
+    if callable(fit):
+        fit(train)
+
+    state = engine.simulate(strategy, test, initial_capital)
+    metrics = engine._calculate_backtest_metrics(state, initial_capital) if state['equity_curve'] else {}
+    return {
+        'fold': fold,
+        'bars': len(test),
+        'metrics': metrics_summary(metrics),
+        'equity_curve': state['equity_curve'],
+        'trades': [t for t in state['trades'] if t['status'] == 'CLOSED'],
+        'daily_returns': state['daily_returns'],
+    }
+
+
+async def _run_fold_async(strategy_id: int, panel_dir: str, cache_dir: str, fold: Dict[str, Any],
+                          initial_capital: float, execution: ExecutionSimulator) -> Dict[str, Any]:
+    engine = BacktestingEngine(execution)
+    try:
+        # A fresh instance per fold so fitted or simulated state never leaks across folds
+        strategy = await engine.build_strategy(strategy_id)
+        if strategy is None:
+            raise RuntimeError(f"Failed to load strategy {strategy_id}")
+        panel = BacktestDataCache(cache_dir).open_panel(panel_dir)
+        return run_fold(engine, strategy, panel, fold, initial_capital)
+    finally:
+        # Pooled async connections are bound to this event loop
+        await dispose_engines()
+
+
+def run_fold_in_worker(strategy_id: int, panel_dir: str, cache_dir: str, fold: Dict[str, Any],
+                       initial_capital: float, execution: ExecutionSimulator) -> Dict[str, Any]:
+    """Fold worker entry point: build the strategy and run one fold on the mapped panel."""
+    return asyncio.run(_run_fold_async(strategy_id, panel_dir, cache_dir, fold, initial_capital, execution))
+
+
+# -- aggregation ------------------------------------------------------------
+
+def stitch_out_of_sample(fold_results: List[Dict[str, Any]], initial_capital: float) -> Dict[str, Any]:
+    """Chain fold equity curves into one out-of-sample run.
+
+    Each fold starts from ``initial_capital``; its curve is rescaled so that
+    it starts where the previous fold ended, i.e. fold returns compound.
+    """
+    equity_curve: List[Dict[str, Any]] = []
+    trades: List[Dict[str, Any]] = []
+    daily_returns: List[float] = []
+    capital = initial_capital
+
+    for result in sorted(fold_results, key=lambda r: r['fold']['index']):
+        curve = result['equity_curve']
+        if not curve:
+            continue
+        scale = capital / initial_capital
+        equity_curve.extend(
+            {**point, 'equity': point['equity'] * scale, 'cash': point['cash'] * scale,
+             'positions_value': point['positions_value'] * scale, 'fold': result['fold']['index']}
+            for point in curve
+        )
+        trades.extend({**trade, 'fold': result['fold']['index']} for trade in result['trades'])
+        daily_returns.extend(result['daily_returns'])
+        capital = curve[-1]['equity'] * scale
+
+    return {
+        'capital': capital,
+        'positions': {},
+        'equity_curve': equity_curve,
+        'trades': trades,
+        'daily_returns': daily_returns,
+    }
+
+
+def fold_statistics(fold_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    returns = np.array([r['metrics']['total_return'] for r in fold_results
+                        if r['metrics'].get('total_return') is not None])
+    if not len(returns):
+        return {'completed_folds': 0}
+    return {
+        'completed_folds': len(returns),
+        'profitable_folds': int((returns > 0).sum()),
+        'mean_fold_return': float(returns.mean()),
+        'median_fold_return': float(np.median(returns)),
+        'fold_return_std': float(returns.std()),
+        'worst_fold_return': float(returns.min()),
+        'best_fold_return': float(returns.max()),
+    }
+
+
+# -- runner -------------------------------------------------------------------
+
+class WalkForwardRunner:
+    """Run walk-forward folds and persist the out-of-sample report."""
+
+    def __init__(self, engine: Optional[BacktestingEngine] = None,
+                 cache: Optional[BacktestDataCache] = None, max_workers: Optional[int] = None):
+        self.engine = engine or BacktestingEngine()
+        self.cache = cache or BacktestDataCache()
+        self.max_workers = max_workers or settings.walk_forward_fold_workers
+
+    async def run(self, strategy_id: int, start_date: datetime, end_date: datetime,
+                  train_days: int, test_days: int, step_days: Optional[int] = None,
+                  anchored: bool = False, initial_capital: float = 100000,
+                  symbols: Optional[List[str]] = None, timeframe: str = '1H',
+                  progress_callback: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Run the folds in parallel worker processes and save the report.
+
+        ``progress_callback`` receives the fraction of completed folds while
+        they run and may raise :class:`BacktestCancelled` to stop the run.
+        """
+        try:
+            folds = make_folds(start_date, end_date, train_days, test_days, step_days, anchored)
+        except ValueError as e:
+            return {'error': str(e)}
+        if not folds:
+            return {'error': 'Date range is too short for a single train/test fold'}
+
+        symbols = symbols or list(settings.market_symbols)
+        logger.info(f"Walk-forward for strategy {strategy_id}: {len(folds)} folds over {start_date} - {end_date}")
+
+        panel = await self.cache.load_panel(
+            self.engine.market_data_service, symbols, timeframe, start_date, end_date
+        )
+        panel_dir = await asyncio.to_thread(self.cache.store_panel, panel)
+
+        fold_results, errors = await self._run_folds(strategy_id, panel_dir, folds, initial_capital,
+                                                     progress_callback)
+        if not fold_results:
+            return {'error': 'All walk-forward folds failed', 'fold_errors': errors}
+
+        state = stitch_out_of_sample(fold_results, initial_capital)
+        results = self.engine._calculate_backtest_metrics(state, initial_capital)
+        if 'error' in results:
+            return {**results, 'fold_errors': errors}
+
+        oos_start, oos_end = folds[0].test_start, folds[-1].test_end
+        result_id = await self.engine._save_backtest_results(
+            strategy_id, oos_start, oos_end, initial_capital, state, results
+        )
+
+        summary = {**metrics_summary(results), **fold_statistics(fold_results), 'folds': len(folds)}
+        fold_rows = [
+            {**_fold_json(r['fold']), 'bars': r['bars'], 'metrics': r['metrics']}
+            for r in sorted(fold_results, key=lambda r: r['fold']['index'])
+        ] + [{**_fold_json(fold), 'error': error} for fold, error in errors]
+
+        report = WalkForwardReport(
+            strategy_id=strategy_id,
+            backtest_result_id=result_id,
+            start_date=start_date,
+            end_date=end_date,
+            train_days=train_days,
+            test_days=test_days,
+            step_days=step_days or test_days,
+            anchored=anchored,
+            folds=fold_rows,
+            summary=summary,
+        )
+        async with AsyncSessionLocal() as db:
+            db.add(report)
+            await db.commit()
+
+        logger.info(f"Walk-forward report {report.id} saved for strategy {strategy_id}")
+        return report_to_dict(report)
+
+    async def _run_folds(self, strategy_id: int, panel_dir: str, folds: List[Fold], initial_capital: float,
+                         progress_callback: Optional[Callable[[float], None]] = None,
+                         ) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str]]]:
+        results, errors = [], []
+        loop = asyncio.get_running_loop()
+        # spawn: workers start clean instead of inheriting this process's DB connections
+        executor = ProcessPoolExecutor(max_workers=min(self.max_workers, len(folds)),
+                                       mp_context=multiprocessing.get_context("spawn"))
+        pending = {
+            loop.run_in_executor(executor, run_fold_in_worker, strategy_id, panel_dir, self.cache.directory,
+                                 asdict(fold), initial_capital, self.engine.execution): fold
+            for fold in folds
+        }
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=settings.backtest_progress_interval,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    fold = pending.pop(future)
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        logger.error(f"Walk-forward fold {fold.index} failed: {e}")
+                        errors.append((asdict(fold), str(e)))
+                if progress_callback:
+                    # Also polled while folds run, so cancellation does not wait for the next fold
+                    progress_callback(1 - len(pending) / len(folds))
+        finally:
+            # Queued folds are dropped on cancellation; running ones finish on their own
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results, errors
+
+    async def get_reports(self, strategy_id: int) -> List[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(
+                select(WalkForwardReport)
+                .where(WalkForwardReport.strategy_id == strategy_id)
+                .order_by(WalkForwardReport.created_at.desc())
+            )
+            return [report_to_dict(report) for report in rows.scalars().all()]
+
+    async def get_report(self, report_id: int) -> Optional[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            report = await db.get(WalkForwardReport, report_id)
+            return report_to_dict(report) if report else None
+
+
+def _fold_json(fold: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in fold.items()}
+
+
+def report_to_dict(report: WalkForwardReport) -> Dict[str, Any]:
+    return {
+        'id': report.id,
+        'strategy_id': report.strategy_id,
+        'backtest_result_id': report.backtest_result_id,
+        'start_date': report.start_date.isoformat(),
+        'end_date': report.end_date.isoformat(),
+        'train_days': report.train_days,
+        'test_days': report.test_days,
+        'step_days': report.step_days,
+        'anchored': report.anchored,
+        'summary': report.summary,
+        'folds': report.folds,
+        'created_at': report.created_at.isoformat() if report.created_at else None,
+    }
@@ -0,0 +1,137 @@
+"""
+Process-wide service container.
+
+Services are registered by factory (or ``"module:attribute"`` path) and only
+built the first time something asks for them, so importing the API or gRPC
+entry points does not pull in the broker SDK, numpy/pandas or the backtesting
+stack. Every caller shares the same instance: the strategy routes activate
+strategies on the manager the signal pipeline evaluates, and account/trade
+routes talk to the broker connection opened at startup.
+
+Routes take services through the ``get_*`` providers below:
+
+    @router.get("/positions")
+    def get_positions(ibkr_service: "IBKRService" = Depends(get_ibkr_service)):
+        ...
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Union
+
+from .logger import get_logger
+
+if TYPE_CHECKING:
+    from ai_core.backtesting.engine import BacktestingEngine
+    from ai_core.backtesting.jobs import BacktestJobManager
+    from ai_core.backtesting.walk_forward import WalkForwardRunner
+    from ai_core.ml_engine.feature_store import FeatureStore
+    from ai_core.risk_manager.risk_manager import RiskManager
+    from ai_core.strategy_engine.broker.ibkr_service import IBKRService
+    from ai_core.strategy_engine.market_data.market_data_service import MarketDataService
+    from ai_core.strategy_engine.rule_based import StrategyManager
+
+logger = get_logger(__name__)
+
+Factory = Union[Callable[[], Any], str]
+
+
+def _resolve(path: str) -> Callable[[], Any]:
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class ServiceContainer:
+    """Lazily constructed singletons keyed by name."""
+
+    def __init__(self):
+        self._factories: Dict[str, Factory] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Factory) -> None:
+        """Register ``factory`` (a callable or ``"module:attr"``) under ``name``."""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def override(self, name: str, instance: Any) -> None:
+        """Use an existing object for ``name`` (alternate wiring, tests)."""
+        with self._lock:
+            self._instances[name] = instance
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                factory = self._factories.get(name)
+                if factory is None:
+                    raise KeyError(f"Unknown service: {name}")
+                start = time.perf_counter()
+                if isinstance(factory, str):
+                    factory = _resolve(factory)
+                instance = self._instances[name] = factory()
+                logger.info("Created service %s in %.1f ms", name, (time.perf_counter() - start) * 1000)
+            return instance
+
+    def is_created(self, name: str) -> bool:
+        return name in self._instances
+
+    def reset(self) -> None:
+        """Drop all instances; they are rebuilt on next use."""
+        with self._lock:
+            self._instances.clear()
+
+
+container = ServiceContainer()
+container.register("strategy_manager", "ai_core.strategy_engine.rule_based:StrategyManager")
+container.register("ibkr_service", "ai_core.strategy_engine.broker.ibkr_service:IBKRService")
+container.register("market_data_service", "ai_core.strategy_engine.market_data.market_data_service:MarketDataService")
+container.register("risk_manager", "ai_core.risk_manager.risk_manager:RiskManager")
+container.register("backtesting_engine", "ai_core.backtesting.engine:BacktestingEngine")
+container.register("backtest_jobs", "ai_core.backtesting.jobs:BacktestJobManager")
+container.register("feature_store", "ai_core.ml_engine.feature_store:FeatureStore")
+container.register(
+    "walk_forward_runner",
+    lambda: _resolve("ai_core.backtesting.walk_forward:WalkForwardRunner")(engine=get_backtesting_engine()),
+)
+
+
+# -- providers (usable with FastAPI ``Depends``) --------------------------------
+
+def get_strategy_manager() -> "StrategyManager":
+    return container.get("strategy_manager")
+
+
+def get_ibkr_service() -> "IBKRService":
+    return container.get("ibkr_service")
+
+
+def get_market_data_service() -> "MarketDataService":
+    return container.get("market_data_service")
+
+
+def get_risk_manager() -> "RiskManager":
+    return container.get("risk_manager")
+
+
+def get_backtesting_engine() -> "BacktestingEngine":
+    return container.get("backtesting_engine")
+
+
+def get_backtest_jobs() -> "BacktestJobManager":
+    return container.get("backtest_jobs")
+
+
+def get_walk_forward_runner() -> "WalkForwardRunner":
+    return container.get("walk_forward_runner")
+
+
+def get_feature_store() -> "FeatureStore":
+    return container.get("feature_store")
@@ -0,0 +1,143 @@
+"""
+Import-time helpers: deferred module loading and startup import profiling.
+
+``lazy_import`` returns a module whose code only runs on first attribute
+access (``importlib.util.LazyLoader``), for heavy subsystems that a route
+module references but most requests never touch.
+
+``ImportProfiler`` times every module executed after it is installed. Set
+``IMPORT_PROFILE=true`` and ``ai_core/__init__.py`` installs it before
+anything else is imported; the API and gRPC entry points log the slowest
+imports once startup finishes. ``python -X importtime`` gives the same data
+without the service, but not from inside a running pod.
+"""
+
+from __future__ import annotations
+
+import importlib.abc
+import importlib.util
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Reference point for startup timing: ai_core imports this module first
+IMPORTED_AT = time.perf_counter()
+
+
+def lazy_import(name: str):
+    """Return ``name`` as a module that is executed on first attribute access."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def startup_seconds() -> float:
+    """Seconds since ``ai_core`` was first imported."""
+    return time.perf_counter() - IMPORTED_AT
+
+
+class _TimedLoader:
+    __slots__ = ("profiler", "loader")
+
+    def __init__(self, profiler: "ImportProfiler", loader):
+        self.profiler = profiler
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        # Put the real loader back so the module looks untouched afterwards
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        self.profiler._enter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profiler._exit(module.__name__)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """Meta-path hook recording cumulative and self time per imported module."""
+
+    def __init__(self):
+        self.timings: Dict[str, Tuple[float, float]] = {}  # name -> (cumulative, self)
+        self._local = threading.local()
+        self.installed = False
+
+    def install(self) -> None:
+        if not self.installed:
+            sys.meta_path.insert(0, self)
+            self.installed = True
+
+    def uninstall(self) -> None:
+        if self.installed:
+            sys.meta_path.remove(self)
+            self.installed = False
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    # Namespace packages and builtins without exec_module are left alone
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(self, spec.loader)
+                    return spec
+            return None
+        finally:
+            self._local.finding = False
+
+    def _stack(self) -> List[List[float]]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self) -> None:
+        self._stack().append([time.perf_counter(), 0.0])  # start, time spent in nested imports
+
+    def _exit(self, name: str) -> None:
+        stack = self._stack()
+        start, nested = stack.pop()
+        cumulative = time.perf_counter() - start
+        self.timings[name] = (cumulative, cumulative - nested)
+        if stack:
+            stack[-1][1] += cumulative
+
+    def top(self, limit: int = 15, by: str = "self") -> List[Tuple[str, float, float]]:
+        index = 1 if by == "self" else 0
+        ranked = sorted(self.timings.items(), key=lambda item: item[1][index], reverse=True)
+        return [(name, cumulative, own) for name, (cumulative, own) in ranked[:limit]]
+
+    def report(self, limit: int = 15) -> str:
+        lines = [f"{'self ms':>9} {'cumul ms':>9}  module"]
+        for name, cumulative, own in self.top(limit):
+            lines.append(f"{own * 1000:9.1f} {cumulative * 1000:9.1f}  {name}")
+        return "\n".join(lines)
+
+
+import_profiler = ImportProfiler()
+
+
+def log_startup(logger, component: str, profiler: Optional[ImportProfiler] = None) -> None:
+    """Log time since ``ai_core`` import and, when profiling, the slowest imports."""
+    profiler = profiler or import_profiler
+    logger.info("%s ready in %.3f s (%d modules loaded)", component, startup_seconds(), len(sys.modules))
+    if profiler.installed:
+        logger.info("Slowest imports:\n%s", profiler.report())
@@ -0,0 +1,27 @@
+"""
+Process-wide metrics for the AI core, exposed on ``/metrics``.
+
+Stage latencies share one histogram family labelled by ``stage``; see
+:mod:`shared.utils.metrics` for the histogram implementation.
+"""
+
+from shared.utils.metrics import CONTENT_TYPE, REGISTRY, render_prometheus, timed  # noqa: F401
+
+STAGE_HELP = "Per-stage hot path latency"
+
+
+def stage_latency(stage: str):
+    return REGISTRY.histogram("stage_latency_seconds", STAGE_HELP, stage=stage)
+
+
+INGEST_LATENCY = stage_latency("ingest")
+STRATEGY_PREDICT_LATENCY = stage_latency("strategy_predict")
+RISK_CHECK_LATENCY = stage_latency("risk_check")
+DB_WRITE_LATENCY = stage_latency("db_write")
+WS_BROADCAST_LATENCY = stage_latency("ws_broadcast")
+
+QUEUE_DROPPED = REGISTRY.counter("dropped_total", "Events dropped by full queues", queue="market_event_bus")
+STRATEGY_LOAD_LATENCY = stage_latency("strategy_load")
+
+STRATEGY_EVENTS_SKIPPED = REGISTRY.counter("strategy_events_skipped_total", "Events skipped while a strategy was loading")
+SIGNALS_EMITTED = REGISTRY.counter("signals_emitted_total", "Strategy signals published")
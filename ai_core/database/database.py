@@ -1,4 +1,7 @@
+from typing import Any, AsyncIterator, Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from ai_core.core.config import settings
@@ -6,12 +9,61 @@ from ai_core.core.config import settings
 # Declarative base for ORM models
 Base = declarative_base()
 
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Pool settings shared by the sync and async engines."""
+    options: Dict[str, Any] = {"pool_pre_ping": True, "echo": settings.db_echo}
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    return options
+
+
+def _async_url(url: str) -> str:
+    """Map a sync driver URL onto its asyncio driver."""
+    if settings.async_database_url:
+        return settings.async_database_url
+    scheme, sep, rest = url.partition("://")
+    base = scheme.split("+", 1)[0]
+    driver = {"postgresql": "asyncpg", "postgres": "asyncpg", "sqlite": "aiosqlite"}.get(base)
+    if driver is None:
+        return url
+    return f"{'postgresql' if base == 'postgres' else base}+{driver}{sep}{rest}"
+
+
 # Create SQLAlchemy engine using the configured database URL
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+engine = create_engine(settings.database_url, **_engine_options(settings.database_url))
 
 # Session factory for FastAPI dependency injection
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine is created on first use so processes that never touch it
+# do not need the asyncio driver installed.
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return the process-wide async engine, creating it on first use."""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        url = _async_url(settings.database_url)
+        _async_engine = create_async_engine(url, **_engine_options(url))
+        _async_session_factory = async_sessionmaker(
+            _async_engine, expire_on_commit=False, autoflush=False
+        )
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """Create a new async session bound to the async engine."""
+    get_async_engine()
+    return _async_session_factory()  # type: ignore[misc]
+
 
 def get_db():
     """Yield a database session and ensure it closes after use."""
@@ -20,3 +72,43 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Yield a request-scoped async session and ensure it closes after use."""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections on shutdown."""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+    engine.dispose()
+
+
+def _pool_stats(pool: Any) -> Dict[str, Any]:
+    if not hasattr(pool, "checkedout"):
+        return {"pool": type(pool).__name__}
+    size = pool.size()
+    capacity = size + max(getattr(pool, "_max_overflow", 0), 0)
+    checked_out = pool.checkedout()
+    return {
+        "pool": type(pool).__name__,
+        "size": size,
+        "checked_in": pool.checkedin(),
+        "checked_out": checked_out,
+        "overflow": pool.overflow(),
+        "utilization": checked_out / capacity if capacity else 0.0,
+    }
+
+
+def pool_status() -> Dict[str, Any]:
+    """Connection pool utilisation for the sync and async engines."""
+    status = {"sync": _pool_stats(engine.pool)}
+    if _async_engine is not None:
+        status["async"] = _pool_stats(_async_engine.sync_engine.pool)
+    return status
@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, JSON, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, Boolean, Text, JSON, ForeignKey, Index
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 
+from ai_core.core.config import settings
 from .database import Base
 
+
+def _time_partitioned() -> dict:
+    """Table options for range partitioning on ``timestamp`` (Postgres only)."""
+    if settings.db_partitioning == "native":
+        return {"postgresql_partition_by": "RANGE (timestamp)"}
+    return {}
+
 class Strategy(Base):
     __tablename__ = "strategies"
     
@@ -28,6 +36,11 @@ class Strategy(Base):
 
 class Trade(Base):
     __tablename__ = "trades"
+    # Keyset pagination walks (entry_time, id), optionally within a strategy
+    __table_args__ = (
+        Index("ix_trades_entry_time_id", "entry_time", "id"),
+        Index("ix_trades_strategy_entry_time_id", "strategy_id", "entry_time", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     strategy_id = Column(Integer, ForeignKey("strategies.id"))
@@ -40,7 +53,7 @@ class Trade(Base):
     take_profit = Column(Float, nullable=True)
     pnl = Column(Float, default=0.0)
     commission = Column(Float, default=0.0)
-    status = Column(String(20), default='OPEN')  # OPEN, CLOSED, CANCELLED
+    status = Column(String(20), default='OPEN', index=True)  # OPEN, CLOSED, CANCELLED
     entry_time = Column(DateTime, default=datetime.utcnow)
     exit_time = Column(DateTime, nullable=True)
     
@@ -50,6 +63,24 @@ class Trade(Base):
     
     strategy = relationship("Strategy", back_populates="trades")
 
+class TradeDailySummary(Base):
+    """Closed-trade aggregates per exit day, strategy and symbol.
+    
+    Maintained incrementally when a trade closes so analytics never scan
+    the trades table.
+    """
+    __tablename__ = "trade_daily_summary"
+    
+    day = Column(Date, primary_key=True)
+    strategy_id = Column(Integer, primary_key=True, default=0)  # 0 = manual / no strategy
+    symbol = Column(String(10), primary_key=True)
+    closed_trades = Column(Integer, default=0)
+    winning_trades = Column(Integer, default=0)
+    total_pnl = Column(Float, default=0.0)
+    gross_profit = Column(Float, default=0.0)
+    gross_loss = Column(Float, default=0.0)
+    commission = Column(Float, default=0.0)
+
 class BacktestResult(Base):
     __tablename__ = "backtest_results"
     
@@ -70,17 +101,72 @@ class BacktestResult(Base):
     avg_trade_duration = Column(Float)  # in hours
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    # Detailed results
-    trade_history = Column(JSON)
-    equity_curve = Column(JSON)
+    # Detailed results. New runs store the equity curve and trades as
+    # columnar artifacts (see backtesting/artifacts.py); the JSON columns are
+    # kept for older rows and deferred so listings never load them.
+    artifact_format = Column(String(16), nullable=True)
+    equity_curve_path = Column(String(512), nullable=True)
+    trade_history_path = Column(String(512), nullable=True)
+    trade_history = deferred(Column(JSON))
+    equity_curve = deferred(Column(JSON))
     monthly_returns = Column(JSON)
 
+class BacktestJob(Base):
+    """A backtest queued for or running in the background worker pool."""
+    __tablename__ = "backtest_jobs"
+    
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    strategy_id = Column(Integer, ForeignKey("strategies.id"), index=True)
+    status = Column(String(20), default='PENDING', index=True)  # PENDING, RUNNING, COMPLETED, FAILED, CANCELLED
+    progress = Column(Float, default=0.0)  # 0..1
+    parameters = Column(JSON)
+    cancel_requested = Column(Boolean, default=False)
+    result_id = Column(Integer, ForeignKey("backtest_results.id"), nullable=True)
+    summary = Column(JSON, nullable=True)  # headline metrics of the finished run
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # API process that queued the job, and when it last confirmed it is alive
+    owner = Column(String(64), nullable=True, index=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+class WalkForwardReport(Base):
+    """Aggregate out-of-sample results of a walk-forward run.
+    
+    The stitched out-of-sample equity curve is stored as a regular
+    BacktestResult referenced by ``backtest_result_id``.
+    """
+    __tablename__ = "walk_forward_reports"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    strategy_id = Column(Integer, ForeignKey("strategies.id"), index=True)
+    backtest_result_id = Column(Integer, ForeignKey("backtest_results.id"), nullable=True)
+    start_date = Column(DateTime)
+    end_date = Column(DateTime)
+    train_days = Column(Integer)
+    test_days = Column(Integer)
+    step_days = Column(Integer)
+    anchored = Column(Boolean, default=False)
+    folds = Column(JSON)  # per-fold ranges and metrics
+    summary = Column(JSON)  # aggregate out-of-sample metrics
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class MarketData(Base):
     __tablename__ = "market_data"
+    # Daily partitions; ticks older than TICK_RETENTION_DAYS are compacted
+    # into 1m bars (see database/partitions.py). The partition key has to be
+    # part of the primary key.
+    __table_args__ = (
+        Index("ix_market_data_symbol_timeframe_ts", "symbol", "timeframe", "timestamp"),
+        Index("ix_market_data_ts_brin", "timestamp", postgresql_using="brin"),
+        _time_partitioned(),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String(10), index=True)
-    timestamp = Column(DateTime, index=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    timestamp = Column(DateTime, primary_key=True)
+    symbol = Column(String(10), nullable=False)
+    timeframe = Column(String(8), nullable=False, default='tick')  # tick, 1m, ...
     open = Column(Float)
     high = Column(Float)
     low = Column(Float)
@@ -92,14 +178,20 @@ class MarketData(Base):
 
 class AISignal(Base):
     __tablename__ = "ai_signals"
+    # Monthly partitions, queried per strategy or symbol over a time range
+    __table_args__ = (
+        Index("ix_ai_signals_strategy_ts", "strategy_id", "timestamp"),
+        Index("ix_ai_signals_symbol_ts", "symbol", "timestamp"),
+        _time_partitioned(),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)
     strategy_id = Column(Integer, ForeignKey("strategies.id"))
     symbol = Column(String(10))
     signal_type = Column(String(10))  # BUY, SELL, HOLD
     confidence = Column(Float)  # 0.0 to 1.0
     price = Column(Float)
-    timestamp = Column(DateTime, default=datetime.utcnow)
     features = Column(JSON)  # AI model input features
     model_output = Column(JSON)  # Raw model output
     is_executed = Column(Boolean, default=False)
@@ -0,0 +1,242 @@
+"""Time-partition maintenance for the high-volume ``market_data`` and ``ai_signals`` tables.
+
+Two layouts are supported (``DB_PARTITIONING``):
+
+* ``native``: Postgres declarative range partitions on ``timestamp``; daily
+  for market data, monthly for signals. Partitions are created ahead of time
+  and old ones are dropped wholesale, which is far cheaper than ``DELETE``.
+* ``timescale``: the same tables registered as TimescaleDB hypertables with
+  matching chunk intervals; retention uses ``drop_chunks``.
+
+In both modes ticks older than ``TICK_RETENTION_DAYS`` are rolled up into 1m
+bars in place, so range queries over history stay small.
+
+The default is ``none``: ``create_all`` does not convert tables created before
+partitioning existed, so they have to be migrated (rebuilt as partitioned
+tables, or turned into hypertables) before switching modes. In ``native``
+mode tables that are still plain are skipped with a warning.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from ai_core.core.config import settings
+from ai_core.core.logger import get_logger
+from .database import engine as default_engine
+
+logger = get_logger(__name__)
+
+# table -> partition interval
+PARTITIONED_TABLES: Dict[str, str] = {
+    "market_data": "day",
+    "ai_signals": "month",
+}
+
+_NAME_FORMATS = {"day": "%Y%m%d", "month": "%Y%m"}
+
+
+def period_start(moment: datetime, interval: str) -> datetime:
+    """Start of the day/month containing ``moment``."""
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.replace(day=1) if interval == "month" else start
+
+
+def next_period(start: datetime, interval: str) -> datetime:
+    """Start of the period following ``start``."""
+    if interval == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def partition_name(table: str, start: datetime, interval: str) -> str:
+    return f"{table}_p{start.strftime(_NAME_FORMATS[interval])}"
+
+
+def add_missing_columns(engine: Optional[Engine] = None) -> List[str]:
+    """Add columns newer than an existing ``market_data`` table (``create_all`` does not alter tables)."""
+    engine = engine or default_engine
+    existing = {column["name"] for column in inspect(engine).get_columns("market_data")}
+    added = []
+    with engine.begin() as conn:
+        if "timeframe" not in existing:
+            # Rows stored before bars and ticks shared the table are ticks
+            conn.execute(text("ALTER TABLE market_data ADD COLUMN timeframe VARCHAR(8) NOT NULL DEFAULT 'tick'"))
+            added.append("market_data.timeframe")
+    if added:
+        logger.warning("Added columns to existing tables: %s", ", ".join(added))
+    return added
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table t JOIN pg_class c ON c.oid = t.partrelid "
+        "WHERE c.relname = :table"
+    ), {"table": table}).first() is not None
+
+
+def ensure_partitions(conn: Connection, table: str, interval: str,
+                      start: datetime, end: datetime) -> List[str]:
+    """Create any missing partitions covering ``[start, end]``."""
+    created = []
+    current = period_start(start, interval)
+    while current <= end:
+        upper = next_period(current, interval)
+        name = partition_name(table, current, interval)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{current.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        created.append(name)
+        current = upper
+    return created
+
+
+def drop_partitions_before(conn: Connection, table: str, interval: str, cutoff: datetime) -> List[str]:
+    """Drop partitions whose whole range lies before ``cutoff``."""
+    children = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": table}).scalars().all()
+
+    pattern = re.compile(rf"^{table}_p(\d+)$")
+    dropped = []
+    for name in children:
+        match = pattern.match(name)
+        if not match:
+            continue
+        start = datetime.strptime(match.group(1), _NAME_FORMATS[interval])
+        if next_period(start, interval) <= cutoff:
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    return dropped
+
+
+def compact_ticks(conn: Connection, cutoff: datetime) -> int:
+    """Replace ticks older than ``cutoff`` with 1m OHLC bars; returns bars written."""
+    cutoff = cutoff.replace(second=0, microsecond=0)  # never split a minute bucket
+    result = conn.execute(text("""
+        WITH ticks AS (
+            DELETE FROM market_data
+            WHERE timeframe = 'tick' AND timestamp < :cutoff
+            RETURNING timestamp, symbol, volume, bid, ask, spread,
+                      COALESCE(close, (bid + ask) / 2) AS price
+        )
+        INSERT INTO market_data (timestamp, symbol, timeframe, open, high, low, close,
+                                 volume, bid, ask, spread)
+        SELECT date_trunc('minute', timestamp), symbol, '1m',
+               (array_agg(price ORDER BY timestamp))[1],
+               max(price), min(price),
+               (array_agg(price ORDER BY timestamp DESC))[1],
+               COALESCE(sum(volume), 0), avg(bid), avg(ask), avg(spread)
+        FROM ticks
+        GROUP BY symbol, date_trunc('minute', timestamp)
+    """), {"cutoff": cutoff})
+    return result.rowcount or 0
+
+
+def setup_timescale(conn: Connection) -> None:
+    """Register the partitioned tables as hypertables (idempotent)."""
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb"))
+    for table, interval in PARTITIONED_TABLES.items():
+        conn.execute(text(
+            f"SELECT create_hypertable('{table}', 'timestamp', "
+            f"chunk_time_interval => INTERVAL '1 {interval}', if_not_exists => TRUE, "
+            f"migrate_data => TRUE)"
+        ))
+
+
+def ensure_current_partitions(engine: Optional[Engine] = None, now: Optional[datetime] = None) -> List[str]:
+    """Create the native partitions today's inserts land in.
+
+    Cheap enough for startup, before anything inserts; premaking, compaction
+    and retention are left to :func:`maintain_partitions`.
+    """
+    engine = engine or default_engine
+    if engine.dialect.name != "postgresql" or settings.db_partitioning != "native":
+        return []
+
+    now = now or datetime.utcnow()
+    created = []
+    with engine.begin() as conn:
+        for table, interval in PARTITIONED_TABLES.items():
+            if is_partitioned(conn, table):
+                created += ensure_partitions(conn, table, interval, now - timedelta(days=1), now + timedelta(days=1))
+    return created
+
+
+def maintain_partitions(engine: Optional[Engine] = None, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Create upcoming partitions, compact old ticks and apply retention."""
+    engine = engine or default_engine
+    mode = settings.db_partitioning
+    if engine.dialect.name != "postgresql" or mode not in ("native", "timescale"):
+        return {}
+
+    now = now or datetime.utcnow()
+    tick_cutoff = now - timedelta(days=settings.tick_retention_days)
+    # A retention setting of 0 keeps data forever
+    retention = {}
+    if settings.bar_retention_days > 0:
+        retention["market_data"] = now - timedelta(days=settings.bar_retention_days)
+    if settings.signal_retention_months > 0:
+        retention["ai_signals"] = (
+            period_start(now, "month") - timedelta(days=31 * settings.signal_retention_months)
+        )
+    summary: Dict[str, Any] = {"created": [], "dropped": [], "bars_compacted": 0}
+
+    with engine.begin() as conn:
+        if mode == "native":
+            tables = {table: interval for table, interval in PARTITIONED_TABLES.items()
+                      if is_partitioned(conn, table)}
+            for table in PARTITIONED_TABLES.keys() - tables.keys():
+                logger.warning(
+                    "%s is not a partitioned table (created before DB_PARTITIONING=native); "
+                    "skipping its partitions and retention until it is migrated", table,
+                )
+            for table, interval in tables.items():
+                summary["created"] += ensure_partitions(
+                    conn, table, interval, now - timedelta(days=1),
+                    now + timedelta(days=settings.partition_premake_days),
+                )
+        else:
+            setup_timescale(conn)
+
+    with engine.begin() as conn:
+        summary["bars_compacted"] = compact_ticks(conn, tick_cutoff)
+
+    with engine.begin() as conn:
+        for table, cutoff in retention.items():
+            if mode == "native":
+                if table in tables:
+                    summary["dropped"] += drop_partitions_before(conn, table, tables[table], cutoff)
+            else:
+                conn.execute(text(f"SELECT drop_chunks('{table}', older_than => :cutoff)"),
+                             {"cutoff": cutoff})
+
+    logger.info(
+        "Partition maintenance: %d partitions ensured, %d dropped, %d bars compacted",
+        len(summary["created"]), len(summary["dropped"]), summary["bars_compacted"],
+    )
+    return summary
+
+
+async def run_partition_maintenance() -> None:
+    """Run :func:`maintain_partitions` now and then periodically, off the event loop.
+
+    Call :func:`ensure_current_partitions` at startup before inserting; this
+    task does the slow part (premaking, compaction, retention) in the background.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(maintain_partitions)
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {e}")
+        await asyncio.sleep(settings.partition_maintenance_interval)
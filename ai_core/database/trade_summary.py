@@ -0,0 +1,162 @@
+"""Incrementally maintained trade analytics.
+
+``trade_daily_summary`` holds one row per (exit day, strategy, symbol) and is
+updated in the same transaction that closes a trade. Analytics endpoints read
+only this table plus indexed counts of non-closed trades, so their cost does
+not grow with the number of historical trades.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ai_core.core.logger import get_logger
+from .database import SessionLocal
+from .models import Trade, TradeDailySummary
+
+logger = get_logger(__name__)
+
+_COUNTERS = ("closed_trades", "winning_trades", "total_pnl", "gross_profit", "gross_loss", "commission")
+
+BREAKDOWNS = {
+    "strategy": TradeDailySummary.strategy_id,
+    "symbol": TradeDailySummary.symbol,
+    "day": TradeDailySummary.day,
+}
+
+
+def _increments(trade: Trade) -> Dict[str, Any]:
+    pnl = trade.pnl or 0.0
+    return {
+        "closed_trades": 1,
+        "winning_trades": 1 if pnl > 0 else 0,
+        "total_pnl": pnl,
+        "gross_profit": pnl if pnl > 0 else 0.0,
+        "gross_loss": pnl if pnl < 0 else 0.0,
+        "commission": trade.commission or 0.0,
+    }
+
+
+async def record_closed_trade(db: AsyncSession, trade: Trade) -> None:
+    """Add a just-closed trade to the summary; commit with the trade update."""
+    key = {
+        "day": (trade.exit_time or datetime.utcnow()).date(),
+        "strategy_id": trade.strategy_id or 0,
+        "symbol": trade.symbol,
+    }
+    increments = _increments(trade)
+
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = pg_insert(TradeDailySummary).values(**key, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={col: getattr(TradeDailySummary, col) + stmt.excluded[col] for col in increments},
+        )
+        await db.execute(stmt)
+        return
+
+    row = await db.get(TradeDailySummary, (key["day"], key["strategy_id"], key["symbol"]))
+    if row is None:
+        db.add(TradeDailySummary(**key, **increments))
+    else:
+        for col, value in increments.items():
+            setattr(row, col, (getattr(row, col) or 0) + value)
+
+
+def rebuild_trade_summary(db: Session) -> int:
+    """Recompute the summary table from closed trades; returns rows written."""
+    pnl = func.coalesce(Trade.pnl, 0.0)
+    source = (
+        select(
+            func.date(Trade.exit_time),
+            func.coalesce(Trade.strategy_id, 0),
+            Trade.symbol,
+            func.count(Trade.id),
+            func.sum(case((pnl > 0, 1), else_=0)),
+            func.sum(pnl),
+            func.sum(case((pnl > 0, pnl), else_=0.0)),
+            func.sum(case((pnl < 0, pnl), else_=0.0)),
+            func.sum(func.coalesce(Trade.commission, 0.0)),
+        )
+        .where(Trade.status == 'CLOSED', Trade.exit_time.isnot(None))
+        .group_by(func.date(Trade.exit_time), func.coalesce(Trade.strategy_id, 0), Trade.symbol)
+    )
+    db.execute(delete(TradeDailySummary))
+    result = db.execute(
+        insert(TradeDailySummary).from_select(["day", "strategy_id", "symbol", *_COUNTERS], source)
+    )
+    db.commit()
+    return result.rowcount or 0
+
+
+def _totals(db: Session, since: Optional[date] = None) -> Dict[str, float]:
+    query = db.query(*(func.coalesce(func.sum(getattr(TradeDailySummary, col)), 0) for col in _COUNTERS))
+    if since is not None:
+        query = query.filter(TradeDailySummary.day >= since)
+    return dict(zip(_COUNTERS, query.one()))
+
+
+def _with_ratios(row: Dict[str, Any]) -> Dict[str, Any]:
+    closed = row["closed_trades"]
+    row["losing_trades"] = closed - row["winning_trades"]
+    row["win_rate"] = row["winning_trades"] / closed if closed else 0
+    row["avg_pnl_per_trade"] = row["total_pnl"] / closed if closed else 0
+    row["profit_factor"] = abs(row["gross_profit"] / row["gross_loss"]) if row["gross_loss"] else None
+    return row
+
+
+def summarize(db: Session, window_days: int = 30) -> Dict[str, Any]:
+    """Overall and trailing-window trade statistics."""
+    totals = _totals(db)
+    recent = _totals(db, date.today() - timedelta(days=window_days - 1))
+
+    # Only non-closed trades are counted directly; both queries use the status index
+    open_trades = db.query(func.count(Trade.id)).filter(Trade.status == 'OPEN').scalar() or 0
+    other_trades = db.query(func.count(Trade.id)).filter(
+        Trade.status.notin_(['OPEN', 'CLOSED'])
+    ).scalar() or 0
+
+    return {
+        "total_trades": int(totals["closed_trades"]) + open_trades + other_trades,
+        "open_trades": open_trades,
+        "closed_trades": int(totals["closed_trades"]),
+        "totals": _with_ratios(totals),
+        "recent": _with_ratios(recent),
+    }
+
+
+def breakdown(db: Session, by: str, window_days: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Closed-trade statistics grouped by strategy, symbol or day."""
+    group_col = BREAKDOWNS[by]
+    query = db.query(
+        group_col,
+        *(func.sum(getattr(TradeDailySummary, col)) for col in _COUNTERS),
+    )
+    if window_days:
+        query = query.filter(TradeDailySummary.day >= date.today() - timedelta(days=window_days - 1))
+    rows = query.group_by(group_col).order_by(group_col).all()
+
+    result = []
+    for key, *values in rows:
+        row = _with_ratios(dict(zip(_COUNTERS, values)))
+        row[by] = key.isoformat() if isinstance(key, date) else key
+        result.append(row)
+    return result
+
+
+def backfill_trade_summary() -> int:
+    """Build the summary from existing trades if it has never been populated."""
+    with SessionLocal() as db:
+        if db.query(TradeDailySummary.day).first() is not None:
+            return 0
+        if db.query(Trade.id).filter(Trade.status == 'CLOSED').first() is None:
+            return 0
+        rows = rebuild_trade_summary(db)
+    logger.info("Backfilled trade_daily_summary with %d rows", rows)
+    return rows
@@ -1,23 +1,34 @@
-"""GenAI modules for LLM agents, sentiment analysis, news processing, and MCP integration."""
-
-from .llm_agent import LLMAgent
-from .sentiment import SentimentAnalyzer
-from .news_collector import NewsCollector
-from .news_analyzer import NewsAnalyzer
-from .decision_layer import DecisionLayer
-from .planner import StrategyPlanner
-from .mcp_agent import MCPAgent
-from .embeddings import Embeddings
-from .summarizer import Summarizer
-
-__all__ = [
-    'LLMAgent',
-    'SentimentAnalyzer',
-    'NewsCollector',
-    'NewsAnalyzer',
-    'DecisionLayer',
-    'StrategyPlanner',
-    'MCPAgent',
-    'Embeddings',
-    'Summarizer',
-]
+"""GenAI modules for LLM agents, sentiment analysis, news processing, and MCP integration.
+
+Submodules pull in LLM clients and transformer models, so they are imported
+on first attribute access (PEP 562) rather than with the package.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'LLMAgent': '.llm_agent',
+    'SentimentAnalyzer': '.sentiment',
+    'NewsCollector': '.news_collector',
+    'NewsAnalyzer': '.news_analyzer',
+    'DecisionLayer': '.decision_layer',
+    'StrategyPlanner': '.planner',
+    'MCPAgent': '.mcp_agent',
+    'Embeddings': '.embeddings',
+    'Summarizer': '.summarizer',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,6 +1,8 @@
 import asyncio
+import contextlib
 from concurrent import futures
-from typing import AsyncIterator, List
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 
 import grpc
 
@@ -15,18 +17,110 @@ except ImportError:
 
 from .core.logger import get_logger
 from .core.config import settings
+from .core.container import get_ibkr_service, get_market_data_service, get_strategy_manager
+from .core.imports import log_startup
 from .database.database import SessionLocal
 from .database.models import Strategy
-from .strategy_engine.rule_based import StrategyManager
-from .strategy_engine.market_data.market_data_service import MarketDataService
+from .strategy_engine.market_data.event_bus import MarketEvent, MarketEventBus, Subscription
 
 logger = get_logger(__name__)
 
 
 class AICoreService(pb2_grpc.AICoreServiceServicer if pb2_grpc else object):
     def __init__(self):
-        self.strategy_manager = StrategyManager()
-        self.market_data_service = MarketDataService()
+        self.strategy_manager = get_strategy_manager()
+        self.market_data_service = get_market_data_service()
+        # One upstream feed shared by every connected stream
+        self.market_event_bus = MarketEventBus()
+        self._feed_symbols: Set[str] = set()
+        self._feed_task: Optional[asyncio.Task] = None
+        self._ibkr_symbols: Set[str] = set()
+        self._streams: Set[Subscription] = set()
+        self._quotes: Dict[str, Tuple[float, float]] = {}  # last full (bid, ask) per symbol
+        self._signal_slots = asyncio.Semaphore(settings.grpc_max_concurrent_signals)
+
+    async def preload_active_strategies(self) -> None:
+        """Load active strategies up front so the first signal request is warm."""
+        strategies = await self.strategy_manager.get_active_strategies_async()
+        for strategy in strategies:
+            await self.strategy_manager.load_strategy(strategy.id)
+        logger.info(f"Preloaded {len(self.strategy_manager.loaded_strategies)} strategies")
+
+    async def _attach_stream(self, request) -> Subscription:
+        """Subscribe a stream to the shared feed, starting the feed on first use."""
+        symbols = list(request.symbols) or list(settings.market_symbols)
+        subscription = self.market_event_bus.subscribe(
+            symbols, maxsize=request.queue_size or settings.grpc_stream_queue_size
+        )
+        self._streams.add(subscription)
+        self._feed_symbols.update(symbols)
+        await self._start_feed(symbols)
+        logger.info(f"Market data stream attached ({len(self._streams)} active): {symbols}")
+        return subscription
+
+    async def _start_feed(self, symbols: List[str]) -> None:
+        """Feed the shared bus from the configured source (same selection as the API process)."""
+        source = settings.market_data_source.lower()
+        ibkr_service = get_ibkr_service()
+        if source in ("auto", "ibkr") and ibkr_service.is_connected():
+            new = [symbol for symbol in symbols if symbol not in self._ibkr_symbols]
+            if not self._ibkr_symbols:
+                ibkr_service.attach_event_bus(self.market_event_bus)
+            if new:
+                # IBKR subscriptions stay open; events for symbols nobody streams are not queued
+                if await ibkr_service.subscribe_market_data(new):
+                    self._ibkr_symbols.update(new)
+            return
+
+        if source == "ibkr":
+            logger.error("MARKET_DATA_SOURCE=ibkr but the broker is not connected; no market data feed started")
+            return
+
+        if self._feed_task is None or self._feed_task.done():
+            self._feed_task = asyncio.create_task(
+                self.market_data_service.run_simulated_feed(self.market_event_bus, self._feed_symbols)
+            )
+
+    async def _detach_stream(self, subscription: Subscription) -> None:
+        """Unsubscribe a stream; stop the upstream feed when nobody listens."""
+        subscription.close()
+        self._streams.discard(subscription)
+        if subscription.dropped:
+            logger.warning(f"Market data stream closed after dropping {subscription.dropped} updates")
+
+        self._feed_symbols.clear()
+        for stream in self._streams:
+            self._feed_symbols.update(stream.symbols or ())
+
+        if not self._streams and self._feed_task:
+            self._feed_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._feed_task
+            self._feed_task = None
+
+    def _to_update(self, event: MarketEvent):
+        """Stream update for a tick, or None while the symbol has no full quote yet.
+
+        Brokers send one side at a time (e.g. a bid-only tick); the missing
+        side is filled from the symbol's last full quote.
+        """
+        md = event.data
+        previous_bid, previous_ask = self._quotes.get(event.symbol, (None, None))
+        bid = previous_bid if md.get("bid") is None else float(md["bid"])
+        ask = previous_ask if md.get("ask") is None else float(md["ask"])
+        if bid is None or ask is None:
+            return None
+        self._quotes[event.symbol] = (bid, ask)
+        last = md.get("last")
+        if last is None:
+            last = (bid + ask) / 2.0
+        return pb2.MarketDataUpdate(
+            symbol=event.symbol,
+            bid=bid,
+            ask=ask,
+            last=float(last),
+            timestamp=str(md.get("timestamp", "")),
+        )
 
     async def GetAccountSummary(self, request, context):  # type: ignore
         # Placeholder account summary
@@ -43,30 +137,154 @@ class AICoreService(pb2_grpc.AICoreServiceServicer if pb2_grpc else object):
         return pb2.Positions(positions=[])
 
     async def StreamMarketData(self, request, context):  # type: ignore
-        symbols: List[str] = list(request.symbols)
-        while True:
-            data = await self.market_data_service.get_live_forex_data(symbols)
-            for sym in symbols:
-                md = data.get(sym)
-                if md:
-                    yield pb2.MarketDataUpdate(
-                        symbol=sym,
-                        bid=float(md["bid"]),
-                        ask=float(md["ask"]),
-                        last=float(md["last"]),
-                        timestamp=str(md["timestamp"]),
-                    )
-            await asyncio.sleep(1)
+        subscription = await self._attach_stream(request)
+        try:
+            async for event in subscription:
+                update = self._to_update(event)
+                if update is not None:
+                    yield update
+        finally:
+            await self._detach_stream(subscription)
 
-    async def GenerateAISignal(self, request, context):  # type: ignore
-        # Simple placeholder generating HOLD signals
+    async def StreamMarketDataBatch(self, request, context):  # type: ignore
+        subscription = await self._attach_stream(request)
+        max_batch = request.max_batch_size or settings.grpc_stream_batch_size
+        delay = request.max_batch_delay_ms / 1000.0
+        try:
+            while True:
+                # Blocks on the client's flow-control window; meanwhile the
+                # bounded queue sheds the oldest updates for this stream only.
+                events = await subscription.get_batch(max_batch, delay)
+                updates = [self._to_update(event) for event in events]
+                yield pb2.MarketDataBatch(
+                    updates=[update for update in updates if update is not None],
+                    dropped=subscription.dropped,
+                )
+        finally:
+            await self._detach_stream(subscription)
+
+    @staticmethod
+    def _timeout(request, context) -> float:
+        """Seconds left for a signal request: its own budget capped by the RPC deadline."""
+        timeout = (request.timeout_ms or settings.grpc_signal_timeout_ms) / 1000.0
+        remaining = context.time_remaining()
+        return min(timeout, remaining) if remaining is not None else timeout
+
+    async def _market_snapshot(self, symbols: List[str]) -> Dict[str, Any]:
+        snapshot = self.market_event_bus.snapshot(symbols)
+        missing = [symbol for symbol in symbols if symbol not in snapshot]
+        if missing:
+            snapshot.update(await self.market_data_service.get_live_forex_data(missing))
+        return snapshot
+
+    async def _evaluate(self, strategy_id: int, symbol: str) -> Dict[str, Any]:
+        await self._signal_slots.acquire()
+        try:
+            strategy_instance = await self.strategy_manager.load_strategy(strategy_id)
+            if not strategy_instance:
+                raise LookupError(f"Strategy {strategy_id} not found")
+            market_data = await self._market_snapshot([symbol])
+        except BaseException:
+            self._signal_slots.release()
+            raise
+        # A timed-out caller cannot stop the thread, so the slot is only
+        # released once predict returns; GRPC_MAX_CONCURRENT_SIGNALS bounds threads.
+        work = asyncio.ensure_future(asyncio.to_thread(strategy_instance.predict, market_data))
+        work.add_done_callback(self._release_slot)
+        return await asyncio.shield(work) or {}
+
+    def _release_slot(self, work: asyncio.Future) -> None:
+        self._signal_slots.release()
+        if not work.cancelled() and work.exception() is not None:
+            logger.debug(f"Signal evaluation failed: {work.exception()}")  # retrieved even if abandoned
+
+    @staticmethod
+    def _to_signal(strategy_id: int, symbol: str, signal: Dict[str, Any]):
         return pb2.AISignal(
-            symbol=(request.symbols[0] if request.symbols else "EURUSD"),
-            signal_type="HOLD",
-            confidence=0.0,
-            timestamp=str(asyncio.get_running_loop().time()),
+            symbol=signal.get("symbol", symbol),
+            signal_type=signal.get("signal", "HOLD"),
+            confidence=float(signal.get("confidence", 0.0)),
+            timestamp=datetime.now().isoformat(),
+            strategy_id=strategy_id,
+            price=float(signal.get("price", 0.0) or 0.0),
         )
 
+    async def _generate(self, strategy_id: int, symbol: str, timeout: float):
+        """Evaluate one (strategy, symbol) pair; failures are reported in ``error``."""
+        try:
+            signal = await asyncio.wait_for(self._evaluate(strategy_id, symbol), timeout)
+        except asyncio.TimeoutError:
+            error = "deadline exceeded"
+        except Exception as e:
+            error = str(e)
+        else:
+            return self._to_signal(strategy_id, symbol, signal)
+        return pb2.AISignal(symbol=symbol, signal_type="HOLD", timestamp=datetime.now().isoformat(),
+                            strategy_id=strategy_id, error=error)
+
+    @staticmethod
+    def _pairs(request) -> List[tuple]:
+        symbols = list(request.symbols) or [settings.market_symbols[0]]
+        return [(request.strategy_id, symbol) for symbol in symbols]
+
+    async def GenerateAISignal(self, request, context):  # type: ignore
+        strategy_id, symbol = self._pairs(request)[0]
+        try:
+            signal = await asyncio.wait_for(
+                self._evaluate(strategy_id, symbol), self._timeout(request, context)
+            )
+        except asyncio.TimeoutError:
+            await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, "deadline exceeded")
+        except LookupError as e:
+            await context.abort(grpc.StatusCode.NOT_FOUND, str(e))
+        except Exception as e:
+            logger.error(f"Signal generation failed for strategy {strategy_id} {symbol}: {e}")
+            await context.abort(grpc.StatusCode.INTERNAL, f"signal generation failed: {e}")
+        return self._to_signal(strategy_id, symbol, signal)
+
+    async def GenerateAISignalsBatch(self, request, context):  # type: ignore
+        jobs = [
+            self._generate(strategy_id, symbol, self._timeout(item, context))
+            for item in request.requests
+            for strategy_id, symbol in self._pairs(item)
+        ]
+        return pb2.AISignalBatch(signals=await asyncio.gather(*jobs))
+
+    async def StreamAISignals(self, request_iterator, context):  # type: ignore
+        # Requests are evaluated concurrently; signals are sent as they complete.
+        results: asyncio.Queue = asyncio.Queue()
+        pending: Set[asyncio.Task] = set()
+
+        def on_done(task: asyncio.Task) -> None:
+            pending.discard(task)
+            if not task.cancelled():
+                results.put_nowait(task.result())
+
+        async def read_requests() -> None:
+            try:
+                async for request in request_iterator:
+                    timeout = self._timeout(request, context)
+                    for strategy_id, symbol in self._pairs(request):
+                        task = asyncio.create_task(self._generate(strategy_id, symbol, timeout))
+                        pending.add(task)
+                        task.add_done_callback(on_done)
+            finally:
+                results.put_nowait(None)  # end of client input
+
+        reader = asyncio.create_task(read_requests())
+        input_done = False
+        try:
+            while not (input_done and not pending and results.empty()):
+                signal = await results.get()
+                if signal is None:
+                    input_done = True
+                    continue
+                yield signal
+        finally:
+            reader.cancel()
+            for task in list(pending):
+                task.cancel()
+
 
 async def serve_async() -> None:
     if pb2_grpc is None:
@@ -75,12 +293,16 @@ async def serve_async() -> None:
         )
         return
 
-    server = grpc.aio.server()
-    pb2_grpc.add_AICoreServiceServicer_to_server(AICoreService(), server)
+    server = grpc.aio.server(maximum_concurrent_rpcs=settings.grpc_max_concurrent_rpcs or None)
+    servicer = AICoreService()
+    servicer.strategy_manager.warm_pool.start()
+    await servicer.preload_active_strategies()
+    pb2_grpc.add_AICoreServiceServicer_to_server(servicer, server)
     listen_addr = f"0.0.0.0:{settings.grpc_port}"
     server.add_insecure_port(listen_addr)
     logger.info(f"Starting AICore gRPC server on {listen_addr}")
     await server.start()
+    log_startup(logger, "AICore gRPC server")
     try:
         await server.wait_for_termination()
     except KeyboardInterrupt:
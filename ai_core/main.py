@@ -3,24 +3,43 @@ import json
 from datetime import datetime
 import contextlib
 from typing import Optional
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from .core.config import settings
+from .core.container import (
+    container,
+    get_backtest_jobs,
+    get_feature_store,
+    get_ibkr_service,
+    get_market_data_service,
+    get_risk_manager,
+    get_strategy_manager,
+)
+from .core.imports import log_startup
 from .core.logger import get_logger, shutdown_logging
-from .database.database import engine
+from .core.metrics import CONTENT_TYPE, REGISTRY, SIGNALS_EMITTED, render_prometheus
+from .core.profiler import loop_monitor, profiler
+from .database.database import engine, dispose_engines, pool_status
 from .database.models import Base
-from ai_core.strategy_engine.rule_based import StrategyManager
-from ai_core.strategy_engine.broker.ibkr_service import IBKRService
-from ai_core.strategy_engine.market_data.market_data_service import MarketDataService
-from ai_core.risk_manager.risk_manager import RiskManager
-from ai_core.backtesting.engine import BacktestingEngine
-from ai_core.api.routes import strategies, trades, backtesting, account
+from .database.partitions import add_missing_columns, ensure_current_partitions, run_partition_maintenance
+from .database.trade_summary import backfill_trade_summary
+from .backtesting.jobs import ensure_job_columns
+from ai_core.strategy_engine.market_data.event_bus import MarketEventBus
+from ai_core.strategy_engine.market_data.shared_snapshot import SnapshotWriter
+from ai_core.strategy_engine.signal_pipeline import SignalPipeline
+from ai_core.api.routes import strategies, trades, backtesting, account, admin
+from ai_core.api.pagination import NEXT_CURSOR_HEADER
 from ai_core.api.websocket.connection_manager import ConnectionManager
 
 logger = get_logger(__name__)
 market_data_task: Optional[asyncio.Task] = None
+market_feed_task: Optional[asyncio.Task] = None
+partition_task: Optional[asyncio.Task] = None
+feature_flush_task: Optional[asyncio.Task] = None
+startup_jobs_task: Optional[asyncio.Task] = None
+market_snapshot: Optional[SnapshotWriter] = None
 
 app = FastAPI(title=settings.app_name, version="1.0.0")
 
@@ -31,53 +50,108 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
-# Initialize services
-strategy_manager = StrategyManager()
-ibkr_service = IBKRService()
-market_data_service = MarketDataService()
-risk_manager = RiskManager()
-backtesting_engine = BacktestingEngine()
+# Lightweight in-process plumbing; heavier services come from the container on first use
 connection_manager = ConnectionManager()
+market_event_bus = MarketEventBus()
+
+# Scrape-time gauges for queue depths and connection counts
+REGISTRY.gauge("queue_depth", "Deepest subscriber queue", fn=market_event_bus.max_queue_depth,
+               queue="market_event_bus")
+REGISTRY.gauge("subscribers", "Live market event bus subscriptions", fn=market_event_bus.subscriber_count)
+REGISTRY.gauge("ws_connections", "Connected WebSocket clients", fn=connection_manager.get_connection_count)
+REGISTRY.gauge("db_pool_checked_out", "Checked-out sync DB connections",
+               fn=lambda: pool_status()["sync"]["checked_out"])
+REGISTRY.gauge("strategies_loaded", "Warm strategy instances",
+               fn=lambda: len(get_strategy_manager().loaded_strategies))
 
 # Include API routes
 app.include_router(strategies.router, prefix="/api/strategies", tags=["strategies"])
 app.include_router(trades.router, prefix="/api/trades", tags=["trades"])
 app.include_router(backtesting.router, prefix="/api/backtesting", tags=["backtesting"])
 app.include_router(account.router, prefix="/api/account", tags=["account"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize application on startup"""
-    global market_data_task
+    global market_data_task, market_feed_task, partition_task, feature_flush_task, startup_jobs_task, market_snapshot
 
-    # Create database tables
+    loop_monitor.start()
+    if settings.slow_callback_detection:
+        loop_monitor.enable_slow_callbacks()
+
+    # Create database tables and the partitions inserts will land in; the
+    # slower maintenance runs in the background once the app is serving
     Base.metadata.create_all(bind=engine)
+    try:
+        await asyncio.to_thread(add_missing_columns)
+        await asyncio.to_thread(ensure_job_columns)
+        await asyncio.to_thread(ensure_current_partitions)
+    except Exception as exc:
+        logger.error("Schema update failed: %s", exc)
+    partition_task = asyncio.create_task(run_partition_maintenance())
+    startup_jobs_task = asyncio.create_task(run_startup_jobs())
     
     # Initialize IBKR connection
     try:
-        await ibkr_service.connect()
+        await get_ibkr_service().connect()
     except Exception as exc:
         logger.error("Failed to establish broker connection: %s", exc)
     
-    # Start market data streaming
+    # Mirror quotes into shared memory for out-of-process strategies
+    if settings.market_snapshot_shm:
+        try:
+            market_snapshot = SnapshotWriter(
+                settings.market_snapshot_shm, market_event_bus.timeframes, settings.market_snapshot_capacity
+            )
+            market_event_bus.share_snapshot(market_snapshot)
+        except Exception as exc:
+            logger.error("Failed to create shared market snapshot: %s", exc)
+    
+    # Start market data feed, event-driven strategy evaluation and streaming
+    market_feed_task = await start_market_data_feed()
+    await container.get("signal_pipeline").start()
     market_data_task = asyncio.create_task(stream_market_data())
+    feature_flush_task = asyncio.create_task(run_feature_store_flush())
     
     logger.info("Trading dashboard started successfully")
+    log_startup(logger, "Trading dashboard")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up on shutdown"""
-    global market_data_task
+    global market_data_task, market_feed_task, partition_task, feature_flush_task, startup_jobs_task, market_snapshot
+
+    if container.is_created("signal_pipeline"):
+        await container.get("signal_pipeline").stop()
+    if container.is_created("backtest_jobs"):
+        get_backtest_jobs().shutdown()
 
-    if market_data_task:
-        market_data_task.cancel()
-        with contextlib.suppress(asyncio.CancelledError):
-            await market_data_task
-        market_data_task = None
+    for task in (market_data_task, market_feed_task, partition_task, feature_flush_task, startup_jobs_task):
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    market_data_task = None
+    market_feed_task = None
+    partition_task = None
+    feature_flush_task = None
+    startup_jobs_task = None
+    if container.is_created("feature_store"):
+        await asyncio.to_thread(get_feature_store().flush)
+    if market_snapshot is not None:
+        market_event_bus.share_snapshot(None)
+        market_snapshot.close()
+        market_snapshot = None
 
-    await ibkr_service.disconnect()
+    if container.is_created("ibkr_service"):
+        await get_ibkr_service().disconnect()
+    await dispose_engines()
+    await loop_monitor.stop()
+    profiler.stop()
     shutdown_logging()
     logger.info("Trading dashboard shut down")
 
@@ -93,46 +167,93 @@ async def websocket_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         connection_manager.disconnect(websocket)
 
-async def stream_market_data():
-    """Stream live market data and AI signals"""
+async def start_market_data_feed() -> Optional[asyncio.Task]:
+    """Connect the configured market data source to the event bus"""
+    symbols = list(settings.market_symbols)
+    source = settings.market_data_source.lower()
+
+    ibkr_service = get_ibkr_service()
+    if source in ("auto", "ibkr") and ibkr_service.is_connected():
+        ibkr_service.attach_event_bus(market_event_bus)
+        await ibkr_service.subscribe_market_data(symbols)
+        logger.info("Streaming IBKR market data for %s", symbols)
+        return None
+
+    if source == "ibkr":
+        logger.error("MARKET_DATA_SOURCE=ibkr but the broker is not connected; no market data feed started")
+        return None
+
+    return asyncio.create_task(get_market_data_service().run_simulated_feed(market_event_bus, symbols))
+
+async def publish_signal(signal: dict):
+    """Broadcast a strategy signal and re-check portfolio risk"""
+    SIGNALS_EMITTED.inc()
+    await connection_manager.broadcast(json.dumps({
+        'type': 'ai_signal',
+        'data': signal,
+        'timestamp': datetime.now().isoformat()
+    }, default=str))
+
+    # Risk assessment
+    risk_assessment = await get_risk_manager().assess_portfolio_risk_async()
+    if risk_assessment['risk_level'] > 0.7:  # High risk threshold
+        risk_alert = {
+            'type': 'risk_alert',
+            'data': risk_assessment,
+            'timestamp': datetime.now().isoformat()
+        }
+        await connection_manager.broadcast(json.dumps(risk_alert))
+
+container.register(
+    "signal_pipeline",
+    lambda: SignalPipeline(market_event_bus, get_strategy_manager(), on_signal=publish_signal),
+)
+
+async def run_startup_jobs():
+    """One-off startup work that does not have to finish before the app serves."""
+    try:
+        await asyncio.to_thread(backfill_trade_summary)
+    except Exception as exc:
+        logger.error("Trade summary backfill failed: %s", exc)
+    try:
+        await get_backtest_jobs().recover()
+    except Exception as exc:
+        logger.error("Backtest job recovery failed: %s", exc)
+
+async def run_feature_store_flush():
+    """Persist live feature rows to the offline feature store periodically."""
     while True:
+        await asyncio.sleep(settings.feature_store_flush_interval)
+        if not container.is_created("feature_store"):
+            continue
         try:
-            # Get live forex data
-            forex_data = await market_data_service.get_live_forex_data(['EURUSD', 'GBPUSD', 'XAUUSD'])
-            
-            # Process through active strategies
-            active_strategies = strategy_manager.get_active_strategies()
-            signals = []
-            
-            for strategy in active_strategies:
-                signal = await strategy_manager.process_strategy(strategy.id, forex_data)
-                if signal:
-                    signals.append(signal)
-            
-            # Broadcast data to connected clients
-            market_update = {
-                'type': 'market_data',
-                'data': forex_data,
-                'signals': signals,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            await connection_manager.broadcast(json.dumps(market_update))
-            
-            # Risk assessment
-            risk_assessment = risk_manager.assess_portfolio_risk()
-            if risk_assessment['risk_level'] > 0.7:  # High risk threshold
-                risk_alert = {
-                    'type': 'risk_alert',
-                    'data': risk_assessment,
+            await asyncio.to_thread(get_feature_store().flush)
+        except Exception as exc:
+            logger.error(f"Feature store flush failed: {exc}")
+
+async def stream_market_data():
+    """Broadcast ticks pushed by the market event bus to WebSocket clients"""
+    symbols = settings.market_symbols
+    subscription = market_event_bus.subscribe(symbols)
+    try:
+        while True:
+            # Coalesce whatever queued up since the last send into one message
+            events = await subscription.get_batch(max_items=len(symbols) * 8)
+            if not connection_manager.get_connection_count():
+                continue
+
+            try:
+                market_update = {
+                    'type': 'market_data',
+                    'data': {event.symbol: event.data for event in events},
+                    'signals': [],
                     'timestamp': datetime.now().isoformat()
                 }
-                await connection_manager.broadcast(json.dumps(risk_alert))
-            
-        except Exception as e:
-            logger.error(f"Error in market data stream: {e}")
-        
-        await asyncio.sleep(1)  # 1 second intervals
+                await connection_manager.broadcast(json.dumps(market_update))
+            except Exception as e:
+                logger.error(f"Error in market data stream: {e}")
+    finally:
+        subscription.close()
 
 @app.get("/")
 async def root():
@@ -146,10 +267,16 @@ async def health_check():
         "timestamp": datetime.now().isoformat(),
         "services": {
             "database": "connected",
-            "ibkr": "connected" if ibkr_service.is_connected() else "disconnected",
+            "ibkr": "connected" if get_ibkr_service().is_connected() else "disconnected",
             "market_data": "streaming"
-        }
+        },
+        "db_pool": pool_status()
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_prometheus(REGISTRY), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     uvicorn.run("ai_core.main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
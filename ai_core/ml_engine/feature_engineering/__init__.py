@@ -1 +1,18 @@
-"""Feature engineering utilities and transformers."""
\ No newline at end of file
+"""Feature engineering utilities and transformers.
+
+Features are declared once (:mod:`.features`) and evaluated either over a
+whole history with NumPy or incrementally per bar (:mod:`.pipeline`).
+"""
+
+from .features import FEATURES, Feature, feature_from_config
+from .pipeline import FeatureCache, FeaturePipeline, FeatureState, feature_cache
+
+__all__ = [
+    "FEATURES",
+    "Feature",
+    "FeatureCache",
+    "FeaturePipeline",
+    "FeatureState",
+    "feature_cache",
+    "feature_from_config",
+]
@@ -0,0 +1,146 @@
+"""Named feature definitions built from :mod:`.nodes`.
+
+Price features are scale free (returns, ratios, z-scores, basis points) so one
+model can be trained across symbols. ``warmup`` is the number of leading bars
+whose value is masked to NaN: enough for a full window, or ``3 x period`` for
+recursive averages whose seed value has then decayed below 5%.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Union
+
+from .nodes import EWM, Const, Field, Lag, Moments, Node, Op
+
+WARMUP_PERIODS = 3
+
+
+@dataclass(frozen=True)
+class Feature:
+    name: str
+    node: Node
+    warmup: int = 0
+
+
+def _suffix(field: str) -> str:
+    return "" if field == "close" else f"_{field}"
+
+
+def _log_return(field: str, lag: int) -> Node:
+    price = Field(field)
+    return Op("log_ratio", (price, Lag(price, lag)))
+
+
+def _ema_alpha(span: int) -> float:
+    return 2.0 / (span + 1.0)
+
+
+def log_return(lag: int = 1, field: str = "close") -> Feature:
+    """Log return over ``lag`` bars."""
+    return Feature(f"log_return_{lag}{_suffix(field)}", _log_return(field, lag), warmup=lag)
+
+
+def rolling_mean(window: int = 20, field: str = "close") -> Feature:
+    return Feature(f"rolling_mean_{window}{_suffix(field)}", Op("mean", (Moments(Field(field), window),)), warmup=window - 1)
+
+
+def rolling_std(window: int = 20, field: str = "close") -> Feature:
+    return Feature(f"rolling_std_{window}{_suffix(field)}", Op("std", (Moments(Field(field), window),)), warmup=window - 1)
+
+
+def zscore(window: int = 20, field: str = "close") -> Feature:
+    """Distance of ``field`` from its rolling mean in rolling standard deviations."""
+    x = Field(field)
+    return Feature(f"zscore_{window}{_suffix(field)}", Op("zscore", (x, Moments(x, window))), warmup=window - 1)
+
+
+def momentum(window: int = 20) -> Feature:
+    """Mean 1-bar log return over ``window`` bars."""
+    return Feature(f"momentum_{window}", Op("mean", (Moments(_log_return("close", 1), window),)), warmup=window)
+
+
+def volatility(window: int = 20) -> Feature:
+    """Standard deviation of 1-bar log returns over ``window`` bars."""
+    return Feature(f"volatility_{window}", Op("std", (Moments(_log_return("close", 1), window),)), warmup=window)
+
+
+def ema_ratio(span: int = 20, field: str = "close") -> Feature:
+    """``field / EMA(field) - 1``."""
+    x = Field(field)
+    ratio = Op("sub", (Op("div", (x, EWM(x, _ema_alpha(span)))), Const(1.0)))
+    return Feature(f"ema_ratio_{span}{_suffix(field)}", ratio, warmup=WARMUP_PERIODS * span)
+
+
+def macd(fast: int = 12, slow: int = 26) -> Feature:
+    """MACD line relative to price: ``(EMA_fast - EMA_slow) / close``."""
+    close = Field("close")
+    line = Op("sub", (EWM(close, _ema_alpha(fast)), EWM(close, _ema_alpha(slow))))
+    return Feature(f"macd_{fast}_{slow}", Op("div", (line, close)), warmup=WARMUP_PERIODS * slow)
+
+
+def rsi(period: int = 14) -> Feature:
+    """Wilder's RSI (0-100)."""
+    change = Op("sub", (Field("close"), Lag(Field("close"), 1)))
+    alpha = 1.0 / period
+    node = Op("rsi", (EWM(Op("pos", (change,)), alpha), EWM(Op("neg", (change,)), alpha)))
+    return Feature(f"rsi_{period}", node, warmup=WARMUP_PERIODS * period)
+
+
+def atr(period: int = 14) -> Feature:
+    """Wilder's average true range as a fraction of the close."""
+    close = Field("close")
+    true_range = Op("true_range", (Field("high"), Field("low"), Lag(close, 1)))
+    return Feature(f"atr_{period}", Op("div", (EWM(true_range, 1.0 / period), close)), warmup=WARMUP_PERIODS * period)
+
+
+def range_bps() -> Feature:
+    """Bar high-low range in basis points of the close."""
+    span = Op("sub", (Field("high"), Field("low")))
+    return Feature("range_bps", Op("mul", (Op("div", (span, Field("close"))), Const(1e4))))
+
+
+def close_location() -> Feature:
+    """Where the close sits in the bar range, from -1 (low) to 1 (high)."""
+    return Feature("close_location", Op("close_location", (Field("close"), Field("high"), Field("low"))))
+
+
+def volume_zscore(window: int = 20) -> Feature:
+    return zscore(window, field="volume")
+
+
+def spread_bps() -> Feature:
+    """Quoted spread in basis points of the ask; needs ``bid`` and ``ask`` fields."""
+    spread = Op("sub", (Field("ask"), Field("bid")))
+    return Feature("spread_bps", Op("mul", (Op("div", (spread, Field("ask"))), Const(1e4))))
+
+
+FEATURES: Dict[str, Callable[..., Feature]] = {
+    "log_return": log_return,
+    "rolling_mean": rolling_mean,
+    "rolling_std": rolling_std,
+    "zscore": zscore,
+    "momentum": momentum,
+    "volatility": volatility,
+    "ema_ratio": ema_ratio,
+    "macd": macd,
+    "rsi": rsi,
+    "atr": atr,
+    "range_bps": range_bps,
+    "close_location": close_location,
+    "volume_zscore": volume_zscore,
+    "spread_bps": spread_bps,
+}
+
+
+def feature_from_config(spec: Union[str, Mapping[str, Any]]) -> Feature:
+    """``"rsi"`` or ``{"name": "rsi", "period": 7}`` -> :class:`Feature`."""
+    if isinstance(spec, str):
+        name, params = spec, {}
+    else:
+        params = dict(spec)
+        name = params.pop("name", None)
+    factory = FEATURES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown feature: {name}")
+    return factory(**params)
@@ -0,0 +1,373 @@
+"""Computation graph behind feature definitions.
+
+A feature is a small graph of nodes: raw fields, lags, element-wise
+operations, rolling moments and exponential averages. Every node computes its
+whole series at once with NumPy (``batch``) and advances by one bar
+(``step``) from a state that ``seed`` derives from a batch result, so history,
+backtests and live bars go through one definition. Nodes are frozen
+dataclasses compared by value: features that need the same intermediate
+series (the 20-bar moments of 1-bar returns, say) share one node and it is
+computed once.
+
+Rolling windows are evaluated with cumulative sums in batch mode and with a
+ring buffer plus running sums live, so neither recomputes the overlap between
+consecutive windows. Missing values (NaN) are skipped: rolling statistics use
+the valid values in the window, and exponential averages hold their last
+value over a gap.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+NAN = math.nan
+
+Fields = Dict[str, np.ndarray]
+
+
+def _finite(value: float) -> bool:
+    return value == value and value not in (math.inf, -math.inf)
+
+
+class Node:
+    """One series in the feature graph."""
+
+    def inputs(self) -> Tuple["Node", ...]:
+        return ()
+
+    def batch(self, fields: Fields, *inputs: np.ndarray) -> np.ndarray:
+        """Whole series from full input series."""
+        raise NotImplementedError
+
+    def seed(self, output: np.ndarray, *inputs: np.ndarray) -> Any:
+        """State after the last row of a batch (arrays may be empty)."""
+        return None
+
+    def step(self, state: Any, bar: Mapping[str, Any], *inputs: Any) -> Any:
+        """Value for the next bar; updates ``state`` in place."""
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class Field(Node):
+    """A raw bar field such as ``close`` or ``volume``."""
+
+    name: str
+
+    def batch(self, fields: Fields, *inputs: np.ndarray) -> np.ndarray:
+        return fields[self.name]
+
+    def step(self, state: Any, bar: Mapping[str, Any], *inputs: Any) -> float:
+        value = bar.get(self.name)
+        if value is None:
+            return NAN
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return NAN
+
+
+@dataclass(frozen=True)
+class Const(Node):
+    value: float
+
+    def batch(self, fields: Fields, *inputs: np.ndarray) -> np.ndarray:
+        length = len(next(iter(fields.values()))) if fields else 0
+        return np.full(length, self.value)
+
+    def step(self, state: Any, bar: Mapping[str, Any], *inputs: Any) -> float:
+        return self.value
+
+
+@dataclass(frozen=True)
+class Lag(Node):
+    """``source`` as it was ``periods`` bars ago."""
+
+    source: Node
+    periods: int
+
+    def inputs(self) -> Tuple[Node, ...]:
+        return (self.source,)
+
+    def batch(self, fields: Fields, x: np.ndarray) -> np.ndarray:
+        out = np.full(len(x), NAN)
+        if self.periods < len(x):
+            out[self.periods:] = x[:len(x) - self.periods]
+        return out
+
+    def seed(self, output: np.ndarray, x: np.ndarray) -> List[Any]:
+        tail = [float(v) for v in x[-self.periods:]] if len(x) else []
+        buffer = [NAN] * (self.periods - len(tail)) + tail  # oldest first
+        return [buffer, 0]
+
+    def step(self, state: List[Any], bar: Mapping[str, Any], x: float) -> float:
+        buffer, pos = state
+        value = buffer[pos]
+        buffer[pos] = x
+        state[1] = (pos + 1) % self.periods
+        return value
+
+
+# -- element-wise operations ------------------------------------------------
+
+
+def _div(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(b != 0, a / b, NAN)
+
+
+def _log_ratio(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = a / b
+        return np.where((b != 0) & (ratio > 0), np.log(np.where(ratio > 0, ratio, 1.0)), NAN)
+
+
+def _true_range(high, low, prev_close):
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def _close_location(close, high, low):
+    span = high - low
+    with np.errstate(divide="ignore", invalid="ignore"):
+        location = (2 * close - high - low) / span
+    return np.where(span > 0, location, np.where(np.isnan(span), NAN, 0.0))
+
+
+def _zscore(x, moments):
+    std = np.sqrt(moments[:, 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(std > 0, (x - moments[:, 0]) / std, NAN)
+
+
+def _rsi(gain, loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+    return np.where(loss > 0, rsi, np.where(gain > 0, 100.0, np.where(gain == 0, 50.0, NAN)))
+
+
+def _scalar_div(a, b):
+    return a / b if b != 0 and b == b else NAN
+
+
+def _scalar_log_ratio(a, b):
+    ratio = _scalar_div(a, b)
+    return math.log(ratio) if ratio > 0 and _finite(ratio) else NAN
+
+
+def _scalar_true_range(high, low, prev_close):
+    candidates = [v for v in (high - low, abs(high - prev_close), abs(low - prev_close)) if v == v]
+    return max(candidates) if candidates else NAN
+
+
+def _scalar_close_location(close, high, low):
+    span = high - low
+    if span != span:
+        return NAN
+    return (2 * close - high - low) / span if span > 0 else 0.0
+
+
+def _scalar_zscore(x, moments):
+    mean, var = moments
+    std = math.sqrt(var) if var == var else NAN
+    return (x - mean) / std if std > 0 else NAN
+
+
+def _scalar_rsi(gain, loss):
+    if loss > 0:
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+    if gain > 0:
+        return 100.0
+    return 50.0 if gain == 0 else NAN
+
+
+# name -> (vectorized, scalar); NaN handling must agree between the two
+OPS: Dict[str, Tuple[Callable[..., np.ndarray], Callable[..., float]]] = {
+    "sub": (np.subtract, lambda a, b: a - b),
+    "mul": (np.multiply, lambda a, b: a * b),
+    "div": (_div, _scalar_div),
+    "log_ratio": (_log_ratio, _scalar_log_ratio),
+    "pos": (lambda x: np.where(x > 0, x, np.where(np.isnan(x), NAN, 0.0)),
+            lambda x: x if x != x or x > 0 else 0.0),
+    "neg": (lambda x: np.where(x < 0, -x, np.where(np.isnan(x), NAN, 0.0)),
+            lambda x: -x if x < 0 else (NAN if x != x else 0.0)),
+    "true_range": (_true_range, _scalar_true_range),
+    "close_location": (_close_location, _scalar_close_location),
+    "mean": (lambda m: m[:, 0], lambda m: m[0]),
+    "std": (lambda m: np.sqrt(m[:, 1]), lambda m: math.sqrt(m[1]) if m[1] == m[1] else NAN),
+    "zscore": (_zscore, _scalar_zscore),
+    "rsi": (_rsi, _scalar_rsi),
+}
+
+
+@dataclass(frozen=True)
+class Op(Node):
+    """Stateless element-wise operation from :data:`OPS`."""
+
+    op: str
+    args: Tuple[Node, ...]
+
+    def __post_init__(self):
+        if self.op not in OPS:
+            raise ValueError(f"Unknown feature operation: {self.op}")
+
+    def inputs(self) -> Tuple[Node, ...]:
+        return self.args
+
+    def batch(self, fields: Fields, *inputs: np.ndarray) -> np.ndarray:
+        return np.asarray(OPS[self.op][0](*inputs), dtype=np.float64)
+
+    def step(self, state: Any, bar: Mapping[str, Any], *inputs: Any) -> float:
+        return OPS[self.op][1](*inputs)
+
+
+# -- rolling moments --------------------------------------------------------
+
+
+def _first_finite(x: np.ndarray) -> Optional[float]:
+    index = np.flatnonzero(np.isfinite(x))
+    return float(x[index[0]]) if index.size else None
+
+
+def rolling_moments(x: np.ndarray, window: int) -> np.ndarray:
+    """``T x 2`` rolling (mean, sample variance) over the valid values of each window.
+
+    Values are centred on the first valid one before the cumulative sums so
+    the variance of price-level series does not cancel catastrophically.
+    """
+    length = len(x)
+    out = np.full((length, 2), NAN)
+    if length == 0:
+        return out
+    valid = np.isfinite(x)
+    ref = _first_finite(x) or 0.0
+    centred = np.where(valid, x - ref, 0.0)
+    zero = np.zeros(1)
+    count = np.concatenate((zero, np.cumsum(valid)))
+    s1 = np.concatenate((zero, np.cumsum(centred)))
+    s2 = np.concatenate((zero, np.cumsum(centred * centred)))
+    hi = np.arange(1, length + 1)
+    lo = np.maximum(hi - window, 0)
+    n = count[hi] - count[lo]
+    a = s1[hi] - s1[lo]
+    b = s2[hi] - s2[lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:, 0] = np.where(n >= 1, a / n + ref, NAN)
+        out[:, 1] = np.where(n >= 2, np.maximum((b - a * a / n) / (n - 1), 0.0), NAN)
+    return out
+
+
+@dataclass(frozen=True)
+class Moments(Node):
+    """Rolling mean and variance of ``source``; output is ``T x 2``."""
+
+    source: Node
+    window: int
+
+    def inputs(self) -> Tuple[Node, ...]:
+        return (self.source,)
+
+    def batch(self, fields: Fields, x: np.ndarray) -> np.ndarray:
+        return rolling_moments(x, self.window)
+
+    def seed(self, output: np.ndarray, x: np.ndarray) -> List[Any]:
+        ref = _first_finite(x)
+        tail = [float(v) - ref if _finite(float(v)) else NAN for v in x[-self.window:]] if ref is not None else []
+        buffer = [NAN] * (self.window - len(tail)) + tail
+        state = [buffer, 0, ref, 0, 0.0, 0.0]  # buffer, pos, ref, n, sum, sum of squares
+        self._rebuild(state)
+        return state
+
+    @staticmethod
+    def _rebuild(state: List[Any]) -> None:
+        values = [v for v in state[0] if v == v]
+        state[3] = len(values)
+        state[4] = math.fsum(values)
+        state[5] = math.fsum(v * v for v in values)
+
+    def step(self, state: List[Any], bar: Mapping[str, Any], x: float) -> Tuple[float, float]:
+        buffer, pos, ref = state[0], state[1], state[2]
+        if ref is None and _finite(x):
+            ref = state[2] = x
+        new = x - ref if ref is not None and _finite(x) else NAN
+        old = buffer[pos]
+        if old == old:
+            state[3] -= 1
+            state[4] -= old
+            state[5] -= old * old
+        if new == new:
+            state[3] += 1
+            state[4] += new
+            state[5] += new * new
+        buffer[pos] = new
+        state[1] = (pos + 1) % self.window
+        if state[1] == 0:
+            self._rebuild(state)  # once per wrap-around, against float drift
+
+        n, s1, s2 = state[3], state[4], state[5]
+        mean = s1 / n + ref if n >= 1 else NAN
+        var = max((s2 - s1 * s1 / n) / (n - 1), 0.0) if n >= 2 else NAN
+        return mean, var
+
+
+# -- exponential averages ---------------------------------------------------
+
+
+def _ewm_dense(values: np.ndarray, alpha: float) -> np.ndarray:
+    """``y[t] = (1 - alpha) * y[t-1] + alpha * x[t]``, ``y[0] = x[0]``, without a Python loop.
+
+    Within a block, ``y[k] = d**(k+1) * (y_prev + alpha * cumsum(x / d**(j+1)))``;
+    blocks are sized so ``d**-k`` stays finite.
+    """
+    decay = 1.0 - alpha
+    if decay <= 0.0 or len(values) == 0:
+        return values.astype(np.float64, copy=True)
+    block = max(1, min(len(values), int(600.0 / -math.log(decay))))
+    out = np.empty(len(values))
+    prev = float(values[0])
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        result = powers * (prev + alpha * np.cumsum(chunk / powers))
+        out[start:start + len(chunk)] = result
+        prev = float(result[-1])
+    return out
+
+
+def ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponential average over the valid values, held flat across gaps."""
+    out = np.full(len(x), NAN)
+    valid = np.isfinite(x)
+    index = np.flatnonzero(valid)
+    if index.size == 0:
+        return out
+    out[index] = _ewm_dense(x[index], alpha)
+    last = np.maximum.accumulate(np.where(valid, np.arange(len(x)), -1))
+    return np.where(last >= 0, out[np.maximum(last, 0)], NAN)
+
+
+@dataclass(frozen=True)
+class EWM(Node):
+    """Exponentially weighted mean of ``source`` with smoothing ``alpha``."""
+
+    source: Node
+    alpha: float
+
+    def inputs(self) -> Tuple[Node, ...]:
+        return (self.source,)
+
+    def batch(self, fields: Fields, x: np.ndarray) -> np.ndarray:
+        return ewm(x, self.alpha)
+
+    def seed(self, output: np.ndarray, x: np.ndarray) -> List[Optional[float]]:
+        last = float(output[-1]) if len(output) else NAN
+        return [last if last == last else None]
+
+    def step(self, state: List[Optional[float]], bar: Mapping[str, Any], x: float) -> float:
+        if _finite(x):
+            y = state[0]
+            state[0] = x if y is None else (1.0 - self.alpha) * y + self.alpha * x
+        return NAN if state[0] is None else state[0]
@@ -0,0 +1,306 @@
+"""Declarative feature pipelines.
+
+A :class:`FeaturePipeline` is an ordered list of :class:`Feature` definitions
+compiled into one node graph (shared intermediates computed once). The same
+pipeline produces a ``T x F`` matrix from a history of bars with NumPy
+(training, backtests) and one row per bar from a :class:`FeatureState` (live),
+and both agree up to floating point rounding::
+
+    pipeline = FeaturePipeline.from_config(["log_return", {"name": "rsi", "period": 7}])
+    matrix = pipeline.transform(frame)            # DataFrame or dict of arrays
+    state = pipeline.stream(frame)                # continue live after the history
+    row = state.update({"open": ..., "high": ..., "low": ..., "close": ..., "volume": ...})
+
+:class:`FeatureCache` keeps matrices and live state per ``(symbol,
+timeframe, pipeline hash)``, so a history that grows by a few bars, or a bar
+seen by several strategies, is only computed once.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .features import Feature, feature_from_config
+from .nodes import Field, Node
+
+
+class FeaturePipeline:
+    """Compiled set of features producing one column each."""
+
+    def __init__(self, features: Sequence[Feature]):
+        self.features = tuple(features)
+        self.columns = [feature.name for feature in self.features]
+        if len(set(self.columns)) != len(self.columns):
+            raise ValueError(f"Duplicate feature names in pipeline: {self.columns}")
+
+        self.nodes: List[Node] = []
+        index: Dict[Node, int] = {}
+
+        def visit(node: Node) -> int:
+            position = index.get(node)
+            if position is None:
+                for parent in node.inputs():
+                    visit(parent)
+                position = index[node] = len(self.nodes)
+                self.nodes.append(node)
+            return position
+
+        self._outputs = [visit(feature.node) for feature in self.features]
+        self._args = [tuple(index[parent] for parent in node.inputs()) for node in self.nodes]
+        self.fields = sorted({node.name for node in self.nodes if isinstance(node, Field)})
+        self.warmup = np.array([feature.warmup for feature in self.features], dtype=np.int64)
+        self.hash = hashlib.sha1(repr(self.features).encode()).hexdigest()[:16]
+
+    @classmethod
+    def from_config(cls, specs: Iterable[Union[str, Mapping[str, Any]]]) -> "FeaturePipeline":
+        return cls([feature_from_config(spec) for spec in specs])
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def __repr__(self) -> str:
+        return f"FeaturePipeline({self.columns}, hash={self.hash})"
+
+    def field_arrays(self, bars: Any) -> Dict[str, np.ndarray]:
+        """Float arrays of the fields the pipeline reads (NaN for absent ones)."""
+        arrays = {name: np.asarray(bars[name], dtype=np.float64) for name in self.fields if name in bars}
+        if not arrays:
+            raise ValueError(f"Bars have none of the fields {self.fields}")
+        length = len(next(iter(arrays.values())))
+        for name in self.fields:
+            if name not in arrays:
+                arrays[name] = np.full(length, np.nan)  # e.g. bid/ask on bar-only history
+        return arrays
+
+    def _run(self, fields: Dict[str, np.ndarray]) -> Tuple[np.ndarray, List[np.ndarray]]:
+        outputs: List[np.ndarray] = []
+        for node, args in zip(self.nodes, self._args):
+            outputs.append(node.batch(fields, *(outputs[i] for i in args)))
+        length = len(next(iter(fields.values())))
+        matrix = np.empty((length, len(self.features)))
+        for column, (position, warmup) in enumerate(zip(self._outputs, self.warmup)):
+            matrix[:, column] = outputs[position]
+            matrix[:warmup, column] = np.nan
+        return matrix, outputs
+
+    def transform(self, bars: Any) -> np.ndarray:
+        """``T x F`` features for a history of bars (mapping of field arrays or a DataFrame)."""
+        return self._run(self.field_arrays(bars))[0]
+
+    def transform_with_state(self, bars: Any) -> Tuple[np.ndarray, "FeatureState"]:
+        """:meth:`transform` plus the state to continue from the last bar."""
+        matrix, outputs = self._run(self.field_arrays(bars))
+        return matrix, self._seed(outputs, len(matrix))
+
+    def stream(self, history: Any = None) -> "FeatureState":
+        """Incremental state, positioned after ``history`` if given.
+
+        The state is derived from the batch result, so seeding from a long
+        history costs one vectorized pass rather than a loop over its bars.
+        """
+        if history is not None:
+            return self.transform_with_state(history)[1]
+        empty = {name: np.empty(0) for name in self.fields}
+        return self._seed(self._run(empty)[1], 0)
+
+    def _seed(self, outputs: List[np.ndarray], count: int) -> "FeatureState":
+        states = [
+            node.seed(outputs[position], *(outputs[i] for i in args))
+            for position, (node, args) in enumerate(zip(self.nodes, self._args))
+        ]
+        return FeatureState(self, states, count)
+
+
+class FeatureState:
+    """A pipeline evaluated one bar at a time."""
+
+    __slots__ = ("pipeline", "states", "count", "last")
+
+    def __init__(self, pipeline: FeaturePipeline, states: List[Any], count: int = 0):
+        self.pipeline = pipeline
+        self.states = states
+        self.count = count
+        self.last: Optional[np.ndarray] = None
+
+    def update(self, bar: Mapping[str, Any]) -> np.ndarray:
+        """Features for the next completed bar."""
+        pipeline = self.pipeline
+        values: List[Any] = []
+        for node, args, state in zip(pipeline.nodes, pipeline._args, self.states):
+            values.append(node.step(state, bar, *(values[i] for i in args)))
+        self.count += 1
+        row = np.array([values[position] for position in pipeline._outputs], dtype=np.float64)
+        row[self.count <= pipeline.warmup] = np.nan
+        self.last = row
+        return row
+
+
+def to_ns(value: Any) -> int:
+    """Bar timestamp as epoch nanoseconds.
+
+    Accepts epoch seconds (``bar_start``), ISO strings, datetimes and
+    ``datetime64`` values.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(round(value * 1e9))
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return int(np.datetime64(value, "ns").astype(np.int64))
+
+
+def _ns_array(timestamps: Any) -> np.ndarray:
+    values = np.asarray(timestamps)
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[ns]").astype(np.int64)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64)
+    return np.array([to_ns(value) for value in values], dtype=np.int64)
+
+
+@dataclass
+class _CacheEntry:
+    timestamps: np.ndarray  # epoch ns, increasing
+    values: np.ndarray
+    state: FeatureState
+    # Rows appended live since ``values`` was last materialised
+    new_timestamps: List[int]
+    new_rows: List[np.ndarray]
+
+    def materialise(self) -> None:
+        if self.new_rows:
+            self.timestamps = np.concatenate((self.timestamps, np.array(self.new_timestamps, dtype=np.int64)))
+            self.values = np.vstack([self.values] + self.new_rows)
+            self.new_timestamps = []
+            self.new_rows = []
+
+    def latest(self) -> Optional[np.ndarray]:
+        if self.new_rows:
+            return self.new_rows[-1]
+        return self.values[-1] if len(self.values) else None
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if self.new_timestamps:
+            return self.new_timestamps[-1]
+        return int(self.timestamps[-1]) if len(self.timestamps) else None
+
+
+class FeatureCache:
+    """Feature matrices and live state per ``(symbol, timeframe, pipeline hash)``.
+
+    Thread safe; least recently used entries beyond ``max_entries`` are
+    dropped.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: Tuple[str, str, str]) -> Optional[_CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: Tuple[str, str, str], entry: _CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def transform(self, symbol: str, timeframe: str, pipeline: FeaturePipeline,
+                  timestamps: Any, bars: Any) -> np.ndarray:
+        """``T x F`` features for a history of bars, reusing cached rows.
+
+        If the cached rows are a prefix of ``timestamps`` only the new bars
+        are computed (incrementally from the cached state); a range that is a
+        prefix of the cache is sliced from it. Anything else is recomputed.
+        """
+        stamps = _ns_array(timestamps)
+        key = (symbol, timeframe, pipeline.hash)
+        with self._lock:
+            entry = self._get(key)
+            if entry is not None:
+                entry.materialise()
+                cached = len(entry.timestamps)
+                if cached and cached >= len(stamps) and np.array_equal(entry.timestamps[:len(stamps)], stamps):
+                    self.hits += 1
+                    return entry.values[:len(stamps)]
+                if cached and np.array_equal(stamps[:cached], entry.timestamps):
+                    self.hits += 1
+                    fields = pipeline.field_arrays(bars)
+                    rows = [
+                        entry.state.update({name: values[i] for name, values in fields.items()})
+                        for i in range(cached, len(stamps))
+                    ]
+                    entry.timestamps = stamps
+                    entry.values = np.vstack([entry.values] + rows)
+                    return entry.values
+
+            self.misses += 1
+            values, state = pipeline.transform_with_state(bars)
+            self._put(key, _CacheEntry(stamps, values, state, [], []))
+            return values
+
+    def update(self, symbol: str, timeframe: str, pipeline: FeaturePipeline,
+               bar: Mapping[str, Any], timestamp: Any) -> np.ndarray:
+        """Features for a completed live bar.
+
+        A bar at or before the last one applied (another strategy sharing the
+        pipeline got there first) returns the current row unchanged. Without
+        a cached history the state starts empty; seed it with
+        :meth:`transform` to avoid a live warm-up.
+        """
+        return self.update_counted(symbol, timeframe, pipeline, bar, timestamp)[0]
+
+    def update_counted(self, symbol: str, timeframe: str, pipeline: FeaturePipeline,
+                       bar: Mapping[str, Any], timestamp: Any) -> Tuple[Optional[np.ndarray], int, bool]:
+        """:meth:`update` plus the number of bars behind the row and whether it is new."""
+        stamp = to_ns(timestamp)
+        key = (symbol, timeframe, pipeline.hash)
+        with self._lock:
+            entry = self._get(key)
+            if entry is None:
+                entry = _CacheEntry(np.empty(0, dtype=np.int64), np.empty((0, len(pipeline))),
+                                    pipeline.stream(), [], [])
+                self._put(key, entry)
+            last = entry.last_timestamp
+            if last is not None and stamp <= last:
+                return entry.latest(), entry.state.count, False
+            row = entry.state.update(bar)
+            entry.new_timestamps.append(stamp)
+            entry.new_rows.append(row)
+            return row, entry.state.count, True
+
+    def latest(self, symbol: str, timeframe: str, pipeline: FeaturePipeline) -> Optional[np.ndarray]:
+        """Most recent row for the symbol, or None before its first bar."""
+        with self._lock:
+            entry = self._entries.get((symbol, timeframe, pipeline.hash))
+            return None if entry is None else entry.latest()
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == symbol]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+feature_cache = FeatureCache()
@@ -0,0 +1,7 @@
+"""Local feature store: offline Parquet partitions and online latest values."""
+
+from .offline import OfflineFeatureStore
+from .online import OnlineFeatureStore
+from .store import FeatureStore
+
+__all__ = ["FeatureStore", "OfflineFeatureStore", "OnlineFeatureStore"]
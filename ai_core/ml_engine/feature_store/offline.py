@@ -0,0 +1,194 @@
+"""Offline side of the feature store: columnar files per symbol and day.
+
+Rows live in ``<FEATURE_STORE_DIR>/<feature set>/<timeframe>/symbol=<S>/date=<YYYY-MM-DD>.parquet``
+(``.npz`` when ``pyarrow`` is unavailable). Each row has the bar
+``timestamp``, the ``available_at`` time from which the row may be used (the
+bar close), and one float column per feature. Writing a day merges with what
+is already stored, replacing values with the same timestamp (but never with
+NaN), and files are
+replaced atomically so readers never see a partial partition.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ai_core.core.logger import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = get_logger(__name__)
+
+TIMESTAMP = "timestamp"
+AVAILABLE_AT = "available_at"
+COMPRESSION = "zstd"
+METADATA_FILE = "features.json"
+
+
+def _extension() -> str:
+    return ".parquet" if pq is not None else ".npz"
+
+
+def _replace(path: str, write) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class OfflineFeatureStore:
+    """Feature rows on disk, partitioned by feature set, timeframe, symbol and date."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _partition_dir(self, feature_set: str, timeframe: str, symbol: str) -> str:
+        return os.path.join(self.directory, feature_set, timeframe, f"symbol={symbol}")
+
+    # -- metadata -------------------------------------------------------------
+
+    def write_metadata(self, feature_set: str, metadata: Dict[str, Any]) -> None:
+        path = os.path.join(self.directory, feature_set, METADATA_FILE)
+        if os.path.exists(path):
+            return
+
+        def write(tmp: str) -> None:
+            with open(tmp, "w") as f:
+                json.dump(metadata, f, indent=2, default=str)
+
+        _replace(path, write)
+
+    def feature_sets(self) -> List[Dict[str, Any]]:
+        """Metadata of every stored feature set."""
+        if not os.path.isdir(self.directory):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name, METADATA_FILE)
+            if os.path.exists(path):
+                with open(path) as f:
+                    result.append(json.load(f))
+        return result
+
+    def dates(self, feature_set: str, symbol: str, timeframe: str) -> List[date]:
+        directory = self._partition_dir(feature_set, timeframe, symbol)
+        if not os.path.isdir(directory):
+            return []
+        found = []
+        for name in os.listdir(directory):
+            stem, extension = os.path.splitext(name)
+            if stem.startswith("date=") and extension in (".parquet", ".npz"):
+                found.append(date.fromisoformat(stem[5:]))
+        return sorted(found)
+
+    # -- rows -----------------------------------------------------------------
+
+    def write(self, feature_set: str, columns: Sequence[str], symbol: str, timeframe: str,
+              timestamps: np.ndarray, available_at: np.ndarray, values: np.ndarray) -> int:
+        """Store rows (``datetime64`` timestamps, ``T x F`` values); returns rows written."""
+        timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+        if not len(timestamps):
+            return 0
+        available_at = np.asarray(available_at, dtype="datetime64[ns]")
+        values = np.asarray(values, dtype=np.float64)
+        days = timestamps.astype("datetime64[D]")
+        for day in np.unique(days):
+            rows = days == day
+            frame = pd.DataFrame(values[rows], columns=list(columns))
+            frame.insert(0, AVAILABLE_AT, available_at[rows])
+            frame.insert(0, TIMESTAMP, timestamps[rows])
+            self._merge_day(feature_set, symbol, timeframe, day.item(), frame)
+        logger.debug(f"Stored {len(timestamps)} {feature_set} feature rows for {symbol} {timeframe}")
+        return len(timestamps)
+
+    def _merge_day(self, feature_set: str, symbol: str, timeframe: str, day: date, frame: pd.DataFrame) -> None:
+        directory = self._partition_dir(feature_set, timeframe, symbol)
+        frame = frame.drop_duplicates(TIMESTAMP, keep="last")
+        existing = self._read_day(directory, day)
+        if existing is not None:
+            # New values win, but a NaN never replaces a stored value
+            merged = frame.set_index(TIMESTAMP).combine_first(existing.drop_duplicates(TIMESTAMP).set_index(TIMESTAMP))
+            frame = merged[list(frame.columns.drop(TIMESTAMP))].reset_index()
+        frame = frame.sort_values(TIMESTAMP, ignore_index=True)
+        # Drop a stale file in the other format so one day has one partition
+        for extension in (".parquet", ".npz"):
+            other = os.path.join(directory, f"date={day.isoformat()}{extension}")
+            if extension != _extension() and os.path.exists(other):
+                os.remove(other)
+        _replace(os.path.join(directory, f"date={day.isoformat()}{_extension()}"), lambda tmp: self._write_file(tmp, frame))
+
+    @staticmethod
+    def _write_file(path: str, frame: pd.DataFrame) -> None:
+        if pq is not None:
+            pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), path, compression=COMPRESSION)
+            return
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                columns=np.array([c for c in frame.columns if c not in (TIMESTAMP, AVAILABLE_AT)]),
+                timestamp=frame[TIMESTAMP].to_numpy(dtype="datetime64[ns]"),
+                available_at=frame[AVAILABLE_AT].to_numpy(dtype="datetime64[ns]"),
+                values=frame.drop(columns=[TIMESTAMP, AVAILABLE_AT]).to_numpy(dtype=np.float64),
+            )
+
+    def _read_day(self, directory: str, day: date, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        stem = os.path.join(directory, f"date={day.isoformat()}")
+        if os.path.exists(stem + ".parquet"):
+            if pq is None:
+                raise RuntimeError("pyarrow is required to read Parquet feature partitions")
+            selected = None if columns is None else [TIMESTAMP, AVAILABLE_AT] + list(columns)
+            return pq.read_table(stem + ".parquet", columns=selected).to_pandas()
+        if os.path.exists(stem + ".npz"):
+            with np.load(stem + ".npz") as data:
+                frame = pd.DataFrame(data["values"], columns=[str(c) for c in data["columns"]])
+                frame.insert(0, AVAILABLE_AT, data["available_at"])
+                frame.insert(0, TIMESTAMP, data["timestamp"])
+            if columns is not None:
+                frame = frame[[TIMESTAMP, AVAILABLE_AT] + list(columns)]
+            return frame
+        return None
+
+    def read(self, feature_set: str, symbol: str, timeframe: str, start: Optional[datetime] = None,
+             end: Optional[datetime] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Rows with ``start <= timestamp < end``, sorted by timestamp.
+
+        Only the day partitions overlapping the range are opened.
+        """
+        directory = self._partition_dir(feature_set, timeframe, symbol)
+        first = pd.Timestamp(start).date() if start is not None else None
+        last = pd.Timestamp(end).date() if end is not None else None
+        frames = []
+        for day in self.dates(feature_set, symbol, timeframe):
+            if (first is not None and day < first) or (last is not None and day > last):
+                continue
+            frame = self._read_day(directory, day, columns)
+            if frame is not None:
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=[TIMESTAMP, AVAILABLE_AT] + list(columns or []))
+        frame = pd.concat(frames, ignore_index=True)
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= (frame[TIMESTAMP] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (frame[TIMESTAMP] < pd.Timestamp(end)).to_numpy()
+        return frame[mask].reset_index(drop=True)
@@ -0,0 +1,86 @@
+"""Online side of the feature store: latest feature row per symbol in memory.
+
+Live bars update one row per ``(feature set, timeframe, symbol)``; models and
+API readers fetch the current vector without touching disk. Rows accepted
+since the last :meth:`OnlineFeatureStore.drain` are kept so the offline side
+can persist them in batches instead of writing a file per bar.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Key = Tuple[str, str, str]  # (feature set, timeframe, symbol)
+
+
+class OnlineFeatureStore:
+    """Latest-value map with a write-behind buffer."""
+
+    def __init__(self):
+        self._latest: Dict[Key, Tuple[int, np.ndarray]] = {}
+        self._pending: Dict[Key, List[Tuple[int, np.ndarray]]] = {}
+        self._columns: Dict[str, Sequence[str]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, feature_set: str, columns: Sequence[str], timeframe: str, symbol: str,
+            timestamp_ns: int, row: np.ndarray, persist: bool = True) -> bool:
+        """Record a row; rows not newer than the current one are ignored.
+
+        ``persist=False`` serves the row without queueing it for the offline
+        side (warm-up rows).
+        """
+        key = (feature_set, timeframe, symbol)
+        with self._lock:
+            current = self._latest.get(key)
+            if current is not None and timestamp_ns <= current[0]:
+                return False
+            self._columns[feature_set] = columns
+            self._latest[key] = (timestamp_ns, row)
+            if persist:
+                self._pending.setdefault(key, []).append((timestamp_ns, row))
+            return True
+
+    def get(self, feature_set: str, timeframe: str, symbol: str) -> Optional[Tuple[int, np.ndarray]]:
+        """``(timestamp ns, row)`` of the latest row, or None."""
+        with self._lock:
+            return self._latest.get((feature_set, timeframe, symbol))
+
+    def get_dict(self, feature_set: str, timeframe: str, symbol: str) -> Optional[Dict[str, float]]:
+        with self._lock:
+            current = self._latest.get((feature_set, timeframe, symbol))
+            columns = self._columns.get(feature_set)
+        if current is None:
+            return None
+        return dict(zip(columns, (float(v) for v in current[1])))
+
+    def get_many(self, feature_set: str, timeframe: str, symbols: Iterable[str], width: int) -> np.ndarray:
+        """``S x F`` latest rows, NaN for symbols without one."""
+        symbols = list(symbols)
+        out = np.full((len(symbols), width), np.nan)
+        with self._lock:
+            for i, symbol in enumerate(symbols):
+                current = self._latest.get((feature_set, timeframe, symbol))
+                if current is not None:
+                    out[i] = current[1]
+        return out
+
+    def keys(self) -> List[Key]:
+        with self._lock:
+            return list(self._latest)
+
+    def columns(self, feature_set: str) -> Optional[Sequence[str]]:
+        with self._lock:
+            return self._columns.get(feature_set)
+
+    def drain(self) -> Dict[Key, List[Tuple[int, np.ndarray]]]:
+        """Take the rows accepted since the previous drain."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def pending_rows(self) -> int:
+        with self._lock:
+            return sum(len(rows) for rows in self._pending.values())
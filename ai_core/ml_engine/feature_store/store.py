@@ -0,0 +1,258 @@
+"""Local feature store combining the offline and online sides.
+
+Feature sets are identified by :attr:`FeaturePipeline.hash`, so two models
+declaring the same features share stored rows regardless of what they call
+them. Rows are keyed by bar ``timestamp`` (bar start) and become usable at
+``available_at`` (bar close); point-in-time joins only ever attach rows whose
+``available_at`` is at or before the entity's timestamp, which keeps
+training sets free of look-ahead.
+
+Typical uses::
+
+    store = get_feature_store()
+    store.write_history("EURUSD", "1m", pipeline, frame.index, frame)       # backfill
+    train = store.point_in_time_join(labels, pipeline, "1m")                # training set
+    values = store.materialize("EURUSD", "1m", pipeline, timestamps, bars)  # backtests
+    row = store.ingest("EURUSD", "1m", pipeline, bar, bar["bar_start"])     # live
+"""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ai_core.core.config import settings
+from ai_core.core.logger import get_logger
+from ai_core.ml_engine.feature_engineering import FeatureCache, FeaturePipeline, feature_cache
+from ai_core.ml_engine.feature_engineering.pipeline import to_ns
+from ai_core.strategy_engine.market_data.event_bus import TIMEFRAME_SECONDS
+
+from .offline import AVAILABLE_AT, TIMESTAMP, OfflineFeatureStore
+from .online import OnlineFeatureStore
+
+logger = get_logger(__name__)
+
+FeatureSet = Union[FeaturePipeline, str]
+
+
+def bar_duration_ns(timeframe: str) -> int:
+    return TIMEFRAME_SECONDS.get(timeframe, 0) * 1_000_000_000
+
+
+def _warmup(pipeline: FeaturePipeline) -> int:
+    return int(pipeline.warmup.max()) if len(pipeline) else 0
+
+
+class FeatureStore:
+    """Offline Parquet history plus online latest values for feature pipelines."""
+
+    def __init__(self, directory: Optional[str] = None, cache: Optional[FeatureCache] = None):
+        self.offline = OfflineFeatureStore(directory or settings.feature_store_dir)
+        self.online = OnlineFeatureStore()
+        self.cache = cache or feature_cache
+        self._pipelines: Dict[str, FeaturePipeline] = {}
+        self._registered: set = set()
+        self._flush_lock = threading.Lock()
+
+    def register(self, pipeline: FeaturePipeline) -> str:
+        """Record a pipeline's definition next to its rows; returns the feature set id."""
+        if pipeline.hash not in self._registered:
+            self.offline.write_metadata(pipeline.hash, {
+                "feature_set": pipeline.hash,
+                "columns": pipeline.columns,
+                "definitions": [repr(feature) for feature in pipeline.features],
+                "warmup": _warmup(pipeline),
+                "created_at": datetime.utcnow().isoformat(),
+            })
+            self._registered.add(pipeline.hash)
+            self._pipelines.setdefault(pipeline.hash, pipeline)
+        return pipeline.hash
+
+    def _resolve(self, feature_set: FeatureSet) -> Tuple[str, List[str]]:
+        if isinstance(feature_set, FeaturePipeline):
+            return self.register(feature_set), list(feature_set.columns)
+        columns = self.online.columns(feature_set)
+        if columns is None:
+            metadata = next((meta for meta in self.offline.feature_sets() if meta["feature_set"] == feature_set), None)
+            if metadata is None:
+                raise KeyError(f"Unknown feature set: {feature_set}")
+            columns = metadata["columns"]
+        return feature_set, list(columns)
+
+    # -- live -----------------------------------------------------------------
+
+    def ingest(self, symbol: str, timeframe: str, pipeline: FeaturePipeline,
+               bar: Dict[str, Any], timestamp: Any) -> np.ndarray:
+        """Features for a completed live bar, published to the online side.
+
+        Not blocking: rows reach disk on the next :meth:`flush`, except
+        warm-up rows (fewer bars behind them than the pipeline's warm-up),
+        which are served but never stored. :meth:`seed` the symbol from
+        history first to skip the warm-up.
+        """
+        row, count, new = self.cache.update_counted(symbol, timeframe, pipeline, bar, timestamp)
+        if new:
+            self._pipelines.setdefault(pipeline.hash, pipeline)
+            self.online.put(pipeline.hash, pipeline.columns, timeframe, symbol, to_ns(timestamp), row,
+                            persist=count > _warmup(pipeline))
+        return row
+
+    def seed(self, symbol: str, timeframe: str, pipeline: FeaturePipeline,
+             timestamps: Any, bars: Any) -> None:
+        """Position the live state after a history of completed bars (blocking).
+
+        Later :meth:`ingest` calls continue from the last bar of the history;
+        its rows are stored like :meth:`write_history` and the last one is
+        served online until the next live bar.
+        """
+        stamps = np.asarray(timestamps, dtype="datetime64[ns]")
+        if not len(stamps):
+            return
+        values = self.cache.transform(symbol, timeframe, pipeline, stamps, bars)
+        self._store_history(symbol, timeframe, pipeline, stamps, values)
+        self._pipelines.setdefault(pipeline.hash, pipeline)
+        self.online.put(pipeline.hash, pipeline.columns, timeframe, symbol,
+                        int(stamps[-1].astype(np.int64)), values[-1], persist=False)
+
+    def latest(self, symbol: str, timeframe: str, feature_set: FeatureSet) -> Optional[np.ndarray]:
+        key = feature_set.hash if isinstance(feature_set, FeaturePipeline) else feature_set
+        current = self.online.get(key, timeframe, symbol)
+        return None if current is None else current[1]
+
+    def flush(self) -> int:
+        """Write rows ingested since the last flush to the offline side (blocking)."""
+        written = 0
+        with self._flush_lock:
+            for (feature_set, timeframe, symbol), rows in self.online.drain().items():
+                pipeline = self._pipelines[feature_set]
+                stamps = np.array([stamp for stamp, _ in rows], dtype=np.int64)
+                try:
+                    self.register(pipeline)
+                    written += self.offline.write(
+                        feature_set, pipeline.columns, symbol, timeframe,
+                        stamps.astype("datetime64[ns]"),
+                        (stamps + bar_duration_ns(timeframe)).astype("datetime64[ns]"),
+                        np.vstack([row for _, row in rows]),
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to persist {len(rows)} feature rows for {symbol} {timeframe}: {e}")
+        return written
+
+    # -- history --------------------------------------------------------------
+
+    def write_history(self, symbol: str, timeframe: str, pipeline: FeaturePipeline,
+                      timestamps: Any, bars: Any) -> np.ndarray:
+        """Compute features over a history of bars and store them.
+
+        Warm-up rows are returned (NaN where windows are not full yet) but not
+        stored, so they never shadow rows computed with more history. The
+        live feature cache is not touched: backfills and backtests never move
+        the state live bars continue from (see :meth:`seed`).
+        """
+        stamps = np.asarray(timestamps, dtype="datetime64[ns]")
+        values = pipeline.transform(bars)
+        self._store_history(symbol, timeframe, pipeline, stamps, values)
+        return values
+
+    def _store_history(self, symbol: str, timeframe: str, pipeline: FeaturePipeline,
+                       stamps: np.ndarray, values: np.ndarray) -> None:
+        warmup = min(_warmup(pipeline), len(stamps))
+        self.register(pipeline)
+        self.offline.write(
+            pipeline.hash, pipeline.columns, symbol, timeframe,
+            stamps[warmup:], stamps[warmup:] + np.timedelta64(bar_duration_ns(timeframe), "ns"), values[warmup:],
+        )
+
+    def materialize(self, symbol: str, timeframe: str, pipeline: FeaturePipeline,
+                    timestamps: Any, bars: Any) -> np.ndarray:
+        """``T x F`` features for ``timestamps``, read from the store when it covers them.
+
+        Only when stored rows are missing past the warm-up is the history
+        recomputed (and stored). Warm-up rows take stored values when another
+        run computed them with more history.
+        """
+        stamps = np.asarray(timestamps, dtype="datetime64[ns]")
+        if not len(stamps):
+            return np.empty((0, len(pipeline)))
+        stored = self.offline.read(pipeline.hash, symbol, timeframe, stamps[0],
+                                   stamps[-1] + np.timedelta64(1, "ns"), columns=pipeline.columns)
+        stored_stamps = stored[TIMESTAMP].to_numpy(dtype="datetime64[ns]")
+        positions = np.minimum(np.searchsorted(stored_stamps, stamps), max(len(stored_stamps) - 1, 0))
+        found = (stored_stamps[positions] == stamps) if len(stored_stamps) else np.zeros(len(stamps), dtype=bool)
+        if found.any():
+            # Rows that are entirely NaN (warm-up rows stored by older versions) do not count
+            stored_values = stored[pipeline.columns].to_numpy(dtype=np.float64)
+            found &= ~np.isnan(stored_values[positions]).all(axis=1)
+        warmup = min(_warmup(pipeline), len(stamps))
+
+        if found[warmup:].all():
+            values = np.full((len(stamps), len(pipeline)), np.nan)
+            if not found[:warmup].all():
+                head = {name: array[:warmup] for name, array in pipeline.field_arrays(bars).items()}
+                values[:warmup] = pipeline.transform(head)
+        else:
+            values = self.write_history(symbol, timeframe, pipeline, stamps, bars).copy()
+        if found.any():
+            values[found] = stored_values[positions[found]]
+        return values
+
+    # -- reads ----------------------------------------------------------------
+
+    def read(self, feature_set: FeatureSet, symbols: Iterable[str], timeframe: str,
+             start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """Stored rows per symbol in ``[start, end)``, indexed by bar timestamp."""
+        key, columns = self._resolve(feature_set)
+        result = {}
+        for symbol in symbols:
+            frame = self.offline.read(key, symbol, timeframe, start, end, columns=columns)
+            result[symbol] = frame.set_index(TIMESTAMP)
+        return result
+
+    def point_in_time_join(self, entities: pd.DataFrame, feature_set: FeatureSet, timeframe: str,
+                           tolerance: Optional[timedelta] = None, prefix: str = "",
+                           symbol_column: str = "symbol", time_column: str = "timestamp") -> pd.DataFrame:
+        """Attach to each entity row the latest features available at its timestamp.
+
+        ``entities`` has one row per (symbol, timestamp) to build, e.g. labels.
+        A feature row qualifies if ``available_at <= timestamp`` (and, with
+        ``tolerance``, is not older than that). Adds ``<prefix>available_at``
+        with the time the attached row became available; unmatched rows get
+        NaN features.
+        """
+        key, columns = self._resolve(feature_set)
+        names = [f"{prefix}{column}" for column in columns] + [f"{prefix}{AVAILABLE_AT}"]
+        clashes = [name for name in names if name in entities.columns]
+        if clashes:
+            raise ValueError(f"Entity columns clash with features (use prefix=): {clashes}")
+
+        times = pd.to_datetime(entities[time_column]).to_numpy(dtype="datetime64[ns]")
+        values = np.full((len(entities), len(columns)), np.nan)
+        available = np.full(len(entities), np.datetime64("NaT"), dtype="datetime64[ns]")
+        duration = np.timedelta64(bar_duration_ns(timeframe), "ns")
+
+        symbols = entities[symbol_column].to_numpy()
+        for symbol in pd.unique(symbols):
+            rows = np.flatnonzero(symbols == symbol)
+            wanted = times[rows]
+            start = None if tolerance is None else wanted.min() - np.timedelta64(tolerance) - duration
+            stored = self.offline.read(key, symbol, timeframe, start, wanted.max() + np.timedelta64(1, "ns"),
+                                       columns=columns)
+            if stored.empty:
+                continue
+            stored_available = stored[AVAILABLE_AT].to_numpy(dtype="datetime64[ns]")
+            match = np.searchsorted(stored_available, wanted, side="right") - 1
+            ok = match >= 0
+            if tolerance is not None:
+                ok &= wanted - stored_available[np.maximum(match, 0)] <= np.timedelta64(tolerance)
+            values[rows[ok]] = stored[columns].to_numpy(dtype=np.float64)[match[ok]]
+            available[rows[ok]] = stored_available[match[ok]]
+
+        joined = entities.copy()
+        for i, name in enumerate(names[:-1]):
+            joined[name] = values[:, i]
+        joined[names[-1]] = available
+        return joined
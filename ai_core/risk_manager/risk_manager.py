@@ -2,9 +2,10 @@ from typing import Dict, List, Any
 from datetime import datetime, timedelta
 
 from ai_core.core.logger import get_logger
+from ai_core.core.metrics import RISK_CHECK_LATENCY, timed
 from ai_core.database.models import Trade, Strategy, AccountSnapshot
-from ai_core.database.database import SessionLocal
-import numpy as np
+from ai_core.database.database import SessionLocal, AsyncSessionLocal
+from sqlalchemy import select
 
 logger = get_logger(__name__)
 
@@ -17,6 +18,7 @@ class RiskManager:
         self.max_correlation_exposure = 0.15  # 15% max correlated exposure
         self.max_drawdown_limit = 0.20  # 20% max drawdown
         
+    @timed(RISK_CHECK_LATENCY)
     def assess_trade_risk(self, symbol: str, action: str, quantity: float, 
                          entry_price: float, account_value: float) -> Dict[str, Any]:
         """Assess risk for a potential trade"""
@@ -112,6 +114,7 @@ class RiskManager:
             'position_size_percent': (final_quantity * entry_price) / account_value
         }
     
+    @timed(RISK_CHECK_LATENCY)
     def assess_portfolio_risk(self) -> Dict[str, Any]:
         """Assess overall portfolio risk"""
         db = SessionLocal()
@@ -119,65 +122,84 @@ class RiskManager:
             # Get open positions
             open_trades = db.query(Trade).filter(Trade.status == 'OPEN').all()
             
-            total_exposure = 0
-            symbol_exposures = {}
-            currency_exposures = {}
-            
-            for trade in open_trades:
-                exposure = trade.quantity * trade.entry_price
-                total_exposure += exposure
-                
-                # Symbol exposure
-                if trade.symbol not in symbol_exposures:
-                    symbol_exposures[trade.symbol] = 0
-                symbol_exposures[trade.symbol] += exposure
-                
-                # Currency exposure (simplified)
-                base_currency = trade.symbol[:3] if len(trade.symbol) == 6 else 'USD'
-                if base_currency not in currency_exposures:
-                    currency_exposures[base_currency] = 0
-                currency_exposures[base_currency] += exposure
-            
             # Get latest account snapshot
             latest_snapshot = db.query(AccountSnapshot).order_by(
                 AccountSnapshot.timestamp.desc()
             ).first()
             
             account_value = latest_snapshot.total_equity if latest_snapshot else 100000
+            return self._build_portfolio_risk(open_trades, account_value)
             
-            # Calculate risk metrics
-            portfolio_risk = {
-                'total_exposure': total_exposure,
-                'exposure_ratio': total_exposure / account_value if account_value > 0 else 0,
-                'open_positions': len(open_trades),
-                'symbol_exposures': symbol_exposures,
-                'currency_exposures': currency_exposures,
-                'risk_level': 0.0,
-                'warnings': []
-            }
-            
-            # Risk level calculation
-            if portfolio_risk['exposure_ratio'] > 0.8:
-                portfolio_risk['risk_level'] = 0.9
-                portfolio_risk['warnings'].append('Very high portfolio exposure')
-            elif portfolio_risk['exposure_ratio'] > 0.5:
-                portfolio_risk['risk_level'] = 0.6
-                portfolio_risk['warnings'].append('High portfolio exposure')
-            elif portfolio_risk['exposure_ratio'] > 0.3:
-                portfolio_risk['risk_level'] = 0.4
-            else:
-                portfolio_risk['risk_level'] = 0.2
+        finally:
+            db.close()
+    
+    @timed(RISK_CHECK_LATENCY)
+    async def assess_portfolio_risk_async(self) -> Dict[str, Any]:
+        """Assess overall portfolio risk without blocking the event loop"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Trade).where(Trade.status == 'OPEN'))
+            open_trades = result.scalars().all()
             
-            # Check concentration risk
-            max_symbol_exposure = max(symbol_exposures.values()) if symbol_exposures else 0
-            if max_symbol_exposure / account_value > 0.1:  # 10% concentration limit
-                portfolio_risk['warnings'].append('High concentration risk detected')
-                portfolio_risk['risk_level'] += 0.2
+            latest_equity = await db.scalar(
+                select(AccountSnapshot.total_equity)
+                .order_by(AccountSnapshot.timestamp.desc())
+                .limit(1)
+            )
+        
+        account_value = latest_equity if latest_equity is not None else 100000
+        return self._build_portfolio_risk(open_trades, account_value)
+    
+    def _build_portfolio_risk(self, open_trades: List[Trade], account_value: float) -> Dict[str, Any]:
+        """Compute portfolio risk metrics from open trades"""
+        total_exposure = 0
+        symbol_exposures = {}
+        currency_exposures = {}
+        
+        for trade in open_trades:
+            exposure = trade.quantity * trade.entry_price
+            total_exposure += exposure
             
-            return portfolio_risk
+            # Symbol exposure
+            if trade.symbol not in symbol_exposures:
+                symbol_exposures[trade.symbol] = 0
+            symbol_exposures[trade.symbol] += exposure
             
-        finally:
-            db.close()
+            # Currency exposure (simplified)
+            base_currency = trade.symbol[:3] if len(trade.symbol) == 6 else 'USD'
+            if base_currency not in currency_exposures:
+                currency_exposures[base_currency] = 0
+            currency_exposures[base_currency] += exposure
+        
+        # Calculate risk metrics
+        portfolio_risk = {
+            'total_exposure': total_exposure,
+            'exposure_ratio': total_exposure / account_value if account_value > 0 else 0,
+            'open_positions': len(open_trades),
+            'symbol_exposures': symbol_exposures,
+            'currency_exposures': currency_exposures,
+            'risk_level': 0.0,
+            'warnings': []
+        }
+        
+        # Risk level calculation
+        if portfolio_risk['exposure_ratio'] > 0.8:
+            portfolio_risk['risk_level'] = 0.9
+            portfolio_risk['warnings'].append('Very high portfolio exposure')
+        elif portfolio_risk['exposure_ratio'] > 0.5:
+            portfolio_risk['risk_level'] = 0.6
+            portfolio_risk['warnings'].append('High portfolio exposure')
+        elif portfolio_risk['exposure_ratio'] > 0.3:
+            portfolio_risk['risk_level'] = 0.4
+        else:
+            portfolio_risk['risk_level'] = 0.2
+        
+        # Check concentration risk
+        max_symbol_exposure = max(symbol_exposures.values()) if symbol_exposures else 0
+        if max_symbol_exposure / account_value > 0.1:  # 10% concentration limit
+            portfolio_risk['warnings'].append('High concentration risk detected')
+            portfolio_risk['risk_level'] += 0.2
+        
+        return portfolio_risk
     
     def _get_daily_pnl(self) -> float:
         """Get today's PnL"""
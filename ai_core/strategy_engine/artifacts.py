@@ -0,0 +1,139 @@
+"""Content-addressed strategy artifacts.
+
+Uploaded strategy files (Python scripts, C++ binaries, pickled models) are
+stored as ``<STRATEGY_ARTIFACT_DIR>/strategy_<id>/<version><ext>`` where the
+version is a prefix of the file's SHA-256. A file is never overwritten once
+written, so an instance that is still serving keeps reading the bytes it was
+built from, ``Strategy.file_path`` identifies exactly one build, and rolling
+back is pointing ``file_path`` at an older version.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import IO, TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from ai_core.core.config import settings
+
+if TYPE_CHECKING:
+    from ai_core.database.models import Strategy
+
+VERSION_LENGTH = 16  # hex characters of the SHA-256 kept in the file name
+CHUNK_SIZE = 1 << 20
+EXECUTABLE_EXTENSIONS = ("", ".bin", ".exe", ".out")
+
+_VERSION_NAME = re.compile(rf"^([0-9a-f]{{{VERSION_LENGTH}}})(\.[^/]*)?$")
+
+
+@dataclass
+class ArtifactVersion:
+    strategy_id: int
+    version: str
+    file_path: str
+    size: int
+    created_at: float
+
+    def to_dict(self, current_path: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "file_path": self.file_path,
+            "size": self.size,
+            "created_at": datetime.fromtimestamp(self.created_at).isoformat(),
+            "current": current_path is not None and os.path.abspath(current_path) == os.path.abspath(self.file_path),
+        }
+
+
+def strategy_dir(strategy_id: int) -> str:
+    return os.path.join(settings.strategy_artifact_dir, f"strategy_{strategy_id}")
+
+
+def artifact_version(file_path: Optional[str]) -> Optional[str]:
+    """Version encoded in a stored artifact's name, or None for legacy paths."""
+    if not file_path:
+        return None
+    match = _VERSION_NAME.match(os.path.basename(file_path))
+    return match.group(1) if match else None
+
+
+def fingerprint(strategy: "Strategy", file_path: Optional[str] = None) -> Tuple[str, str]:
+    """What an instance was built from: artifact path and parameters."""
+    parameters = json.dumps(strategy.parameters or {}, sort_keys=True, default=str)
+    return (file_path or strategy.file_path or "", parameters)
+
+
+def store_artifact(strategy_id: int, source: IO[bytes], filename: str) -> ArtifactVersion:
+    """Copy ``source`` into the artifact store, hashing it on the way.
+
+    Blocking; call from a worker thread. Uploading identical content twice
+    returns the existing version.
+    """
+    directory = strategy_dir(strategy_id)
+    os.makedirs(directory, exist_ok=True)
+    extension = os.path.splitext(filename or "")[1].lower()
+
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                buffer.write(chunk)
+
+        version = digest.hexdigest()[:VERSION_LENGTH]
+        file_path = os.path.join(directory, f"{version}{extension}")
+        if os.path.exists(file_path):
+            os.remove(temp_path)
+            os.utime(file_path)  # re-uploaded: list it as the newest version
+        else:
+            # mkstemp creates 0600; C++ strategy binaries are executed directly
+            os.chmod(temp_path, 0o755 if extension in EXECUTABLE_EXTENSIONS else 0o644)
+            os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return _describe(strategy_id, file_path)
+
+
+def _describe(strategy_id: int, file_path: str) -> ArtifactVersion:
+    stat = os.stat(file_path)
+    return ArtifactVersion(
+        strategy_id=strategy_id,
+        version=artifact_version(file_path),
+        file_path=file_path,
+        size=stat.st_size,
+        created_at=stat.st_mtime,
+    )
+
+
+def list_versions(strategy_id: int) -> List[ArtifactVersion]:
+    """Stored versions of a strategy, newest first."""
+    directory = strategy_dir(strategy_id)
+    if not os.path.isdir(directory):
+        return []
+    versions = [
+        _describe(strategy_id, os.path.join(directory, name))
+        for name in os.listdir(directory)
+        if _VERSION_NAME.match(name)
+    ]
+    versions.sort(key=lambda artifact: artifact.created_at, reverse=True)
+    return versions
+
+
+def find_version(strategy_id: int, version: str) -> Optional[ArtifactVersion]:
+    return next((artifact for artifact in list_versions(strategy_id) if artifact.version == version), None)
+
+
+def remove_artifacts(strategy_id: int) -> None:
+    shutil.rmtree(strategy_dir(strategy_id), ignore_errors=True)
@@ -3,7 +3,7 @@ import threading
 import queue
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from ibapi.client import EClient
 from ibapi.wrapper import EWrapper
 from ibapi.contract import Contract
@@ -23,6 +23,8 @@ class IBKRWrapper(EWrapper):
         self.positions = {}
         self.account_data = {}
         self.orders = {}
+        # Optional callback invoked from the IB thread on every price tick
+        self.tick_listener: Optional[Callable[[str, Dict[str, Any]], None]] = None
         
     def error(self, reqId, errorCode, errorString, advancedOrderRejectJson=""):
         logger.error(f"IBKR Error - ReqId: {reqId}, Code: {errorCode}, Msg: {errorString}")
@@ -46,12 +48,18 @@ class IBKRWrapper(EWrapper):
                 self.market_data[symbol]['ask'] - self.market_data[symbol]['bid']
             )
         
+        timestamp = datetime.now().isoformat()
+        self.market_data[symbol]['timestamp'] = timestamp
+        
+        if self.tick_listener is not None:
+            self.tick_listener(symbol, self.market_data[symbol].copy())
+        
         # Queue update for broadcasting
         self.data_queue.put({
             'type': 'tick_price',
             'symbol': symbol,
             'data': self.market_data[symbol].copy(),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': timestamp
         })
     
     def tickSize(self, reqId, tickType, size):
@@ -170,6 +178,15 @@ class IBKRService(BaseBroker):
         """Check if connected to IB"""
         return self.connected and self.client.isConnected()
     
+    def attach_event_bus(self, bus) -> None:
+        """Forward price ticks from the IB thread onto ``bus`` in the running loop"""
+        loop = asyncio.get_running_loop()
+        
+        def forward(symbol: str, data: Dict[str, Any]) -> None:
+            loop.call_soon_threadsafe(bus.publish_tick, symbol, data)
+        
+        self.wrapper.tick_listener = forward
+    
     async def subscribe_market_data(self, symbols: List[str]):
         """Subscribe to real-time market data"""
         if not self.is_connected():
@@ -0,0 +1,262 @@
+"""In-process market event bus.
+
+The market-data layer publishes ticks here; the bus aggregates them into bars
+and pushes tick and bar-close events to bounded per-subscriber queues keyed by
+``(symbol, timeframe)``. Consumers only wake up when something they subscribed
+to actually changed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ai_core.core.config import settings
+from ai_core.core.logger import get_logger
+from ai_core.core.metrics import INGEST_LATENCY, QUEUE_DROPPED
+
+if TYPE_CHECKING:
+    from .shared_snapshot import SnapshotWriter
+
+logger = get_logger(__name__)
+
+TICK = "tick"
+
+TIMEFRAME_SECONDS: Dict[str, int] = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "1h": 3600,
+    "4h": 14400,
+    "1d": 86400,
+}
+
+
+def normalize_timeframe(timeframe: str) -> str:
+    """Return the canonical (lower-case) timeframe name or raise ``ValueError``."""
+
+    tf = timeframe.strip().lower()
+    if tf != TICK and tf not in TIMEFRAME_SECONDS:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return tf
+
+
+def _to_epoch(value: Any) -> float:
+    """Convert an ISO string, datetime or number into epoch seconds."""
+
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+@dataclass(slots=True)
+class MarketEvent:
+    """A tick or a closed bar for a single symbol."""
+
+    kind: str  # 'tick' or 'bar'
+    symbol: str
+    timeframe: str  # 'tick' for ticks, e.g. '1m' for bar closes
+    data: Dict[str, Any]
+    timestamp: float
+
+
+class Subscription:
+    """Bounded event queue for one consumer.
+
+    When the consumer falls behind, the oldest queued event is discarded so a
+    slow subscriber never blocks the publisher or other subscribers.
+    """
+
+    def __init__(self, bus: "MarketEventBus", symbols: Optional[Iterable[str]],
+                 timeframes: Iterable[str], maxsize: int):
+        self.symbols = frozenset(symbols) if symbols else None
+        self.timeframes = frozenset(normalize_timeframe(tf) for tf in timeframes)
+        self.queue: asyncio.Queue[MarketEvent] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._bus = bus
+
+    def offer(self, event: MarketEvent) -> None:
+        """Enqueue without blocking, dropping the oldest event if full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            QUEUE_DROPPED.inc()
+        self.queue.put_nowait(event)
+
+    async def get(self) -> MarketEvent:
+        """Wait for the next event."""
+        return await self.queue.get()
+
+    async def get_batch(self, max_items: int, timeout: float = 0.0) -> List[MarketEvent]:
+        """Wait for at least one event, then collect up to ``max_items``.
+
+        Events already queued are drained immediately; if ``timeout`` is
+        positive the call lingers up to that many seconds to fill the batch.
+        """
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while len(batch) < max_items:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def close(self) -> None:
+        """Detach from the bus."""
+        self._bus.unsubscribe(self)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> MarketEvent:
+        return await self.queue.get()
+
+
+class MarketEventBus:
+    """Fan market events out to the subscribers interested in them."""
+
+    def __init__(self, timeframes: Optional[Iterable[str]] = None, queue_size: Optional[int] = None):
+        normalized = (normalize_timeframe(tf) for tf in (timeframes or settings.bar_timeframes))
+        self.timeframes: Tuple[str, ...] = tuple(tf for tf in normalized if tf != TICK)
+        self.queue_size = queue_size or settings.signal_queue_size
+        self._routes: Dict[Tuple[Optional[str], str], Set[Subscription]] = defaultdict(set)
+        self._bars: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._shared: Optional["SnapshotWriter"] = None
+
+    def share_snapshot(self, writer: Optional["SnapshotWriter"]) -> None:
+        """Mirror every tick and current bar into shared memory (None to stop)."""
+        if writer is not None and tuple(writer.timeframes) != self.timeframes:
+            raise ValueError("Snapshot writer timeframes must match the bus timeframes")
+        self._shared = writer
+
+    # -- subscriptions -----------------------------------------------------
+
+    def subscribe(self, symbols: Optional[Iterable[str]] = None,
+                  timeframes: Iterable[str] = (TICK,),
+                  maxsize: Optional[int] = None) -> Subscription:
+        """Subscribe to events for ``symbols`` (all symbols if None) and timeframes."""
+        subscription = Subscription(self, symbols, timeframes, maxsize or self.queue_size)
+        for key in self._keys(subscription):
+            self._routes[key].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription; pending events stay readable."""
+        subscription.closed = True
+        for key in self._keys(subscription):
+            routes = self._routes.get(key)
+            if routes is not None:
+                routes.discard(subscription)
+                if not routes:
+                    del self._routes[key]
+
+    @staticmethod
+    def _keys(subscription: Subscription) -> List[Tuple[Optional[str], str]]:
+        symbols = subscription.symbols or (None,)
+        return [(symbol, tf) for symbol in symbols for tf in subscription.timeframes]
+
+    def max_queue_depth(self) -> int:
+        """Deepest subscriber queue, for monitoring backlog."""
+        return max((sub.queue.qsize() for subs in self._routes.values() for sub in subs), default=0)
+
+    def subscriber_count(self) -> int:
+        """Number of distinct live subscriptions."""
+        return len({sub for subs in self._routes.values() for sub in subs})
+
+    # -- publishing --------------------------------------------------------
+
+    def publish_tick(self, symbol: str, data: Dict[str, Any]) -> None:
+        """Publish a tick; closes any bars whose bucket has rolled over."""
+        start = time.perf_counter_ns()
+        timestamp = _to_epoch(data.get("timestamp"))
+        tick = dict(data)
+        tick["symbol"] = symbol
+        tick.setdefault("timestamp", datetime.fromtimestamp(timestamp).isoformat())
+        self._latest[symbol] = tick
+
+        price = tick.get("last")
+        if price is None and tick.get("bid") is not None and tick.get("ask") is not None:
+            price = (tick["bid"] + tick["ask"]) / 2.0
+        if price is not None:
+            for tf in self.timeframes:
+                self._update_bar(symbol, tf, float(price), float(tick.get("size", 0.0) or 0.0), timestamp)
+        if self._shared is not None:
+            self._shared.write(symbol, tick, timestamp, [self._bars.get((symbol, tf)) for tf in self.timeframes])
+
+        self._dispatch(MarketEvent(TICK, symbol, TICK, tick, timestamp))
+        INGEST_LATENCY.record_since(start)
+
+    def _update_bar(self, symbol: str, timeframe: str, price: float, size: float, timestamp: float) -> None:
+        duration = TIMEFRAME_SECONDS[timeframe]
+        bucket = int(timestamp) - (int(timestamp) % duration)
+        key = (symbol, timeframe)
+        bar = self._bars.get(key)
+
+        if bar is not None and bar["bar_start"] == bucket:
+            bar["high"] = max(bar["high"], price)
+            bar["low"] = min(bar["low"], price)
+            bar["close"] = price
+            bar["volume"] += size
+            bar["tick_count"] += 1
+            return
+
+        if bar is not None and bucket > bar["bar_start"]:
+            self._dispatch(MarketEvent("bar", symbol, timeframe, bar, float(bar["bar_start"] + duration)))
+        elif bar is not None:
+            return  # Out-of-order tick for an already closed bucket
+
+        self._bars[key] = {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "open": price,
+            "high": price,
+            "low": price,
+            "close": price,
+            "volume": size,
+            "tick_count": 1,
+            "bar_start": bucket,
+            "timestamp": datetime.fromtimestamp(bucket).isoformat(),
+        }
+
+    def _dispatch(self, event: MarketEvent) -> None:
+        targets = self._routes.get((event.symbol, event.timeframe), set()) | \
+            self._routes.get((None, event.timeframe), set())
+        for subscription in targets:
+            subscription.offer(event)
+
+    # -- snapshots ---------------------------------------------------------
+
+    def latest(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Most recent tick for ``symbol``."""
+        return self._latest.get(symbol)
+
+    def snapshot(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Latest tick per symbol, shaped like ``get_live_forex_data`` output."""
+        if symbols is None:
+            return dict(self._latest)
+        return {symbol: self._latest[symbol] for symbol in symbols if symbol in self._latest}
+
+    def current_bar(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        """The bar currently being built for ``symbol``/``timeframe``."""
+        return self._bars.get((symbol, normalize_timeframe(timeframe)))
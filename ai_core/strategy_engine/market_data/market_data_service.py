@@ -1,8 +1,11 @@
-from typing import Dict, List, Any
+import asyncio
+from typing import Dict, Iterable, List, Any, Optional
 from datetime import datetime, timedelta
 import random
 
+from ai_core.core.config import settings
 from ai_core.core.logger import get_logger
+from .event_bus import MarketEventBus
 
 logger = get_logger(__name__)
 
@@ -18,42 +21,65 @@ class MarketDataService:
         # This is a simplified implementation
         # In production, you would integrate with your IBKR service
         # or another real-time data provider
+        return {symbol: self._simulate_quote(symbol) for symbol in symbols}
+    
+    def _simulate_quote(self, symbol: str) -> Dict[str, Any]:
+        """Simulate a live quote around the symbol's base rate"""
+        base_rates = {
+            'EURUSD': 1.0850,
+            'GBPUSD': 1.2650,
+            'XAUUSD': 2020.50,
+            'USDJPY': 149.20,
+            'USDCAD': 1.3520
+        }
+        
+        base_rate = base_rates.get(symbol, 1.0000)
         
-        forex_data = {}
+        # Add some realistic price movement
+        change_percent = (random.random() - 0.5) * 0.002  # ±0.1% max change
+        current_price = base_rate * (1 + change_percent)
         
-        for symbol in symbols:
-            # Simulate live forex data
-            base_rates = {
-                'EURUSD': 1.0850,
-                'GBPUSD': 1.2650,
-                'XAUUSD': 2020.50,
-                'USDJPY': 149.20,
-                'USDCAD': 1.3520
-            }
-            
-            base_rate = base_rates.get(symbol, 1.0000)
-            
-            # Add some realistic price movement
-            change_percent = (random.random() - 0.5) * 0.002  # ±0.1% max change
-            current_price = base_rate * (1 + change_percent)
+        return {
+            'symbol': symbol,
+            'bid': current_price - 0.0002,
+            'ask': current_price + 0.0002,
+            'last': current_price,
+            'open': base_rate,
+            'high': current_price + abs(change_percent) * base_rate,
+            'low': current_price - abs(change_percent) * base_rate,
+            'close': current_price,
+            'volume': random.randint(100000, 1000000),
+            'change': current_price - base_rate,
+            'change_percent': change_percent * 100,
+            'spread': 0.0004,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    async def run_simulated_feed(self, bus: MarketEventBus, symbols: Iterable[str],
+                                 interval: Optional[float] = None) -> None:
+        """Publish simulated ticks to the event bus until cancelled.
+        
+        Stand-in for a broker feed when no live connection is available; each
+        symbol ticks independently at a jittered interval. ``symbols`` is
+        re-read every cycle, so callers may pass a set and grow or shrink it
+        while the feed runs.
+        """
+        interval = interval if interval is not None else settings.simulated_tick_interval
+        logger.info(f"Starting simulated market data feed for {sorted(symbols)}")
+        next_tick: Dict[str, float] = {}
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            now = loop.time()
+            active = list(symbols)
+            for symbol in active:
+                if now >= next_tick.setdefault(symbol, now):
+                    bus.publish_tick(symbol, self._simulate_quote(symbol))
+                    next_tick[symbol] = now + interval * (0.5 + random.random())
             
-            forex_data[symbol] = {
-                'symbol': symbol,
-                'bid': current_price - 0.0002,
-                'ask': current_price + 0.0002,
-                'last': current_price,
-                'open': base_rate,
-                'high': current_price + abs(change_percent) * base_rate,
-                'low': current_price - abs(change_percent) * base_rate,
-                'close': current_price,
-                'volume': random.randint(100000, 1000000),
-                'change': current_price - base_rate,
-                'change_percent': change_percent * 100,
-                'spread': 0.0004,
-                'timestamp': datetime.now().isoformat()
-            }
-        
-        return forex_data
+            pending = [next_tick[symbol] for symbol in active]
+            delay = min(pending) - loop.time() if pending else interval
+            await asyncio.sleep(max(0.0, delay))
     
     async def get_historical_data(self, symbol: str, timeframe: str = '1H', 
                                  start_date: datetime = None, end_date: datetime = None) -> List[Dict]:
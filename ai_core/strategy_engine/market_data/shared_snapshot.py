@@ -0,0 +1,338 @@
+"""Latest quotes and bars in shared memory for out-of-process strategies.
+
+The event bus writes every tick into a fixed-layout region that other
+processes map read-only, so a strategy worker or C++ strategy binary can read
+the current market without the dict being serialised and copied to it.
+``cpp_engine/include/fxharry/market_snapshot.hpp`` is the C++ reader; keep
+the two layouts in sync (``LAYOUT_VERSION``).
+
+Layout (little endian; offsets in bytes)::
+
+    header, 128 bytes
+      0  char[4]  magic "FXSS"
+      4  u16      layout version
+      6  u16      timeframe count (T, at most 8)
+      8  u32      slot capacity
+     12  u32      slot size = 64 + 64 * T
+     16  u32      slots in use (symbols are appended, never removed)
+     20  u32      writer process id
+     24  u64      ticks published
+     32  char[8][8] timeframe names, NUL padded
+    slot i at 128 + i * slot size
+      0  u64      sequence (odd while the slot is being written)
+      8  char[16] symbol, NUL padded
+     24  f64 x 5  timestamp (epoch seconds), bid, ask, last, size
+     64  bar[T]   64 bytes each: f64 bar_start, open, high, low, close,
+                  volume; u64 tick_count; 8 bytes padding
+
+Each slot is a seqlock: the writer bumps ``sequence`` to an odd value, writes
+the slot and bumps it to the next even value. A reader copies the slot and
+retries if the sequence was odd or changed meanwhile. Missing prices are NaN,
+a bar that has not started yet has ``bar_start`` 0. There is one writer (the
+process owning the event bus); its stores are plain ``struct.pack_into``
+copies, which relies on x86-64 store ordering for readers in other processes.
+
+A writer only replaces an existing region of the same name when its header
+marks it as this layout and its writer process is gone; anything else makes
+it refuse to start rather than pull the region from under another process.
+"""
+
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from ai_core.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b"FXSS"
+LAYOUT_VERSION = 1
+MAX_TIMEFRAMES = 8
+SYMBOL_SIZE = 16
+HEADER_SIZE = 128
+QUOTE_OFFSET = 24
+BARS_OFFSET = 64
+BAR_SIZE = 64
+
+HEADER = struct.Struct("<4sHHIIIIQ")
+TIMEFRAME_NAME = struct.Struct("<8s")
+SEQUENCE = struct.Struct("<Q")
+SYMBOL = struct.Struct(f"<{SYMBOL_SIZE}s")
+QUOTE = struct.Struct("<5d")
+BAR = struct.Struct("<6dQ")
+SLOTS_USED = struct.Struct("<I")
+SLOTS_USED_OFFSET = 16
+PUBLISHED_OFFSET = 24
+
+NAN = math.nan
+
+
+def slot_size(timeframe_count: int) -> int:
+    return BARS_OFFSET + BAR_SIZE * timeframe_count
+
+
+def region_size(capacity: int, timeframe_count: int) -> int:
+    return HEADER_SIZE + capacity * slot_size(timeframe_count)
+
+
+def _price(value: Any) -> float:
+    return NAN if value is None else float(value)
+
+
+def _writer_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists but belongs to another user
+    return True
+
+
+def _is_stale(name: str) -> bool:
+    """Whether ``name`` holds a snapshot of this layout whose writer has exited."""
+    # Read the file directly: attaching through SharedMemory would register the
+    # region with the resource tracker, which unlinks it when this process exits
+    try:
+        with open(os.path.join("/dev/shm", name.lstrip("/")), "rb") as region:
+            header = region.read(HEADER.size)
+    except OSError:
+        return False
+    if len(header) < HEADER.size:
+        return False
+    magic, version, _, _, _, _, writer, _ = HEADER.unpack(header)
+    if magic != MAGIC or version != LAYOUT_VERSION:
+        return False
+    return not writer or not _writer_alive(writer)  # 0: written before writer pids were recorded
+
+
+class SnapshotWriter:
+    """Owns the shared region and publishes ticks into it."""
+
+    def __init__(self, name: str, timeframes: Sequence[str], capacity: int = 64):
+        if len(timeframes) > MAX_TIMEFRAMES:
+            raise ValueError(f"At most {MAX_TIMEFRAMES} timeframes fit in the snapshot header")
+        self.name = name
+        self.timeframes = tuple(timeframes)
+        self.capacity = capacity
+        self.slot_size = slot_size(len(self.timeframes))
+        size = region_size(capacity, len(self.timeframes))
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            if not _is_stale(name):
+                raise FileExistsError(
+                    f"Shared memory {name} is not a stale market snapshot (live writer or another owner); "
+                    f"set a different MARKET_SNAPSHOT_SHM"
+                ) from None
+            logger.warning(f"Replacing market snapshot /dev/shm/{name} left by an exited writer")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.buf = self.shm.buf
+        self._index: Dict[str, int] = {}
+        self._sequences: List[int] = []
+        self._published = 0
+        self._full_warned = False
+
+        self.buf[:size] = bytes(size)
+        HEADER.pack_into(self.buf, 0, MAGIC, LAYOUT_VERSION, len(self.timeframes), capacity, self.slot_size, 0,
+                         os.getpid(), 0)
+        for i, timeframe in enumerate(self.timeframes):
+            TIMEFRAME_NAME.pack_into(self.buf, 32 + i * TIMEFRAME_NAME.size, timeframe.encode())
+        logger.info(f"Market snapshot shared at /dev/shm/{name} ({size} bytes, {capacity} symbols)")
+
+    def _slot(self, symbol: str) -> Optional[int]:
+        index = self._index.get(symbol)
+        if index is not None:
+            return index
+        index = len(self._sequences)
+        if index >= self.capacity:
+            if not self._full_warned:
+                logger.warning(f"Market snapshot full ({self.capacity} symbols); {symbol} not shared")
+                self._full_warned = True
+            return None
+        offset = HEADER_SIZE + index * self.slot_size
+        for i in range(len(self.timeframes)):
+            BAR.pack_into(self.buf, offset + BARS_OFFSET + i * BAR_SIZE, 0.0, NAN, NAN, NAN, NAN, 0.0, 0)
+        SYMBOL.pack_into(self.buf, offset + 8, symbol.encode()[:SYMBOL_SIZE])
+        self._sequences.append(0)
+        self._index[symbol] = index
+        # Publish the slot only after its name is in place
+        SLOTS_USED.pack_into(self.buf, SLOTS_USED_OFFSET, index + 1)
+        return index
+
+    def write(self, symbol: str, tick: Dict[str, Any], timestamp: float,
+              bars: Iterable[Optional[Dict[str, Any]]] = ()) -> None:
+        """Publish a tick and the current bar per timeframe (in ``timeframes`` order)."""
+        index = self._slot(symbol)
+        if index is None:
+            return
+        buf = self.buf
+        offset = HEADER_SIZE + index * self.slot_size
+        sequence = self._sequences[index] + 1
+
+        SEQUENCE.pack_into(buf, offset, sequence)
+        QUOTE.pack_into(
+            buf, offset + QUOTE_OFFSET, timestamp,
+            _price(tick.get("bid")), _price(tick.get("ask")), _price(tick.get("last")),
+            float(tick.get("size", 0.0) or 0.0),
+        )
+        bar_offset = offset + BARS_OFFSET
+        for bar in bars:
+            if bar is not None:
+                BAR.pack_into(
+                    buf, bar_offset, float(bar["bar_start"]), bar["open"], bar["high"], bar["low"],
+                    bar["close"], bar["volume"], bar["tick_count"],
+                )
+            bar_offset += BAR_SIZE
+        SEQUENCE.pack_into(buf, offset, sequence + 1)
+
+        self._sequences[index] = sequence + 1
+        self._published += 1
+        SEQUENCE.pack_into(buf, PUBLISHED_OFFSET, self._published)
+
+    def close(self) -> None:
+        self.buf = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SnapshotReader:
+    """Read-only view of a region created by :class:`SnapshotWriter`.
+
+    On Linux the region is mapped read-only straight from ``/dev/shm``;
+    attaching through ``SharedMemory`` would register it with this process's
+    resource tracker, which unlinks it when the reader exits (before 3.13).
+    """
+
+    def __init__(self, name: str):
+        path = os.path.join("/dev/shm", name.lstrip("/"))
+        if os.path.exists(path):
+            with open(path, "rb") as region:
+                self._mmap = mmap.mmap(region.fileno(), 0, access=mmap.ACCESS_READ)
+            self.shm = None
+            self.buf = memoryview(self._mmap)
+        else:
+            self._mmap = None
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.buf = self.shm.buf
+        magic, version, timeframe_count, self.capacity, self.slot_size, _, _, _ = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self.close()
+            raise ValueError(f"{name} is not a version {LAYOUT_VERSION} market snapshot")
+        self.timeframes = tuple(
+            TIMEFRAME_NAME.unpack_from(self.buf, 32 + i * TIMEFRAME_NAME.size)[0].rstrip(b"\0").decode()
+            for i in range(timeframe_count)
+        )
+        self._index: Dict[str, int] = {}
+
+    def _refresh_index(self) -> None:
+        used = SLOTS_USED.unpack_from(self.buf, SLOTS_USED_OFFSET)[0]
+        for index in range(len(self._index), used):
+            raw = SYMBOL.unpack_from(self.buf, HEADER_SIZE + index * self.slot_size + 8)[0]
+            self._index[raw.rstrip(b"\0").decode()] = index
+
+    def symbols(self) -> List[str]:
+        self._refresh_index()
+        return list(self._index)
+
+    @property
+    def published(self) -> int:
+        return SEQUENCE.unpack_from(self.buf, PUBLISHED_OFFSET)[0]
+
+    def read_raw(self, index: int, max_spins: int = 10_000) -> bytes:
+        """Consistent copy of slot ``index`` (seqlock read)."""
+        start = HEADER_SIZE + index * self.slot_size
+        end = start + self.slot_size
+        buf = self.buf
+        for spin in range(max_spins):
+            before = SEQUENCE.unpack_from(buf, start)[0]
+            if not before & 1:
+                data = bytes(buf[start:end])
+                if SEQUENCE.unpack_from(buf, start)[0] == before:
+                    return data
+            if spin & 63 == 63:
+                time.sleep(0)
+        raise TimeoutError(f"Snapshot slot {index} kept changing while being read")
+
+    def read(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Latest tick for ``symbol`` with its current bars, or None if unknown."""
+        index = self._index.get(symbol)
+        if index is None:
+            self._refresh_index()
+            index = self._index.get(symbol)
+            if index is None:
+                return None
+        data = self.read_raw(index)
+        timestamp, bid, ask, last, size = QUOTE.unpack_from(data, QUOTE_OFFSET)
+        tick: Dict[str, Any] = {
+            "symbol": symbol,
+            "timestamp": datetime.fromtimestamp(timestamp).isoformat() if timestamp else None,
+            "bid": None if math.isnan(bid) else bid,
+            "ask": None if math.isnan(ask) else ask,
+            "last": None if math.isnan(last) else last,
+            "size": size,
+        }
+        bars = {}
+        for i, timeframe in enumerate(self.timeframes):
+            bar_start, open_, high, low, close, volume, tick_count = BAR.unpack_from(
+                data, BARS_OFFSET + i * BAR_SIZE
+            )
+            if bar_start:
+                bars[timeframe] = {
+                    "open": open_, "high": high, "low": low, "close": close,
+                    "volume": volume, "tick_count": tick_count, "bar_start": int(bar_start),
+                }
+        tick["bars"] = bars
+        return tick
+
+    def snapshot(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Same shape as ``MarketEventBus.snapshot`` plus a ``bars`` entry per symbol."""
+        if symbols is None:
+            symbols = self.symbols()
+        result = {}
+        for symbol in symbols:
+            tick = self.read(symbol)
+            if tick is not None:
+                result[symbol] = tick
+        return result
+
+    def as_array(self):
+        """Zero-copy numpy structured view of all slots.
+
+        Rows are not seqlock-checked; use it for scans that tolerate a torn
+        row, and :meth:`read` where consistency matters.
+        """
+        import numpy as np
+
+        bar = np.dtype([
+            ("bar_start", "<f8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+            ("close", "<f8"), ("volume", "<f8"), ("tick_count", "<u8"), ("_pad", "V8"),
+        ])
+        slot = np.dtype([
+            ("sequence", "<u8"), ("symbol", f"S{SYMBOL_SIZE}"), ("timestamp", "<f8"),
+            ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"), ("size", "<f8"),
+            ("bars", bar, (len(self.timeframes),)),
+        ])
+        used = SLOTS_USED.unpack_from(self.buf, SLOTS_USED_OFFSET)[0]
+        return np.ndarray((used,), dtype=slot, buffer=self.buf, offset=HEADER_SIZE)
+
+    def close(self) -> None:
+        self.buf.release()
+        self.buf = None
+        if self._mmap is not None:
+            self._mmap.close()
+        else:
+            self.shm.close()
@@ -1,206 +1,345 @@
+import asyncio
 import importlib.util
 import json
+import os
 import subprocess
-from typing import List, Dict, Any, Optional
-import numpy as np
-from datetime import datetime
+import time
+from typing import Callable, List, Dict, Any, Optional
+from datetime import datetime, timedelta
 
+from ai_core.core.config import settings
 from ai_core.core.logger import get_logger
+from ai_core.core.metrics import DB_WRITE_LATENCY, STRATEGY_EVENTS_SKIPPED, STRATEGY_PREDICT_LATENCY
 from ai_core.database.models import Strategy, AISignal
-from ai_core.database.database import SessionLocal
+from ai_core.database.database import SessionLocal, AsyncSessionLocal
+from sqlalchemy import select
+from .artifacts import artifact_version
+from .warm_pool import StrategyWarmPool
 
 logger = get_logger(__name__)
 
 class StrategyManager:
     """Manages AI/ML trading strategies"""
     
+    # Callbacks notified with (strategy_id, is_active) whenever any manager
+    # instance activates, deactivates or updates a strategy.
+    _listeners: List[Callable[[int, bool], None]] = []
+    
     def __init__(self):
+        # Ready instances by strategy id; populated and evicted by the warm pool
         self.loaded_strategies = {}
         self.strategy_cache = {}
+        self.warm_pool = StrategyWarmPool(self)
+    
+    @classmethod
+    def add_listener(cls, listener: Callable[[int, bool], None]) -> None:
+        """Register a strategy lifecycle listener"""
+        cls._listeners.append(listener)
+    
+    @classmethod
+    def remove_listener(cls, listener: Callable[[int, bool], None]) -> None:
+        """Unregister a strategy lifecycle listener"""
+        if listener in cls._listeners:
+            cls._listeners.remove(listener)
+    
+    @classmethod
+    def notify_strategy_changed(cls, strategy_id: int, is_active: bool) -> None:
+        """Tell listeners a strategy's activation state or configuration changed"""
+        for listener in list(cls._listeners):
+            try:
+                listener(strategy_id, is_active)
+            except Exception as e:
+                logger.error(f"Strategy listener error for {strategy_id}: {e}")
     
     async def load_strategy(self, strategy_id: int) -> Optional[Any]:
-        """Load a strategy module dynamically"""
-        db = SessionLocal()
-        try:
-            strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
-            if not strategy:
-                return None
-            
-            if strategy_id in self.loaded_strategies:
-                return self.loaded_strategies[strategy_id]
-            
-            if strategy.strategy_type == 'python':
-                return await self._load_python_strategy(strategy)
-            elif strategy.strategy_type == 'cpp':
-                return await self._load_cpp_strategy(strategy)
-            elif strategy.strategy_type == 'ml_model':
-                return await self._load_ml_model(strategy)
-            
-        except Exception as e:
-            logger.error(f"Error loading strategy {strategy_id}: {e}")
-            return None
-        finally:
-            db.close()
+        """Return a strategy instance, loading it in a background worker if needed"""
+        return await self.warm_pool.load(strategy_id)
+    
+    async def fetch_strategy(self, strategy_id: int) -> Optional[Strategy]:
+        """Fetch a strategy row"""
+        async with AsyncSessionLocal() as db:
+            return await db.get(Strategy, strategy_id)
     
-    async def _load_python_strategy(self, strategy: Strategy) -> Any:
+    def build_strategy(self, strategy: Strategy, file_path: Optional[str] = None) -> Any:
+        """Construct a strategy instance from ``file_path`` (default: its current artifact).
+        
+        This blocks (it runs strategy files, unpickles or ``torch.load``s
+        models), so live callers go through :attr:`warm_pool`, which runs it
+        in a worker thread.
+        """
+        file_path = file_path or strategy.file_path
+        if strategy.strategy_type == 'python':
+            return self._build_python_strategy(strategy, file_path)
+        elif strategy.strategy_type == 'cpp':
+            return self._build_cpp_strategy(strategy, file_path)
+        elif strategy.strategy_type == 'ml_model':
+            return self._build_ml_model(strategy, file_path)
+        raise ValueError(f"Unsupported strategy type: {strategy.strategy_type}")
+    
+    def _build_python_strategy(self, strategy: Strategy, file_path: str) -> Any:
         """Load Python-based strategy"""
-        try:
-            spec = importlib.util.spec_from_file_location(
-                f"strategy_{strategy.id}", 
-                strategy.file_path
-            )
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # Instantiate the strategy class
-            strategy_class = getattr(module, 'Strategy')
-            strategy_instance = strategy_class(strategy.parameters or {})
-            
-            self.loaded_strategies[strategy.id] = strategy_instance
-            return strategy_instance
-            
-        except Exception as e:
-            logger.error(f"Error loading Python strategy: {e}")
-            return None
+        # Versioned module names keep a live and a shadow version apart
+        version = artifact_version(file_path)
+        spec = importlib.util.spec_from_file_location(
+            f"strategy_{strategy.id}_{version}" if version else f"strategy_{strategy.id}",
+            file_path
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        
+        # Instantiate the strategy class
+        strategy_class = getattr(module, 'Strategy')
+        return strategy_class(strategy.parameters or {})
     
-    async def _load_cpp_strategy(self, strategy: Strategy) -> Any:
+    def _build_cpp_strategy(self, strategy: Strategy, file_path: str) -> Any:
         """Load C++ strategy via subprocess wrapper"""
-        try:
-            # C++ strategies are compiled binaries that communicate via JSON
-            class CppStrategyWrapper:
-                def __init__(self, binary_path: str, parameters: Dict):
-                    self.binary_path = binary_path
-                    self.parameters = parameters
+        # C++ strategies are compiled binaries that communicate via JSON. The
+        # shared market snapshot name is passed in FXHARRY_MARKET_SNAPSHOT;
+        # strategies with "market_data_transport": "shm" read quotes from it
+        # (cpp_engine/include/fxharry/market_snapshot.hpp) and are sent only
+        # their parameters.
+        class CppStrategyWrapper:
+            def __init__(self, binary_path: str, parameters: Dict):
+                self.binary_path = binary_path
+                self.parameters = parameters
+                self.env = None
+                self.use_snapshot = False
+                if settings.market_snapshot_shm:
+                    self.env = {**os.environ, 'FXHARRY_MARKET_SNAPSHOT': settings.market_snapshot_shm}
+                    self.use_snapshot = parameters.get('market_data_transport') == 'shm'
+            
+            def predict(self, market_data: Dict) -> Dict:
+                """Call C++ binary with market data"""
+                input_data = {'parameters': self.parameters}
+                if self.use_snapshot:
+                    input_data['symbols'] = list(market_data)
+                else:
+                    input_data['market_data'] = market_data
                 
-                def predict(self, market_data: Dict) -> Dict:
-                    """Call C++ binary with market data"""
-                    input_data = {
-                        'market_data': market_data,
-                        'parameters': self.parameters
-                    }
-                    
-                    try:
-                        result = subprocess.run(
-                            [self.binary_path],
-                            input=json.dumps(input_data),
-                            capture_output=True,
-                            text=True,
-                            timeout=5
-                        )
-                        
-                        if result.returncode == 0:
-                            return json.loads(result.stdout)
-                        else:
-                            logger.error(f"C++ strategy error: {result.stderr}")
-                            return {'signal': 'HOLD', 'confidence': 0.0}
+                try:
+                    result = subprocess.run(
+                        [self.binary_path],
+                        input=json.dumps(input_data),
+                        capture_output=True,
+                        text=True,
+                        timeout=5,
+                        env=self.env
+                    )
                     
-                    except Exception as e:
-                        logger.error(f"Error calling C++ strategy: {e}")
+                    if result.returncode == 0:
+                        return json.loads(result.stdout)
+                    else:
+                        logger.error(f"C++ strategy error: {result.stderr}")
                         return {'signal': 'HOLD', 'confidence': 0.0}
-            
-            wrapper = CppStrategyWrapper(strategy.file_path, strategy.parameters or {})
-            self.loaded_strategies[strategy.id] = wrapper
-            return wrapper
-            
-        except Exception as e:
-            logger.error(f"Error loading C++ strategy: {e}")
-            return None
+                
+                except Exception as e:
+                    logger.error(f"Error calling C++ strategy: {e}")
+                    return {'signal': 'HOLD', 'confidence': 0.0}
+        
+        return CppStrategyWrapper(file_path, strategy.parameters or {})
     
-    async def _load_ml_model(self, strategy: Strategy) -> Any:
+    def _build_ml_model(self, strategy: Strategy, file_path: str) -> Any:
         """Load ML model (PyTorch, scikit-learn, etc.)"""
-        try:
-            import torch
-            import pickle
+        import pickle
+        import numpy as np
+        
+        torch = None
+        if (strategy.parameters or {}).get('model_type', 'sklearn') == 'pytorch':
+            import torch  # only PyTorch models pay for importing torch
+        
+        pipeline = None
+        if (strategy.parameters or {}).get('features'):
+            from ai_core.core.container import get_feature_store
+            from ai_core.ml_engine.feature_engineering import FeaturePipeline
+            pipeline = FeaturePipeline.from_config(strategy.parameters['features'])
+            feature_store = get_feature_store()
+        
+        class MLModelWrapper:
+            def __init__(self, model_path: str, parameters: Dict):
+                self.parameters = parameters
+                self.model = None
+                self.model_type = parameters.get('model_type', 'sklearn')
+                # Declarative features ("features": [...]) shared with training;
+                # otherwise the raw per-symbol values below
+                self.pipeline = pipeline
+                self.feature_timeframe = parameters.get('feature_timeframe', '1m')
+                self.symbols = parameters.get('symbols')
+                
+                if self.model_type == 'pytorch':
+                    self.model = torch.load(model_path, map_location='cpu')
+                    self.model.eval()
+                elif self.model_type == 'sklearn':
+                    with open(model_path, 'rb') as f:
+                        self.model = pickle.load(f)
             
-            class MLModelWrapper:
-                def __init__(self, model_path: str, parameters: Dict):
-                    self.parameters = parameters
-                    self.model = None
-                    self.model_type = parameters.get('model_type', 'sklearn')
-                    
-                    if self.model_type == 'pytorch':
-                        self.model = torch.load(model_path, map_location='cpu')
-                        self.model.eval()
-                    elif self.model_type == 'sklearn':
-                        with open(model_path, 'rb') as f:
-                            self.model = pickle.load(f)
+            async def prepare(self) -> None:
+                """Seed live feature state from recent bars so live rows skip the warm-up.
+
+                Called by the signal pipeline when the strategy goes live.
+                """
+                if self.pipeline is None or not self.symbols:
+                    return
+                from ai_core.core.container import get_market_data_service
+                from ai_core.strategy_engine.market_data.event_bus import TIMEFRAME_SECONDS
                 
-                def predict(self, market_data: Dict) -> Dict:
-                    """Make prediction using ML model"""
+                duration = TIMEFRAME_SECONDS.get(self.feature_timeframe, 60)
+                now = int(time.time())
+                end = datetime.utcfromtimestamp(now - now % duration)  # start of the bar in progress
+                start = end - timedelta(seconds=duration * 2 * (int(self.pipeline.warmup.max()) + 1))
+                service = get_market_data_service()
+                for symbol in self.symbols:
                     try:
-                        # Extract features from market data
-                        features = self._extract_features(market_data)
-                        
-                        if self.model_type == 'pytorch':
-                            with torch.no_grad():
-                                prediction = self.model(torch.tensor(features, dtype=torch.float32))
-                                prediction = prediction.numpy()
-                        else:
-                            prediction = self.model.predict_proba([features])[0]
-                        
-                        # Convert prediction to trading signal
-                        return self._prediction_to_signal(prediction)
-                    
+                        records = await service.get_historical_data(symbol, self.feature_timeframe, start, end)
+                        records = [r for r in records if r.get('timestamp') and datetime.fromisoformat(str(r['timestamp'])) < end]
+                        if not records:
+                            continue
+                        bars = {
+                            field: [r.get(field, np.nan) for r in records]
+                            for field in ('open', 'high', 'low', 'close', 'volume')
+                        }
+                        await asyncio.to_thread(feature_store.seed, symbol, self.feature_timeframe, self.pipeline,
+                                                [r['timestamp'] for r in records], bars)
                     except Exception as e:
-                        logger.error(f"ML model prediction error: {e}")
-                        return {'signal': 'HOLD', 'confidence': 0.0}
+                        logger.warning(f"Feature history for {symbol} unavailable, warming up live: {e}")
+            
+            def predict(self, market_data: Dict) -> Dict:
+                """Make prediction using ML model"""
+                try:
+                    # Extract features from market data
+                    return self._predict_features(self._extract_features(market_data))
+                except Exception as e:
+                    logger.error(f"ML model prediction error: {e}")
+                    return {'signal': 'HOLD', 'confidence': 0.0}
+            
+            def _predict_features(self, features) -> Dict:
+                if self.model_type == 'pytorch':
+                    with torch.no_grad():
+                        prediction = self.model(torch.tensor(features, dtype=torch.float32))
+                        prediction = prediction.numpy()
+                else:
+                    prediction = self.model.predict_proba([features])[0]
                 
-                def _extract_features(self, market_data: Dict) -> List[float]:
-                    """Extract features from market data for ML model"""
-                    # This is a simplified example - customize based on your model
-                    features = []
-                    
-                    for symbol_data in market_data.values():
-                        if isinstance(symbol_data, dict):
-                            features.extend([
-                                symbol_data.get('close', 0),
-                                symbol_data.get('volume', 0),
-                                symbol_data.get('high', 0) - symbol_data.get('low', 0),  # Range
-                                symbol_data.get('close', 0) - symbol_data.get('open', 0),  # Change
-                            ])
-                    
-                    return features[:self.parameters.get('feature_count', 50)]
+                # Convert prediction to trading signal
+                return self._prediction_to_signal(prediction)
+            
+            def _extract_features(self, market_data: Dict) -> List[float]:
+                """Extract features from market data for ML model"""
+                if self.pipeline is not None:
+                    return self._pipeline_features(market_data)
+                # This is a simplified example - customize based on your model
+                features = []
                 
-                def _prediction_to_signal(self, prediction) -> Dict:
-                    """Convert model prediction to trading signal"""
-                    if isinstance(prediction, (list, np.ndarray)):
-                        if len(prediction) >= 3:  # [BUY, SELL, HOLD] probabilities
-                            signal_idx = np.argmax(prediction)
-                            signals = ['BUY', 'SELL', 'HOLD']
-                            return {
-                                'signal': signals[signal_idx],
-                                'confidence': float(prediction[signal_idx]),
-                                'probabilities': {
-                                    'BUY': float(prediction[0]),
-                                    'SELL': float(prediction[1]),
-                                    'HOLD': float(prediction[2])
-                                }
-                            }
-                    
-                    return {'signal': 'HOLD', 'confidence': 0.0}
+                for symbol_data in market_data.values():
+                    if isinstance(symbol_data, dict):
+                        features.extend([
+                            symbol_data.get('close', 0),
+                            symbol_data.get('volume', 0),
+                            symbol_data.get('high', 0) - symbol_data.get('low', 0),  # Range
+                            symbol_data.get('close', 0) - symbol_data.get('open', 0),  # Change
+                        ])
+                
+                return features[:self.parameters.get('feature_count', 50)]
             
-            wrapper = MLModelWrapper(strategy.file_path, strategy.parameters or {})
-            self.loaded_strategies[strategy.id] = wrapper
-            return wrapper
+            def _pipeline_features(self, market_data: Dict) -> np.ndarray:
+                """Pipeline rows per symbol, concatenated in ``symbols`` order.
+                
+                Completed bars of ``feature_timeframe`` are ingested into the
+                feature store (computed once per bar, however many strategies
+                use the same pipeline); ticks reuse the symbol's latest online
+                row. Missing values are passed to the model as 0.
+                """
+                rows = []
+                for symbol in self.symbols or sorted(market_data):
+                    data = market_data.get(symbol)
+                    row = None
+                    if isinstance(data, dict) and self._is_bar(data):
+                        row = feature_store.ingest(symbol, self.feature_timeframe, self.pipeline, data,
+                                                   data['bar_start'])
+                    if row is None:
+                        row = feature_store.latest(symbol, self.feature_timeframe, self.pipeline)
+                    rows.append(np.full(len(self.pipeline), np.nan) if row is None else row)
+                features = np.concatenate(rows) if rows else np.empty(0)
+                return np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0)
             
-        except Exception as e:
-            logger.error(f"Error loading ML model: {e}")
-            return None
+            def _is_bar(self, data: Dict) -> bool:
+                # Bar-close events always carry timeframe and bar_start; ticks
+                # (simulated quotes have OHLC too) never do
+                if data.get('timeframe') != self.feature_timeframe or data.get('bar_start') is None:
+                    return False
+                return all(data.get(field) is not None for field in ('open', 'high', 'low', 'close'))
+            
+            def _prediction_to_signal(self, prediction) -> Dict:
+                """Convert model prediction to trading signal"""
+                if isinstance(prediction, (list, np.ndarray)):
+                    if len(prediction) >= 3:  # [BUY, SELL, HOLD] probabilities
+                        signal_idx = np.argmax(prediction)
+                        signals = ['BUY', 'SELL', 'HOLD']
+                        return {
+                            'signal': signals[signal_idx],
+                            'confidence': float(prediction[signal_idx]),
+                            'probabilities': {
+                                'BUY': float(prediction[0]),
+                                'SELL': float(prediction[1]),
+                                'HOLD': float(prediction[2])
+                            }
+                        }
+                
+                return {'signal': 'HOLD', 'confidence': 0.0}
+        
+        class PipelineModelWrapper(MLModelWrapper):
+            def predict_panel(self, view) -> Dict:
+                """Backtest step: features computed over the panel's history.
+                
+                Rows come from ``view.features`` (the panel, or the feature
+                store's offline rows for it), never from the live online state,
+                and only use bars up to this step.
+                """
+                try:
+                    values = view.features(self.pipeline, lookback=1)[-1]  # S x F at this step
+                    columns = {symbol: j for j, symbol in enumerate(view.symbols)}
+                    rows = [
+                        values[columns[symbol]] if symbol in columns else np.full(len(self.pipeline), np.nan)
+                        for symbol in self.symbols or sorted(view.symbols)
+                    ]
+                    features = np.concatenate(rows) if rows else np.empty(0)
+                    return self._predict_features(np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0))
+                except Exception as e:
+                    logger.error(f"ML model prediction error: {e}")
+                    return {'signal': 'HOLD', 'confidence': 0.0}
+        
+        wrapper = MLModelWrapper if pipeline is None else PipelineModelWrapper
+        return wrapper(file_path, strategy.parameters or {})
     
     async def process_strategy(self, strategy_id: int, market_data: Dict) -> Optional[Dict]:
-        """Process market data through a strategy and generate signals"""
-        strategy_instance = await self.load_strategy(strategy_id)
-        if not strategy_instance:
-            return None
+        """Process market data through a strategy and generate signals.
+        
+        Events arriving while a strategy is still loading are skipped, so a
+        slow first load never stalls the live stream. A strategy that was
+        unloaded (memory pressure) is reloaded and this event awaits it,
+        instead of skipping every event until a background load lands.
+        """
+        strategy_instance = self.warm_pool.get_ready(strategy_id)
+        if strategy_instance is None:
+            if self.warm_pool.is_loading(strategy_id):
+                STRATEGY_EVENTS_SKIPPED.inc()
+                return None
+            strategy_instance = await self.warm_pool.load(strategy_id)
+            if strategy_instance is None:
+                STRATEGY_EVENTS_SKIPPED.inc()
+                return None
         
         try:
             # Generate prediction/signal
+            start = time.perf_counter_ns()
             signal = strategy_instance.predict(market_data)
+            elapsed = time.perf_counter_ns() - start
+            STRATEGY_PREDICT_LATENCY.record(elapsed)
+            self.warm_pool.shadow_evaluate(strategy_id, market_data, signal, elapsed)
             
             if signal and signal.get('confidence', 0) > 0.1:  # Minimum confidence threshold
                 # Store signal in database
-                db = SessionLocal()
-                try:
+                start = time.perf_counter_ns()
+                async with AsyncSessionLocal() as db:
                     ai_signal = AISignal(
                         strategy_id=strategy_id,
                         symbol=signal.get('symbol', 'UNKNOWN'),
@@ -211,15 +350,14 @@ class StrategyManager:
                         model_output=signal
                     )
                     db.add(ai_signal)
-                    db.commit()
-                    
-                    return {
-                        'strategy_id': strategy_id,
-                        'signal': signal,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                finally:
-                    db.close()
+                    await db.commit()
+                DB_WRITE_LATENCY.record_since(start)
+                
+                return {
+                    'strategy_id': strategy_id,
+                    'signal': signal,
+                    'timestamp': datetime.now().isoformat()
+                }
             
         except Exception as e:
             logger.error(f"Error processing strategy {strategy_id}: {e}")
@@ -234,31 +372,75 @@ class StrategyManager:
         finally:
             db.close()
     
+    async def get_active_strategies_async(self) -> List[Strategy]:
+        """Get all active strategies without blocking the event loop"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Strategy).where(Strategy.is_active == True))
+            return list(result.scalars().all())
+    
     async def activate_strategy(self, strategy_id: int) -> bool:
         """Activate a strategy"""
-        db = SessionLocal()
-        try:
-            strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
+        async with AsyncSessionLocal() as db:
+            strategy = await db.get(Strategy, strategy_id)
             if strategy:
                 strategy.is_active = True
-                db.commit()
+                await db.commit()
+                # Load and warm up now rather than on the first live event
+                self.warm_pool.preload(strategy_id)
+                self.notify_strategy_changed(strategy_id, True)
                 return True
             return False
-        finally:
-            db.close()
     
     async def deactivate_strategy(self, strategy_id: int) -> bool:
         """Deactivate a strategy"""
-        db = SessionLocal()
-        try:
-            strategy = db.query(Strategy).filter(Strategy.id == strategy_id).first()
+        async with AsyncSessionLocal() as db:
+            strategy = await db.get(Strategy, strategy_id)
             if strategy:
                 strategy.is_active = False
-                db.commit()
-                # Remove from loaded strategies
-                if strategy_id in self.loaded_strategies:
-                    del self.loaded_strategies[strategy_id]
+                await db.commit()
+                # Unload (or abandon an in-flight load of) the strategy
+                self.warm_pool.unload(strategy_id)
+                self.notify_strategy_changed(strategy_id, False)
                 return True
             return False
-        finally:
-            db.close()
\ No newline at end of file
+    
+    async def deploy_artifact(self, strategy_id: int, file_path: str, shadow: bool = False) -> Optional[Strategy]:
+        """Roll a strategy onto a stored artifact version.
+        
+        The new version is built and warmed up in the background and swapped
+        in atomically; the current one keeps serving until then. With
+        ``shadow`` the live version is left as is and the new one only runs
+        alongside it until :meth:`promote_shadow`.
+        """
+        if shadow:
+            strategy = await self.fetch_strategy(strategy_id)
+            if strategy:
+                self.warm_pool.start_shadow(strategy_id, file_path)
+            return strategy
+        
+        async with AsyncSessionLocal() as db:
+            strategy = await db.get(Strategy, strategy_id)
+            if strategy:
+                strategy.file_path = file_path
+                await db.commit()
+                if strategy.is_active:
+                    self.warm_pool.preload(strategy_id, reload=True)
+                self.notify_strategy_changed(strategy_id, bool(strategy.is_active))
+            return strategy
+    
+    async def promote_shadow(self, strategy_id: int) -> bool:
+        """Make the shadow version live, reusing its warm instance"""
+        run = self.warm_pool.get_shadow(strategy_id)
+        if run is None or run.instance is None:
+            return False
+        
+        async with AsyncSessionLocal() as db:
+            strategy = await db.get(Strategy, strategy_id)
+            if not strategy:
+                return False
+            strategy.file_path = run.file_path
+            await db.commit()
+            # If the shadow went away meanwhile, listeners rebuild from file_path
+            await self.warm_pool.promote_shadow(strategy_id, serve=bool(strategy.is_active))
+            self.notify_strategy_changed(strategy_id, bool(strategy.is_active))
+            return True
@@ -0,0 +1,101 @@
+"""Shadow evaluation of a candidate strategy version.
+
+While a shadow run is active, every event the live version evaluates is also
+fed to the candidate. The candidate runs in the warm pool's worker threads,
+never on the event loop, and its signals are only compared, never stored or
+published. At most one shadow evaluation per strategy is in flight; events
+arriving while one is running are counted as skipped rather than queued, so a
+slow candidate cannot build up a backlog.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.utils.metrics import Histogram
+
+from ai_core.core.metrics import REGISTRY
+
+SHADOW_MISMATCHES = REGISTRY.counter("shadow_signal_mismatches_total", "Shadow signals that differ from the live version")
+
+LOADING = "loading"
+RUNNING = "running"
+FAILED = "failed"
+
+MAX_MISMATCHES = 50  # most recent disagreements kept for inspection
+
+
+def _action(signal: Optional[Dict[str, Any]]) -> str:
+    return (signal or {}).get("signal", "HOLD")
+
+
+def _confidence(signal: Optional[Dict[str, Any]]) -> float:
+    try:
+        return float((signal or {}).get("confidence", 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass
+class ShadowRun:
+    strategy_id: int
+    file_path: str
+    version: Optional[str]
+    fingerprint: Tuple[str, str] = ("", "")
+    status: str = LOADING
+    instance: Any = None
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    pending: Optional[asyncio.Future] = None  # evaluation running in a worker thread
+    events: int = 0
+    skipped: int = 0
+    errors: int = 0
+    matches: int = 0
+    confidence_diff_total: float = 0.0
+    live_latency: Histogram = field(default_factory=lambda: Histogram("shadow_live_latency"))
+    shadow_latency: Histogram = field(default_factory=lambda: Histogram("shadow_candidate_latency"))
+    mismatches: List[Dict[str, Any]] = field(default_factory=list)
+
+    def evaluate(self, market_data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Worker thread: run the candidate and time it."""
+        start = time.perf_counter_ns()
+        signal = self.instance.predict(market_data)
+        return signal, time.perf_counter_ns() - start
+
+    def record(self, live: Optional[Dict[str, Any]], live_ns: int,
+               shadow: Optional[Dict[str, Any]], shadow_ns: int) -> None:
+        """Compare one pair of signals; runs on the event loop."""
+        self.events += 1
+        self.live_latency.record(live_ns)
+        self.shadow_latency.record(shadow_ns)
+        self.confidence_diff_total += abs(_confidence(live) - _confidence(shadow))
+        if _action(live) == _action(shadow):
+            self.matches += 1
+            return
+        SHADOW_MISMATCHES.inc()
+        self.mismatches = self.mismatches[-(MAX_MISMATCHES - 1):] + [{
+            "timestamp": time.time(),
+            "live": live,
+            "shadow": shadow,
+        }]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "strategy_id": self.strategy_id,
+            "version": self.version,
+            "file_path": self.file_path,
+            "status": self.status,
+            "error": self.error,
+            "started_at": self.started_at,
+            "events": self.events,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "agreement": self.matches / self.events if self.events else None,
+            "mean_confidence_diff": self.confidence_diff_total / self.events if self.events else None,
+            "live_latency": self.live_latency.summary(),
+            "shadow_latency": self.shadow_latency.summary(),
+            "recent_mismatches": self.mismatches[-10:],
+        }
@@ -0,0 +1,203 @@
+"""Event-driven signal pipeline.
+
+Each active strategy gets its own bounded subscription on the
+:class:`MarketEventBus` for the symbols and timeframes it declares in its
+parameters, plus a worker task that evaluates the strategy only when one of
+those events arrives. Strategy parameters understood here:
+
+* ``symbols``: list of symbols to listen to (defaults to the configured universe)
+* ``timeframes`` / ``timeframe``: ``"tick"`` and/or bar timeframes such as
+  ``"1m"`` or ``"1h"`` (defaults to ``"tick"``)
+
+Strategies with an async ``prepare()`` hook (e.g. ML models seeding live
+feature state from recent history) have it awaited once per loaded instance
+when the pipeline activates them, never for backtest or ad-hoc loads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ai_core.core.config import settings
+from ai_core.core.logger import get_logger
+from ai_core.database.models import Strategy
+from .market_data.event_bus import TICK, MarketEvent, MarketEventBus, Subscription, normalize_timeframe
+from .rule_based import StrategyManager
+
+logger = get_logger(__name__)
+
+SignalHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def subscription_spec(strategy: Strategy) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Return the (symbols, timeframes) a strategy wants to be driven by."""
+
+    parameters = strategy.parameters or {}
+    symbols = parameters.get("symbols") or settings.market_symbols
+    if isinstance(symbols, str):
+        symbols = [symbols]
+
+    timeframes = parameters.get("timeframes") or parameters.get("timeframe") or [TICK]
+    if isinstance(timeframes, str):
+        timeframes = [timeframes]
+
+    return (
+        tuple(sorted(set(symbols))),
+        tuple(sorted({normalize_timeframe(tf) for tf in timeframes})),
+    )
+
+
+class SignalPipeline:
+    """Drive active strategies from market events instead of a polling loop."""
+
+    def __init__(self, bus: MarketEventBus, strategy_manager: StrategyManager,
+                 on_signal: Optional[SignalHandler] = None):
+        self.bus = bus
+        self.strategy_manager = strategy_manager
+        self.on_signal = on_signal
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._subscriptions: Dict[int, Subscription] = {}
+        self._specs: Dict[int, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._prepared: Dict[int, int] = {}  # strategy id -> id() of the instance prepare() ran on
+        # Warm strategies up on the quotes they will actually see
+        strategy_manager.warm_pool.sample_provider = self._warmup_sample
+
+    async def start(self) -> None:
+        """Subscribe active strategies and listen for lifecycle changes."""
+        self._loop = asyncio.get_running_loop()
+        StrategyManager.add_listener(self._on_strategy_changed)
+        self.strategy_manager.warm_pool.start()
+        await self.refresh()
+
+    async def stop(self) -> None:
+        """Cancel all strategy workers."""
+        StrategyManager.remove_listener(self._on_strategy_changed)
+        for strategy_id in list(self._workers):
+            await self._stop_worker(strategy_id)
+        await self.strategy_manager.warm_pool.stop()
+
+    def _on_strategy_changed(self, strategy_id: int, is_active: bool) -> None:
+        # May be called from FastAPI's threadpool for sync routes
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._schedule_refresh, strategy_id, is_active)
+
+    def _schedule_refresh(self, strategy_id: int, is_active: bool) -> None:
+        pool = self.strategy_manager.warm_pool
+        if is_active:
+            # Rebuild in the background so changed parameters or files are picked
+            # up; the current instance keeps serving until the new one is warm
+            pool.preload(strategy_id, reload=pool.is_ready(strategy_id))
+        else:
+            pool.unload(strategy_id)
+        asyncio.ensure_future(self.refresh())
+
+    async def refresh(self) -> None:
+        """Reconcile running workers with the set of active strategies."""
+        async with self._refresh_lock:
+            try:
+                strategies = await self.strategy_manager.get_active_strategies_async()
+            except Exception as e:
+                logger.error(f"Failed to load active strategies: {e}")
+                return
+
+            wanted = {}
+            for strategy in strategies:
+                try:
+                    wanted[strategy.id] = subscription_spec(strategy)
+                except ValueError as e:
+                    logger.error(f"Invalid subscription for strategy {strategy.id}: {e}")
+
+            for strategy_id in list(self._workers):
+                if wanted.get(strategy_id) != self._specs.get(strategy_id):
+                    await self._stop_worker(strategy_id)
+
+            for strategy_id, spec in wanted.items():
+                if strategy_id not in self._workers:
+                    self._start_worker(strategy_id, spec)
+                self._activate(strategy_id)
+
+            logger.info(f"Signal pipeline driving {len(self._workers)} active strategies")
+
+    def _activate(self, strategy_id: int) -> None:
+        task = self.strategy_manager.warm_pool.preload(strategy_id)
+        if task is not None:
+            asyncio.ensure_future(self._prepare(strategy_id, task))
+
+    async def _prepare(self, strategy_id: int, task: asyncio.Task) -> None:
+        """Run the instance's live ``prepare()`` hook once it is loaded."""
+        try:
+            instance = await asyncio.shield(task)
+        except Exception:
+            return  # The warm pool logs load failures
+        if instance is None or self._prepared.get(strategy_id) == id(instance):
+            return
+        self._prepared[strategy_id] = id(instance)
+        prepare = getattr(instance, "prepare", None)
+        if prepare is not None:
+            try:
+                await prepare()
+            except Exception as e:
+                logger.warning(f"Preparing strategy {strategy_id} failed: {e}")
+
+    def _start_worker(self, strategy_id: int, spec: Tuple[Tuple[str, ...], Tuple[str, ...]]) -> None:
+        symbols, timeframes = spec
+        subscription = self.bus.subscribe(symbols, timeframes)
+        self._subscriptions[strategy_id] = subscription
+        self._specs[strategy_id] = spec
+        self.strategy_manager.warm_pool.pin(strategy_id)
+        self._workers[strategy_id] = asyncio.create_task(
+            self._run_strategy(strategy_id, symbols, subscription)
+        )
+
+    async def _stop_worker(self, strategy_id: int) -> None:
+        task = self._workers.pop(strategy_id, None)
+        subscription = self._subscriptions.pop(strategy_id, None)
+        self._specs.pop(strategy_id, None)
+        self.strategy_manager.warm_pool.unpin(strategy_id)
+        self._prepared.pop(strategy_id, None)
+        if subscription:
+            subscription.close()
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def _run_strategy(self, strategy_id: int, symbols: Tuple[str, ...],
+                            subscription: Subscription) -> None:
+        async for event in subscription:
+            try:
+                market_data = self._market_data_for(event, symbols)
+                signal = await self.strategy_manager.process_strategy(strategy_id, market_data)
+                if signal and self.on_signal:
+                    await self.on_signal(signal)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Signal pipeline error for strategy {strategy_id}: {e}")
+
+    def _warmup_sample(self, strategy: Strategy) -> Dict[str, Any]:
+        return self.bus.snapshot(subscription_spec(strategy)[0])
+
+    def _market_data_for(self, event: MarketEvent, symbols: Tuple[str, ...]) -> Dict[str, Any]:
+        """Latest quotes for the strategy's symbols, with the closed bar overlaid."""
+        market_data = self.bus.snapshot(symbols)
+        if event.kind == "bar":
+            market_data[event.symbol] = {**market_data.get(event.symbol, {}), **event.data}
+        return market_data
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-strategy queue depth and drop counts."""
+        return {
+            strategy_id: {
+                "symbols": list(self._specs[strategy_id][0]),
+                "timeframes": list(self._specs[strategy_id][1]),
+                "queued": subscription.queue.qsize(),
+                "dropped": subscription.dropped,
+            }
+            for strategy_id, subscription in self._subscriptions.items()
+        }
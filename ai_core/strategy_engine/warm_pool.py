@@ -0,0 +1,436 @@
+"""Background strategy loading and eviction.
+
+Building a strategy runs its file, unpickles a model or ``torch.load``s one,
+which can take seconds. The warm pool does that work in a small thread pool,
+calls ``predict`` once on sample data so lazy initialisation (first-call
+graph building, sklearn input validation, caches) happens off the live path,
+and only then publishes the instance in ``StrategyManager.loaded_strategies``.
+A reload keeps the previous instance serving until the new one is warm, and
+is skipped when the strategy's artifact and parameters are unchanged. A new
+artifact version can also be run in shadow next to the live one (see
+:mod:`.shadow`) and promoted without rebuilding it.
+
+Idle strategies are unloaded after ``STRATEGY_IDLE_TTL`` seconds unless they
+are pinned (the signal pipeline pins every strategy it drives, however long
+its bars are), and when
+``STRATEGY_POOL_MAX_RSS_MB`` is set the least recently used ones are unloaded
+while the process is above it: each pass unloads just enough to cover the
+excess by the strategies' measured load cost (``rss_delta_mb``), and at most
+``STRATEGY_MAX_EVICTIONS``, since CPython rarely hands freed memory back to the
+OS and RSS alone would never show the effect. A strategy with ``"warmup": false`` in its
+parameters skips the warm-up call (for strategies with stateful ``predict``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import gc
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+from ai_core.core.config import settings
+from ai_core.core.logger import get_logger
+from ai_core.core.metrics import STRATEGY_LOAD_LATENCY
+from .artifacts import artifact_version, fingerprint
+from . import shadow
+
+if TYPE_CHECKING:
+    from ai_core.database.models import Strategy
+    from .rule_based import StrategyManager
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - optional dependency
+    psutil = None
+
+logger = get_logger(__name__)
+
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+RETRY_AFTER_FAILURE = 30.0  # seconds before a failed strategy is loaded again
+
+SampleProvider = Callable[["Strategy"], Dict[str, Any]]
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process, or None if it cannot be read."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def synthetic_sample(strategy: "Strategy") -> Dict[str, Any]:
+    """Flat quotes/bars for the strategy's symbols, used when no live data exists yet."""
+    symbols = (strategy.parameters or {}).get("symbols") or settings.market_symbols
+    if isinstance(symbols, str):
+        symbols = [symbols]
+    return {
+        symbol: {
+            "symbol": symbol, "bid": 1.0, "ask": 1.0, "last": 1.0,
+            "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 0.0,
+        }
+        for symbol in symbols
+    }
+
+
+@dataclass
+class PoolEntry:
+    strategy_id: int
+    status: str = LOADING
+    task: Optional[asyncio.Task] = None
+    stale: bool = False  # reload requested while a load was in flight
+    removed: bool = False  # unloaded while a load was in flight
+    loaded_at: Optional[float] = None
+    failed_at: float = 0.0
+    last_used: float = 0.0
+    load_ms: Optional[float] = None
+    warmup_ms: Optional[float] = None
+    rss_delta_mb: Optional[float] = None
+    error: Optional[str] = None
+    fingerprint: Optional[Tuple[str, str]] = None  # (artifact path, parameters) of the serving instance
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "strategy_id": self.strategy_id,
+            "status": self.status,
+            "version": artifact_version(self.fingerprint[0]) if self.fingerprint else None,
+            "loaded_at": self.loaded_at,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1) if self.last_used else None,
+            "load_ms": self.load_ms,
+            "warmup_ms": self.warmup_ms,
+            "rss_delta_mb": self.rss_delta_mb,
+            "error": self.error,
+        }
+
+
+class StrategyWarmPool:
+    """Loads strategies off the event loop and evicts idle ones."""
+
+    def __init__(self, manager: "StrategyManager", sample_provider: Optional[SampleProvider] = None):
+        self.manager = manager
+        self.sample_provider = sample_provider
+        self._entries: Dict[int, PoolEntry] = {}
+        self._shadows: Dict[int, shadow.ShadowRun] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._eviction_task: Optional[asyncio.Task] = None
+        # Strategies in live use; exempt from idle eviction
+        self._pinned: Set[int] = set()
+        # RSS when strategies were last unloaded for memory; freed memory mostly stays mapped
+        self._evicted_at_rss: Optional[float] = None
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the periodic eviction task on the running loop."""
+        if self._eviction_task is None:
+            self._eviction_task = asyncio.get_running_loop().create_task(self._run_eviction())
+
+    async def stop(self) -> None:
+        if self._eviction_task is not None:
+            self._eviction_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._eviction_task
+            self._eviction_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.strategy_preload_workers, thread_name_prefix="strategy-preload"
+            )
+        return self._executor
+
+    # -- loading -------------------------------------------------------------
+
+    def is_ready(self, strategy_id: int) -> bool:
+        return strategy_id in self.manager.loaded_strategies
+
+    def is_loading(self, strategy_id: int) -> bool:
+        entry = self._entries.get(strategy_id)
+        return entry is not None and entry.task is not None and not entry.task.done()
+
+    def pin(self, strategy_id: int) -> None:
+        """Keep ``strategy_id`` loaded while idle; only memory pressure unloads it."""
+        self._pinned.add(strategy_id)
+
+    def unpin(self, strategy_id: int) -> None:
+        self._pinned.discard(strategy_id)
+
+    def get_ready(self, strategy_id: int) -> Optional[Any]:
+        """The warm instance for ``strategy_id``, or None while it is (re)loading."""
+        instance = self.manager.loaded_strategies.get(strategy_id)
+        if instance is not None:
+            entry = self._entries.get(strategy_id)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+        return instance
+
+    def preload(self, strategy_id: int, reload: bool = False) -> asyncio.Task:
+        """Load ``strategy_id`` in the background; ``reload`` rebuilds a ready one."""
+        entry = self._entries.get(strategy_id)
+        if entry is None:
+            entry = self._entries[strategy_id] = PoolEntry(strategy_id, last_used=time.monotonic())
+        entry.removed = False
+
+        if entry.task is not None and not entry.task.done():
+            entry.stale = entry.stale or reload
+            return entry.task
+        if entry.status == READY and not reload and self.is_ready(strategy_id):
+            return entry.task
+        if entry.status == FAILED and not reload and time.monotonic() - entry.failed_at < RETRY_AFTER_FAILURE:
+            return entry.task
+
+        if not self.is_ready(strategy_id):
+            entry.status = LOADING
+        entry.task = asyncio.get_running_loop().create_task(self._load(entry))
+        return entry.task
+
+    async def load(self, strategy_id: int) -> Optional[Any]:
+        """Return the instance, waiting for a background load if necessary."""
+        instance = self.get_ready(strategy_id)
+        if instance is not None:
+            return instance
+        task = self.preload(strategy_id)
+        # Shield so one cancelled caller does not abort a load others wait on
+        return await asyncio.shield(task)
+
+    async def _load(self, entry: PoolEntry) -> Optional[Any]:
+        instance, built, timings = None, None, None
+        while True:
+            entry.stale = False
+            try:
+                strategy = await self.manager.fetch_strategy(entry.strategy_id)
+                if strategy is None:
+                    raise LookupError(f"Strategy {entry.strategy_id} not found")
+                wanted = fingerprint(strategy)
+                if wanted == entry.fingerprint and self.is_ready(entry.strategy_id):
+                    # Already serving exactly this artifact and configuration
+                    instance, built, timings = self.manager.loaded_strategies[entry.strategy_id], wanted, None
+                elif instance is None or wanted != built:
+                    instance, timings = await self._run_build(strategy)
+                    built = wanted
+                entry.error = None
+            except Exception as e:
+                instance = None
+                entry.error = str(e)
+                logger.error(f"Error loading strategy {entry.strategy_id}: {e}")
+            if not entry.stale:
+                break
+
+        if entry.removed:
+            return None
+        if instance is None:
+            # Keep serving a previously loaded instance if the reload failed
+            if not self.is_ready(entry.strategy_id):
+                entry.status = FAILED
+                entry.failed_at = time.monotonic()
+            return self.manager.loaded_strategies.get(entry.strategy_id)
+
+        entry.status = READY
+        entry.last_used = time.monotonic()
+        if timings is not None:
+            entry.load_ms, entry.warmup_ms, entry.rss_delta_mb = timings
+            self._publish(entry, instance, built)
+            logger.info(
+                f"Strategy {entry.strategy_id} ready{self._version_label(built)} "
+                f"(load {entry.load_ms:.0f} ms, warm-up {entry.warmup_ms:.0f} ms)"
+            )
+        return instance
+
+    def _publish(self, entry: PoolEntry, instance: Any, built: Tuple[str, str]) -> None:
+        entry.status = READY
+        entry.fingerprint = built
+        entry.loaded_at = time.time()
+        entry.last_used = time.monotonic()
+        self.manager.loaded_strategies[entry.strategy_id] = instance  # atomic switch-over
+
+    @staticmethod
+    def _version_label(built: Tuple[str, str]) -> str:
+        version = artifact_version(built[0])
+        return f" at version {version}" if version else ""
+
+    async def _run_build(self, strategy: "Strategy", file_path: Optional[str] = None):
+        sample = self._sample(strategy)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self._build, strategy, sample, file_path)
+
+    def _sample(self, strategy: "Strategy") -> Optional[Dict[str, Any]]:
+        if (strategy.parameters or {}).get("warmup") is False:
+            return None
+        sample = None
+        if self.sample_provider is not None:
+            try:
+                sample = self.sample_provider(strategy)
+            except Exception as e:
+                logger.warning(f"Warm-up sample for strategy {strategy.id} unavailable: {e}")
+        return sample or synthetic_sample(strategy)
+
+    def _build(self, strategy: "Strategy", sample: Optional[Dict[str, Any]], file_path: Optional[str] = None):
+        """Worker thread: construct and warm up one strategy."""
+        rss_before = current_rss_mb()
+        start = time.perf_counter_ns()
+        instance = self.manager.build_strategy(strategy, file_path)
+        STRATEGY_LOAD_LATENCY.record_since(start)
+        load_ms = (time.perf_counter_ns() - start) / 1e6
+
+        warm_start = time.perf_counter_ns()
+        if sample is not None:
+            try:
+                instance.predict(sample)
+            except Exception as e:
+                logger.warning(f"Warm-up predict failed for strategy {strategy.id}: {e}")
+        warmup_ms = (time.perf_counter_ns() - warm_start) / 1e6
+
+        rss_after = current_rss_mb()
+        rss_delta = round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None
+        return instance, (round(load_ms, 1), round(warmup_ms, 1), rss_delta)
+
+    # -- shadow runs ---------------------------------------------------------
+
+    def start_shadow(self, strategy_id: int, file_path: str) -> shadow.ShadowRun:
+        """Build ``file_path`` in the background and evaluate it next to the live version."""
+        self.stop_shadow(strategy_id)
+        run = self._shadows[strategy_id] = shadow.ShadowRun(strategy_id, file_path, artifact_version(file_path))
+        asyncio.get_running_loop().create_task(self._load_shadow(run))
+        return run
+
+    async def _load_shadow(self, run: shadow.ShadowRun) -> None:
+        try:
+            strategy = await self.manager.fetch_strategy(run.strategy_id)
+            if strategy is None:
+                raise LookupError(f"Strategy {run.strategy_id} not found")
+            run.fingerprint = fingerprint(strategy, run.file_path)
+            run.instance, _ = await self._run_build(strategy, run.file_path)
+            run.status = shadow.RUNNING
+            logger.info(f"Shadowing strategy {run.strategy_id} with version {run.version}")
+        except Exception as e:
+            run.status = shadow.FAILED
+            run.error = str(e)
+            logger.error(f"Error loading shadow version of strategy {run.strategy_id}: {e}")
+
+    def get_shadow(self, strategy_id: int) -> Optional[shadow.ShadowRun]:
+        return self._shadows.get(strategy_id)
+
+    def stop_shadow(self, strategy_id: int) -> Optional[shadow.ShadowRun]:
+        return self._shadows.pop(strategy_id, None)
+
+    def shadow_evaluate(self, strategy_id: int, market_data: Dict[str, Any],
+                        live_signal: Optional[Dict[str, Any]], live_ns: int) -> None:
+        """Feed an event the live version just evaluated to its shadow, if any."""
+        run = self._shadows.get(strategy_id)
+        if run is None or run.status != shadow.RUNNING:
+            return
+        if run.pending is not None:
+            run.skipped += 1
+            return
+        future = run.pending = asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), run.evaluate, market_data
+        )
+
+        def done(result: asyncio.Future) -> None:
+            run.pending = None
+            try:
+                shadow_signal, shadow_ns = result.result()
+            except Exception as e:
+                run.errors += 1
+                run.error = str(e)
+                return
+            run.record(live_signal, live_ns, shadow_signal, shadow_ns)
+
+        future.add_done_callback(done)
+
+    async def promote_shadow(self, strategy_id: int, serve: bool = True) -> Optional[shadow.ShadowRun]:
+        """Make the shadow instance the live one without rebuilding it."""
+        run = self._shadows.get(strategy_id)
+        if run is None or run.status != shadow.RUNNING:
+            return None
+        del self._shadows[strategy_id]
+        if run.pending is not None:
+            # Never let the worker thread and the live path share the instance
+            await asyncio.wait([run.pending])
+        if serve:
+            entry = self._entries.get(strategy_id)
+            if entry is None:
+                entry = self._entries[strategy_id] = PoolEntry(strategy_id)
+            entry.removed = False
+            entry.error = None
+            self._publish(entry, run.instance, run.fingerprint)
+            logger.info(f"Promoted shadow of strategy {strategy_id}{self._version_label(run.fingerprint)}")
+        return run
+
+    # -- eviction ------------------------------------------------------------
+
+    def unload(self, strategy_id: int) -> None:
+        """Drop the instance; an in-flight load is discarded when it finishes."""
+        self.manager.loaded_strategies.pop(strategy_id, None)
+        self._shadows.pop(strategy_id, None)
+        entry = self._entries.pop(strategy_id, None)
+        if entry is not None:
+            entry.removed = True
+
+    def evict(self, now: Optional[float] = None) -> List[int]:
+        """Unload idle strategies, then a few LRU ones when over the memory limit.
+
+        Memory evictions only repeat once RSS has grown past where the last
+        ones left it, so memory the allocator kept does not empty the pool.
+        """
+        now = time.monotonic() if now is None else now
+        evicted = []
+        ready = sorted(
+            (entry for entry in self._entries.values() if entry.status == READY),
+            key=lambda entry: entry.last_used,
+        )
+
+        if settings.strategy_idle_ttl > 0:
+            for entry in ready:
+                if entry.strategy_id not in self._pinned and now - entry.last_used >= settings.strategy_idle_ttl:
+                    self.unload(entry.strategy_id)
+                    evicted.append(entry.strategy_id)
+
+        limit = settings.strategy_pool_max_rss_mb
+        rss = current_rss_mb() if limit > 0 else None
+        if rss is not None and rss <= limit:
+            self._evicted_at_rss = None
+        elif rss is not None and (self._evicted_at_rss is None or rss > self._evicted_at_rss):
+            self._evicted_at_rss = rss
+            excess = rss - limit
+            # Unpinned strategies go first, least recently used first within each group
+            candidates = sorted(
+                (entry for entry in ready if entry.strategy_id not in evicted),
+                key=lambda entry: entry.strategy_id in self._pinned,
+            )
+            for entry in candidates[:max(settings.strategy_max_evictions, 1)]:
+                self.unload(entry.strategy_id)
+                evicted.append(entry.strategy_id)
+                excess -= entry.rss_delta_mb or 0.0
+                if excess <= 0:
+                    break
+
+        if evicted:
+            logger.info(f"Evicted strategies {evicted}")
+        return evicted
+
+    async def _run_eviction(self) -> None:
+        while True:
+            await asyncio.sleep(settings.strategy_eviction_interval)
+            try:
+                if self.evict():
+                    # Once per pass and off the event loop
+                    await asyncio.to_thread(gc.collect)
+            except Exception as e:
+                logger.error(f"Strategy eviction failed: {e}")
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [entry.to_dict() for entry in sorted(self._entries.values(), key=lambda e: e.strategy_id)]
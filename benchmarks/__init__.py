@@ -0,0 +1,11 @@
+"""
+Performance benchmarks for the streaming and backtesting paths.
+
+These are standalone harnesses, not tests: they run against synthetic data
+and local sinks (no broker, gateway or database) and write machine-readable
+JSON results so runs can be compared over time.
+
+    python -m benchmarks.streaming --symbols 1,10,50 --duration 10 --output results/streaming.json
+    python -m benchmarks.backtest --suite quick --check
+    python -m benchmarks.synthetic --symbols 10 --ticks 100000 --output ticks.csv
+"""
@@ -0,0 +1,277 @@
+"""
+Backtesting engine benchmark suite.
+
+Runs standard scenarios (symbol count x bar size x date span x strategy type)
+against seeded synthetic bars, each in a fresh process so peak RSS is
+per-scenario. The real ``StrategyManager`` loaders are used for the Python
+strategy (``benchmarks/strategies/sma_crossover.py``) and for an ``ml_model``
+strategy backed by a small pickled scikit-learn model; the database is never
+touched, since ``BacktestingEngine.simulate`` is driven directly.
+
+Recorded per scenario:
+
+``bars_per_sec``            symbol-bars simulated per second
+``peak_rss_mb``             peak resident set size of the scenario process
+``time_to_first_result_s``  from strategy load and panel alignment until the
+                            first progress callback, i.e. when a job first
+                            reports back
+
+Baselines live in ``benchmarks/baselines/backtest.json``; record them on the
+reference machine with ``--save-baseline`` and gate changes with ``--check``,
+which exits non-zero when a metric regresses past its threshold.
+
+    python -m benchmarks.backtest --suite quick
+    python -m benchmarks.backtest --suite full --output results/backtest.json --check
+    python -m benchmarks.backtest --suite full --save-baseline
+"""
+
+import argparse
+import multiprocessing
+import os
+import pickle
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+from .common import (baseline_from_results, build_report, check_against_baseline, read_json,
+                     write_report)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baselines", "backtest.json")
+PYTHON_STRATEGY = os.path.join(HERE, "strategies", "sma_crossover.py")
+
+BAR_SECONDS = {"1H": 3600, "1m": 60}
+SPAN_DAYS = {"1M": 30, "1Y": 365, "5Y": 5 * 365}
+
+# (strategy, timeframe, symbols, span)
+QUICK = [
+    ("python", "1H", 1, "1M"),
+    ("python", "1H", 10, "1Y"),
+    ("python", "1m", 1, "1M"),
+    ("ml_model", "1H", 1, "1Y"),
+]
+FULL = QUICK + [
+    ("python", "1H", 1, "5Y"),
+    ("python", "1H", 50, "1Y"),
+    ("python", "1H", 50, "5Y"),
+    ("python", "1m", 10, "1M"),
+    ("python", "1m", 50, "1M"),
+    ("ml_model", "1H", 10, "1Y"),
+    ("ml_model", "1m", 1, "1M"),
+]
+SUITES = {"quick": QUICK, "full": FULL}
+
+# Gated metrics and which direction is better
+DIRECTIONS = {"bars_per_sec": "higher", "peak_rss_mb": "lower", "time_to_first_result_s": "lower"}
+DEFAULT_THRESHOLDS = {"bars_per_sec": 0.15, "peak_rss_mb": 0.20, "time_to_first_result_s": 0.25}
+
+
+def scenario_name(strategy: str, timeframe: str, symbols: int, span: str) -> str:
+    return f"{strategy}-{timeframe}-{symbols}sym-{span}"
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# -- synthetic data -----------------------------------------------------------
+
+def make_bars(symbols: List[str], timeframe: str, span: str, seed: int):
+    """Seeded geometric random-walk OHLCV frames, one per symbol."""
+    import numpy as np
+    import pandas as pd
+
+    from .synthetic import BASE_PRICES, START_TIMESTAMP
+
+    steps = SPAN_DAYS[span] * 86400 // BAR_SECONDS[timeframe]
+    index = pd.date_range(pd.Timestamp(START_TIMESTAMP, unit="s"), periods=steps,
+                          freq=pd.Timedelta(seconds=BAR_SECONDS[timeframe]))
+    rng = np.random.default_rng(seed)
+    vol = 0.0015 * np.sqrt(BAR_SECONDS[timeframe] / 3600)
+
+    frames = {}
+    for i, symbol in enumerate(symbols):
+        base = BASE_PRICES.get(symbol, 1.0 + 0.01 * i)
+        returns = rng.normal(0.0, vol, steps)
+        close = base * np.exp(np.cumsum(returns))
+        open_ = np.concatenate(([base], close[:-1]))
+        wick = np.abs(rng.normal(0.0, vol / 2, (2, steps))) * close
+        frames[symbol] = pd.DataFrame({
+            "open": open_,
+            "high": np.maximum(open_, close) + wick[0],
+            "low": np.minimum(open_, close) - wick[1],
+            "close": close,
+            "volume": rng.integers(100_000, 1_000_000, steps).astype(np.float64),
+        }, index=index)
+    return frames
+
+
+def train_model(frames, path: str, feature_count: int, seed: int) -> None:
+    """Fit a small 3-class (BUY/SELL/HOLD) classifier on the wrapper's features."""
+    import numpy as np
+    from sklearn.linear_model import LogisticRegression
+
+    columns = []
+    for frame in frames.values():
+        columns += [frame["close"], frame["volume"], frame["high"] - frame["low"], frame["close"] - frame["open"]]
+    features = np.column_stack(columns)[:, :feature_count]
+    future = np.sign(np.diff(next(iter(frames.values()))["close"].to_numpy(), append=np.nan))
+    labels = np.where(future > 0, 0, np.where(future < 0, 1, 2))
+
+    sample = np.random.default_rng(seed).choice(len(features), size=min(len(features), 5000), replace=False)
+    model = LogisticRegression(max_iter=500).fit(features[sample], labels[sample])
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+
+
+# -- scenario process ---------------------------------------------------------
+
+def _strategy_record(kind: str, frames, workdir: str, seed: int):
+    """An unsaved ``Strategy`` row for the loaders; trains the model for ml_model."""
+    from ai_core.database.models import Strategy
+
+    if kind == "python":
+        return Strategy(id=0, name="bench-sma", strategy_type="python",
+                        file_path=PYTHON_STRATEGY, parameters={"fast": 10, "slow": 30})
+    feature_count = min(4 * len(frames), 50)
+    model_path = os.path.join(workdir, "model.pkl")
+    train_model(frames, model_path, feature_count, seed)
+    return Strategy(id=0, name="bench-ml", strategy_type="ml_model", file_path=model_path,
+                    parameters={"model_type": "sklearn", "feature_count": feature_count})
+
+
+def _build_strategy(record) -> Any:
+    from ai_core.strategy_engine.rule_based import StrategyManager
+
+    return StrategyManager().build_strategy(record)
+
+
+def run_scenario(strategy: str, timeframe: str, symbols: int, span: str, seed: int) -> Dict[str, Any]:
+    """Scenario process entry point."""
+    # Keep per-bar progress logging out of the measurement unless asked for
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from ai_core.backtesting.engine import BacktestingEngine
+    from ai_core.backtesting.panel import MarketPanel
+
+    from .synthetic import symbol_names
+
+    frames = make_bars(symbol_names(symbols), timeframe, span, seed)
+    engine = BacktestingEngine()
+    rss_before = _peak_rss_mb()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        record = _strategy_record(strategy, frames, workdir, seed)
+        started = time.perf_counter()
+        strategy_instance = _build_strategy(record)
+        panel = MarketPanel.from_frames(frames)
+        del frames
+        setup_done = time.perf_counter()
+
+        first_result = []
+
+        def on_progress(fraction: float) -> None:
+            if not first_result:
+                first_result.append(time.perf_counter())
+
+        state = engine.simulate(strategy_instance, panel, 100_000, on_progress)
+        simulated = time.perf_counter()
+        metrics = engine._calculate_backtest_metrics(state, 100_000)
+        finished = time.perf_counter()
+
+    bars = int(panel.valid.sum())
+    simulate_s = simulated - setup_done
+    return {
+        "scenario": scenario_name(strategy, timeframe, symbols, span),
+        "strategy": strategy,
+        "timeframe": timeframe,
+        "symbols": symbols,
+        "span": span,
+        "steps": len(panel),
+        "bars": bars,
+        "trades": len(state["trades"]),
+        "setup_s": setup_done - started,
+        "time_to_first_result_s": (first_result[0] if first_result else simulated) - started,
+        "simulate_s": simulate_s,
+        "metrics_s": finished - simulated,
+        "total_s": finished - started,
+        "bars_per_sec": bars / simulate_s if simulate_s else 0.0,
+        "steps_per_sec": len(panel) / simulate_s if simulate_s else 0.0,
+        "baseline_rss_mb": rss_before,
+        "peak_rss_mb": _peak_rss_mb(),
+        "final_capital": metrics.get("final_capital"),
+    }
+
+
+def run_suite(scenarios, seed: int) -> List[Dict[str, Any]]:
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for scenario in scenarios:
+        name = scenario_name(*scenario)
+        # A fresh process per scenario keeps peak RSS and warm caches independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            try:
+                result = pool.submit(run_scenario, *scenario, seed).result()
+            except Exception as e:
+                result = {"scenario": name, "error": f"{type(e).__name__}: {e}"}
+        results.append(result)
+        if "error" in result:
+            print(f"{name:>28} | ERROR {result['error']}", file=sys.stderr)
+        else:
+            print(f"{name:>28} | {result['bars_per_sec']:>10.0f} bars/s | {result['peak_rss_mb']:>7.0f} MB | "
+                  f"first result {result['time_to_first_result_s']:.2f}s", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtesting engine benchmark suite")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--only", help="Comma separated scenario names to run (default: whole suite)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="JSON output path (default: stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file for --check/--save-baseline")
+    parser.add_argument("--check", action="store_true", help="Fail if a metric regresses past its threshold")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    scenarios = SUITES[args.suite]
+    if args.only:
+        wanted = {name.strip() for name in args.only.split(",")}
+        scenarios = [s for s in scenarios if scenario_name(*s) in wanted]
+        if not scenarios:
+            parser.error("No scenarios match --only")
+
+    results = run_suite(scenarios, args.seed)
+    config = {"suite": args.suite, "scenarios": [scenario_name(*s) for s in scenarios], "seed": args.seed}
+    report = build_report("backtest", config, results)
+
+    failed = [r["scenario"] for r in results if "error" in r]
+    if args.check:
+        if not os.path.exists(args.baseline):
+            parser.error(f"Baseline file not found: {args.baseline} (record one with --save-baseline)")
+        report["checks"] = check_against_baseline(results, read_json(args.baseline), DIRECTIONS)
+        for check in report["checks"]:
+            if check["regressed"]:
+                print(f"REGRESSED {check['scenario']} {check['metric']}: {check['baseline']:.4g} -> "
+                      f"{check['current']:.4g} ({check['change']:+.1%}, allowed {check['threshold']:.0%})",
+                      file=sys.stderr)
+    write_report(report, args.output)
+
+    if args.save_baseline:
+        previous = read_json(args.baseline) if os.path.exists(args.baseline) else {}
+        thresholds = {**DEFAULT_THRESHOLDS, **previous.get("thresholds", {})}
+        baseline = baseline_from_results(results, list(DIRECTIONS), thresholds)
+        # Scenarios not run this time keep their previous baseline
+        baseline["results"] = {**previous.get("results", {}), **baseline["results"]}
+        write_report(baseline, args.baseline)
+
+    if failed or any(check["regressed"] for check in report.get("checks", ())):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
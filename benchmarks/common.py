@@ -0,0 +1,126 @@
+"""Shared helpers for benchmark harnesses: latency summaries and result files."""
+
+import json
+import math
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+PERCENTILES = (50.0, 99.0, 99.9)
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100))
+    return float(sorted_values[min(rank, len(sorted_values)) - 1])
+
+
+def _pct_key(pct: float) -> str:
+    # 50 -> p50, 99 -> p99, 99.9 -> p999
+    return "p" + f"{pct:g}".replace(".", "")
+
+
+def summarize_ns(samples_ns: List[int]) -> Dict[str, Any]:
+    """Latency summary in microseconds for a list of nanosecond samples."""
+    if not samples_ns:
+        return {"count": 0}
+    ordered = sorted(samples_ns)
+    summary: Dict[str, Any] = {"count": len(ordered)}
+    for pct in PERCENTILES:
+        summary[_pct_key(pct) + "_us"] = percentile(ordered, pct) / 1_000
+    summary["mean_us"] = sum(ordered) / len(ordered) / 1_000
+    summary["max_us"] = ordered[-1] / 1_000
+    return summary
+
+
+def environment() -> Dict[str, Any]:
+    """Host details recorded with every result set so runs are comparable."""
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def build_report(benchmark: str, config: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "benchmark": benchmark,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "config": config,
+        "results": results,
+    }
+
+
+def write_report(report: Dict[str, Any], output: Optional[str]) -> None:
+    """Write the report as JSON to ``output``, or to stdout when not given."""
+    text = json.dumps(report, indent=2, default=str)
+    if not output:
+        print(text)
+        return
+    path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text + "\n")
+    print(f"Results written to {path}", file=sys.stderr)
+
+
+def parse_int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def check_against_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any],
+                           directions: Dict[str, str], key: str = "scenario") -> List[Dict[str, Any]]:
+    """Compare results with stored baselines.
+
+    ``directions`` maps each gated metric to ``"higher"`` or ``"lower"``
+    (which way is better). ``baseline["thresholds"][metric]`` is the allowed
+    relative regression, e.g. 0.15 lets throughput drop by 15%. Returns one
+    entry per gated metric; entries with ``"regressed": True`` fail the check.
+    """
+    thresholds = baseline.get("thresholds", {})
+    stored = baseline.get("results", {})
+    checks = []
+    for result in results:
+        reference = stored.get(result[key])
+        if reference is None:
+            checks.append({key: result[key], "metric": None, "status": "no baseline", "regressed": False})
+            continue
+        for metric, direction in directions.items():
+            current, expected = result.get(metric), reference.get(metric)
+            if current is None or not expected:
+                continue
+            change = (current - expected) / expected
+            allowed = thresholds.get(metric, 0.1)
+            regressed = change < -allowed if direction == "higher" else change > allowed
+            checks.append({
+                key: result[key],
+                "metric": metric,
+                "baseline": expected,
+                "current": current,
+                "change": change,
+                "threshold": allowed,
+                "status": "REGRESSED" if regressed else "ok",
+                "regressed": regressed,
+            })
+    return checks
+
+
+def baseline_from_results(results: List[Dict[str, Any]], metrics: List[str], thresholds: Dict[str, float],
+                          key: str = "scenario") -> Dict[str, Any]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "thresholds": thresholds,
+        "results": {result[key]: {m: result.get(m) for m in metrics} for result in results if "error" not in result},
+    }
+
+
+def read_json(path: str) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text())
@@ -0,0 +1,126 @@
+"""
+Local WebSocket sink standing in for the Node gateway.
+
+The sink runs in its own process so that receiving and parsing messages does
+not compete with the pipeline under test for the interpreter. It counts
+messages and bytes, and when a message carries a ``bench_ns`` field
+(``time.monotonic_ns()`` taken when the tick entered the pipeline) it records
+the end-to-end delivery latency. ``CLOCK_MONOTONIC`` is system-wide, so the
+timestamps are comparable across processes.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import time
+from typing import Any, Dict, List
+
+import websockets
+
+
+class _SinkServer:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.messages = 0
+        self.bytes = 0
+        self.latencies_ns: List[int] = []
+        self.first_ns = 0
+        self.last_ns = 0
+
+    async def handler(self, websocket, path=None):
+        async for raw in websocket:
+            now = time.monotonic_ns()
+            if not self.first_ns:
+                self.first_ns = now
+            self.last_ns = now
+            self.messages += 1
+            self.bytes += len(raw)
+            try:
+                sent = json.loads(raw).get("bench_ns")
+            except (ValueError, AttributeError):
+                sent = None
+            if sent:
+                self.latencies_ns.append(now - sent)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "first_ns": self.first_ns,
+            "last_ns": self.last_ns,
+            "latencies_ns": self.latencies_ns,
+        }
+
+
+async def _serve(conn) -> None:
+    sink = _SinkServer()
+    async with websockets.serve(sink.handler, "127.0.0.1", 0, max_size=None) as server:
+        port = server.sockets[0].getsockname()[1]
+        conn.send(port)
+        loop = asyncio.get_running_loop()
+        while True:
+            command = await loop.run_in_executor(None, conn.recv)
+            if command == "stats":
+                conn.send(sink.stats())
+                sink.reset()
+            elif command == "stop":
+                break
+
+
+def _run(conn) -> None:
+    asyncio.run(_serve(conn))
+
+
+class WebSocketSink:
+    """Handle on a sink process; use as a context manager."""
+
+    def __init__(self):
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        self._process = ctx.Process(target=_run, args=(child,), daemon=True)
+        self.port = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/ws"
+
+    def start(self) -> "WebSocketSink":
+        self._process.start()
+        self.port = self._conn.recv()
+        return self
+
+    def collect(self) -> Dict[str, Any]:
+        """Return what was received since the last call and reset the counters."""
+        self._conn.send("stats")
+        return self._conn.recv()
+
+    async def drain(self, expected: int, timeout: float = 10.0) -> Dict[str, Any]:
+        """Wait (up to ``timeout``) for ``expected`` messages, then collect."""
+        deadline = time.monotonic() + timeout
+        received = await asyncio.to_thread(self.collect)
+        while received["messages"] < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            more = await asyncio.to_thread(self.collect)
+            received = {
+                "messages": received["messages"] + more["messages"],
+                "bytes": received["bytes"] + more["bytes"],
+                "first_ns": received["first_ns"] or more["first_ns"],
+                "last_ns": more["last_ns"] or received["last_ns"],
+                "latencies_ns": received["latencies_ns"] + more["latencies_ns"],
+            }
+        return received
+
+    def stop(self) -> None:
+        if self._process.is_alive():
+            self._conn.send("stop")
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+
+    def __enter__(self) -> "WebSocketSink":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,31 @@
+"""Moving-average crossover used as the benchmark's Python strategy.
+
+Loaded by file path through ``StrategyManager`` like any user strategy, so it
+only depends on the standard library.
+"""
+
+from collections import deque
+
+
+class Strategy:
+    def __init__(self, parameters):
+        self.fast = int(parameters.get('fast', 10))
+        self.slow = int(parameters.get('slow', 30))
+        self.closes = {}
+        self.state = {}
+
+    def predict(self, market_data):
+        signals = []
+        for symbol, bar in market_data.items():
+            window = self.closes.setdefault(symbol, deque(maxlen=self.slow))
+            window.append(bar['close'])
+            if len(window) < self.slow:
+                continue
+
+            fast = sum(list(window)[-self.fast:]) / self.fast
+            slow = sum(window) / self.slow
+            direction = 'BUY' if fast > slow else 'SELL'
+            if self.state.get(symbol) != direction:
+                self.state[symbol] = direction
+                signals.append({'symbol': symbol, 'signal': direction, 'confidence': 0.6})
+        return signals
@@ -0,0 +1,216 @@
+"""
+End-to-end streaming throughput and latency benchmark.
+
+Drives synthetic ticks through the real processing code and a local
+WebSocket sink (see :mod:`benchmarks.sink`), for each requested symbol count:
+
+``ibkr_streaming``
+    The per-tick loop of ``ibkr_streaming.run``: ingest (synthetic quote to tick),
+    candle (``CandleEngine.update``), microstructure (``MicrostructureEngine``), serialize
+    (``build_tick_message`` + ``json.dumps``) and send.
+
+``ai_core``
+    The ``ai_core`` stream loop: ingest (``MarketEventBus.publish_tick``,
+    including bar aggregation), then batched serialize and send as in
+    ``stream_market_data``.
+
+With ``--rate 0`` (the default) ticks are pushed as fast as the pipeline
+accepts them, which gives the maximum sustainable throughput for that symbol
+count; a positive rate paces ingestion to measure latency under a fixed load.
+Results are written as JSON.
+
+    python -m benchmarks.streaming --symbols 1,10,50 --duration 10 --output results/streaming.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import websockets
+
+from ibkr_streaming.candle_engine import CandleEngine
+from ibkr_streaming.microstructure import MicrostructureEngine
+from ibkr_streaming.ws_push import build_tick_message
+
+from .common import build_report, parse_int_list, summarize_ns, write_report
+from .sink import WebSocketSink
+from .synthetic import SyntheticTickSource, symbol_names
+
+PIPELINES = ("ibkr_streaming", "ai_core")
+STAGES = {
+    "ibkr_streaming": ("ingest", "candle", "microstructure", "serialize", "send"),
+    "ai_core": ("ingest", "serialize", "send"),
+}
+
+now_ns: Callable[[], int] = time.monotonic_ns
+
+
+async def _pace(started_ns: int, count: int, rate: float) -> None:
+    """Sleep until ``count`` ticks are due at ``rate`` ticks/second (0 = unpaced)."""
+    if rate <= 0:
+        await asyncio.sleep(0)
+        return
+    delay = (started_ns + count * 1e9 / rate - now_ns()) / 1e9
+    await asyncio.sleep(max(delay, 0))
+
+
+async def run_ibkr_streaming(symbols: List[str], duration: float, rate: float,
+                             sink_url: str, seed: int) -> Dict[str, Any]:
+    source = SyntheticTickSource(symbols, seed=seed)
+    candle_engine = CandleEngine(clock=source.clock)
+    micro_engine = MicrostructureEngine()
+    samples: Dict[str, List[int]] = {stage: [] for stage in STAGES["ibkr_streaming"]}
+    ingest, candle, micro_s, serialize, send = (samples[s] for s in STAGES["ibkr_streaming"])
+    ticks = 0
+
+    async with websockets.connect(sink_url, max_size=None) as ws:
+        started = now_ns()
+        deadline = started + int(duration * 1e9)
+        while now_ns() < deadline:
+            for _ in range(len(symbols)):
+                t0 = now_ns()
+                tick = source.next_tick()
+                t1 = now_ns()
+                candles = candle_engine.update(tick)
+                t2 = now_ns()
+                micro = micro_engine.update(tick)
+                t3 = now_ns()
+                message = build_tick_message(tick["symbol"], tick, candles, micro, candle_engine.clock)
+                message["bench_ns"] = t0
+                payload = json.dumps(message)
+                t4 = now_ns()
+                await ws.send(payload)
+                t5 = now_ns()
+
+                ingest.append(t1 - t0)
+                candle.append(t2 - t1)
+                micro_s.append(t3 - t2)
+                serialize.append(t4 - t3)
+                send.append(t5 - t4)
+                ticks += 1
+            await _pace(started, ticks, rate)
+        elapsed = (now_ns() - started) / 1e9
+
+    return {"ticks": ticks, "messages_sent": ticks, "elapsed_s": elapsed, "dropped": 0, "samples": samples}
+
+
+async def run_ai_core(symbols: List[str], duration: float, rate: float,
+                      sink_url: str, seed: int) -> Dict[str, Any]:
+    # Imported lazily so the ibkr_streaming pipeline can run without ai_core's settings
+    from ai_core.strategy_engine.market_data.event_bus import MarketEventBus
+
+    bus = MarketEventBus()
+    subscription = bus.subscribe(symbols)
+    source = SyntheticTickSource(symbols, seed=seed)
+    samples: Dict[str, List[int]] = {stage: [] for stage in STAGES["ai_core"]}
+    produced = asyncio.Event()
+    counts = {"ticks": 0, "messages": 0}
+
+    async def produce():
+        started = now_ns()
+        deadline = started + int(duration * 1e9)
+        while now_ns() < deadline:
+            for _ in range(len(symbols)):
+                t0 = now_ns()
+                tick = source.next_tick()
+                tick["bench_ns"] = t0
+                bus.publish_tick(tick["symbol"], tick)
+                samples["ingest"].append(now_ns() - t0)
+                counts["ticks"] += 1
+            await _pace(started, counts["ticks"], rate)
+        produced.set()
+
+    async def consume(ws):
+        while True:
+            try:
+                events = await asyncio.wait_for(subscription.get_batch(max_items=len(symbols) * 8), 0.25)
+            except asyncio.TimeoutError:
+                if produced.is_set():
+                    return
+                continue
+            t0 = now_ns()
+            market_update = {
+                'type': 'market_data',
+                'data': {event.symbol: event.data for event in events},
+                'signals': [],
+                'timestamp': datetime.now().isoformat(),
+                'bench_ns': min(event.data['bench_ns'] for event in events),
+            }
+            payload = json.dumps(market_update)
+            t1 = now_ns()
+            await ws.send(payload)
+            samples["serialize"].append(t1 - t0)
+            samples["send"].append(now_ns() - t1)
+            counts["messages"] += 1
+
+    async with websockets.connect(sink_url, max_size=None) as ws:
+        started = now_ns()
+        await asyncio.gather(produce(), consume(ws))
+        elapsed = (now_ns() - started) / 1e9
+    subscription.close()
+
+    return {"ticks": counts["ticks"], "messages_sent": counts["messages"], "elapsed_s": elapsed,
+            "dropped": subscription.dropped, "samples": samples}
+
+
+RUNNERS = {"ibkr_streaming": run_ibkr_streaming, "ai_core": run_ai_core}
+
+
+async def run_benchmark(pipelines: List[str], symbol_counts: List[int], duration: float,
+                        rate: float, seed: int) -> List[Dict[str, Any]]:
+    results = []
+    with WebSocketSink() as sink:
+        for pipeline in pipelines:
+            for count in symbol_counts:
+                await asyncio.to_thread(sink.collect)  # Reset sink counters
+                run = await RUNNERS[pipeline](symbol_names(count), duration, rate, sink.url, seed)
+                received = await sink.drain(run["messages_sent"])
+                elapsed = run["elapsed_s"]
+                results.append({
+                    "pipeline": pipeline,
+                    "symbols": count,
+                    "target_rate_tps": rate or None,
+                    "elapsed_s": elapsed,
+                    "ticks": run["ticks"],
+                    "throughput_tps": run["ticks"] / elapsed if elapsed else 0.0,
+                    "messages_sent": run["messages_sent"],
+                    "messages_received": received["messages"],
+                    "bytes_received": received["bytes"],
+                    "dropped": run["dropped"],
+                    "stages": {stage: summarize_ns(values) for stage, values in run["samples"].items()},
+                    "end_to_end": summarize_ns(received["latencies_ns"]),
+                })
+                print(f"{pipeline:>15} | {count:>4} symbols | {results[-1]['throughput_tps']:>10.0f} ticks/s | "
+                      f"e2e p99 {results[-1]['end_to_end'].get('p99_us', float('nan')):.0f}us", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming throughput and latency benchmark")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES),
+                        help=f"Comma separated subset of {', '.join(PIPELINES)}")
+    parser.add_argument("--symbols", type=parse_int_list, default=[1, 5, 10, 50],
+                        help="Comma separated symbol counts (default: 1,5,10,50)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per run")
+    parser.add_argument("--rate", type=float, default=0.0, help="Target ticks/second, 0 = as fast as possible")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="JSON output path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    pipelines = [p.strip() for p in args.pipelines.split(",") if p.strip()]
+    unknown = set(pipelines) - set(PIPELINES)
+    if unknown:
+        parser.error(f"Unknown pipelines: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run_benchmark(pipelines, args.symbols, args.duration, args.rate, args.seed))
+    config = {"pipelines": pipelines, "symbols": args.symbols, "duration_s": args.duration,
+              "rate_tps": args.rate, "seed": args.seed}
+    write_report(build_report("streaming", config, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Deterministic synthetic market data for benchmarks.
+
+``SyntheticTickSource`` produces ticks in the same shape as
+``TickStreamer.get_ticks()`` from a seeded random walk per symbol, with a
+synthetic clock that advances a fixed step per round so candles roll over at
+a realistic rate. Run as a module to write a recording that
+``ReplayTickStreamer`` can play back.
+"""
+
+import argparse
+import csv
+import random
+from typing import Dict, Iterator, List, Optional
+
+from ibkr_streaming.replay import ReplayClock
+
+BASE_PRICES = {
+    "EURUSD": 1.0850,
+    "GBPUSD": 1.2650,
+    "XAUUSD": 2350.0,
+    "USDJPY": 151.50,
+    "USDCAD": 1.3650,
+}
+START_TIMESTAMP = 1_704_067_200.0  # 2024-01-01 00:00:00 UTC
+
+
+def symbol_names(count: int) -> List[str]:
+    """The real symbols first, then numbered synthetic ones."""
+    names = list(BASE_PRICES)[:count]
+    names += [f"SYN{i:03d}" for i in range(count - len(names))]
+    return names
+
+
+class SyntheticTickSource:
+    """Round-robin random-walk quotes for ``symbols``.
+
+    Every call to :meth:`next_tick` returns one symbol's next tick; after a
+    full round over all symbols the clock advances by ``step`` seconds.
+    """
+
+    def __init__(self, symbols: List[str], seed: int = 7, step: float = 0.25,
+                 start: float = START_TIMESTAMP, clock: Optional[ReplayClock] = None):
+        self.symbols = list(symbols)
+        self.step = step
+        self.clock = clock or ReplayClock(start)
+        self._rng = random.Random(seed)
+        self._mids = {sym: BASE_PRICES.get(sym, 1.0 + 0.01 * i) for i, sym in enumerate(self.symbols)}
+        self._index = 0
+        self._timestamp = start
+
+    def next_tick(self) -> dict:
+        sym = self.symbols[self._index]
+        self._index += 1
+        if self._index == len(self.symbols):
+            self._index = 0
+            self._timestamp += self.step
+
+        mid = self._mids[sym] * (1.0 + self._rng.gauss(0.0, 0.00005))
+        self._mids[sym] = mid
+        half_spread = mid * 0.00005 * (1.0 + self._rng.random())
+        bid, ask = mid - half_spread, mid + half_spread
+        self.clock.advance_to(self._timestamp)
+        return {
+            "symbol": sym,
+            "bid": bid,
+            "ask": ask,
+            "mid": (bid + ask) / 2.0,
+            "spread": ask - bid,
+            "bid_size": float(self._rng.randint(1, 50) * 100_000),
+            "ask_size": float(self._rng.randint(1, 50) * 100_000),
+            "timestamp": self._timestamp,
+        }
+
+    def ticks(self, count: int) -> Iterator[dict]:
+        for _ in range(count):
+            yield self.next_tick()
+
+    def get_ticks(self) -> Dict[str, dict]:
+        """One full round, shaped like ``TickStreamer.get_ticks()``."""
+        return {tick["symbol"]: tick for tick in self.ticks(len(self.symbols))}
+
+
+def write_ticks(path: str, symbols: int, ticks: int, seed: int = 7, step: float = 0.25) -> None:
+    """Write a CSV recording of ``ticks`` synthetic ticks for replay."""
+    source = SyntheticTickSource(symbol_names(symbols), seed=seed, step=step)
+    fields = ["timestamp", "symbol", "bid", "ask", "bid_size", "ask_size"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(source.ticks(ticks))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic tick recording")
+    parser.add_argument("--symbols", type=int, default=5)
+    parser.add_argument("--ticks", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--step", type=float, default=0.25, help="Seconds of market time per round of symbols")
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args(argv)
+    write_ticks(args.output, args.symbols, args.ticks, args.seed, args.step)
+
+
+if __name__ == "__main__":
+    main()
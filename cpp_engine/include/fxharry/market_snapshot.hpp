@@ -0,0 +1,203 @@
+/**
+ * Reader for the shared-memory market snapshot written by the AI core
+ * (ai_core/strategy_engine/market_data/shared_snapshot.py).
+ *
+ * The region holds the latest quote and the current bar per timeframe for
+ * every streamed symbol. Each symbol slot is guarded by a seqlock, so reads
+ * never block the writer and never return a half-written quote.
+ *
+ *   fxharry::market_data::SnapshotReader snapshot(std::getenv("FXHARRY_MARKET_SNAPSHOT"));
+ *   fxharry::market_data::SymbolSnapshot eurusd;
+ *   if (snapshot.read("EURUSD", eurusd)) { ... eurusd.quote.bid ... }
+ *
+ * Header-only, POSIX (shm_open + mmap). Link with -lrt on older glibc.
+ */
+
+#pragma once
+
+#include <atomic>
+#include <cmath>
+#include <cstdint>
+#include <cstring>
+#include <stdexcept>
+#include <string>
+#include <thread>
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+namespace fxharry {
+namespace market_data {
+
+constexpr char kSnapshotMagic[4] = {'F', 'X', 'S', 'S'};
+constexpr uint16_t kSnapshotLayoutVersion = 1;  // keep in sync with LAYOUT_VERSION
+constexpr size_t kMaxTimeframes = 8;
+constexpr size_t kSymbolSize = 16;
+
+struct SnapshotHeader {
+    char magic[4];
+    uint16_t layout_version;
+    uint16_t timeframe_count;
+    uint32_t capacity;
+    uint32_t slot_size;
+    uint32_t slots_used;
+    uint32_t writer_pid;
+    uint64_t published;
+    char timeframes[kMaxTimeframes][8];
+    uint8_t reserved1[32];
+};
+static_assert(sizeof(SnapshotHeader) == 128, "header layout mismatch");
+
+struct Quote {
+    double timestamp;  // epoch seconds
+    double bid;        // NaN when unknown
+    double ask;
+    double last;
+    double size;
+};
+
+struct Bar {
+    double bar_start;  // epoch seconds; 0 until the first tick of the bar
+    double open;
+    double high;
+    double low;
+    double close;
+    double volume;
+    uint64_t tick_count;
+    uint64_t reserved;
+};
+static_assert(sizeof(Bar) == 64, "bar layout mismatch");
+
+struct SlotHeader {
+    uint64_t sequence;  // odd while the writer is updating the slot
+    char symbol[kSymbolSize];
+    Quote quote;
+};
+static_assert(sizeof(SlotHeader) == 64, "slot layout mismatch");
+
+struct SymbolSnapshot {
+    std::string symbol;
+    Quote quote;
+    Bar bars[kMaxTimeframes];
+    size_t bar_count = 0;
+};
+
+class SnapshotReader {
+public:
+    explicit SnapshotReader(const char* name) {
+        if (name == nullptr || *name == '\0') {
+            throw std::invalid_argument("market snapshot name is empty");
+        }
+        std::string path = name[0] == '/' ? name : std::string("/") + name;
+        int fd = shm_open(path.c_str(), O_RDONLY, 0);
+        if (fd < 0) {
+            throw std::runtime_error("cannot open market snapshot " + path);
+        }
+        struct stat st;
+        if (fstat(fd, &st) != 0 || static_cast<size_t>(st.st_size) < sizeof(SnapshotHeader)) {
+            close(fd);
+            throw std::runtime_error("market snapshot " + path + " is too small");
+        }
+        size_ = static_cast<size_t>(st.st_size);
+        void* base = mmap(nullptr, size_, PROT_READ, MAP_SHARED, fd, 0);
+        close(fd);
+        if (base == MAP_FAILED) {
+            throw std::runtime_error("cannot map market snapshot " + path);
+        }
+        base_ = static_cast<const uint8_t*>(base);
+
+        const SnapshotHeader* h = header();
+        if (std::memcmp(h->magic, kSnapshotMagic, sizeof(kSnapshotMagic)) != 0 ||
+            h->layout_version != kSnapshotLayoutVersion || h->timeframe_count > kMaxTimeframes ||
+            size_ < sizeof(SnapshotHeader) + static_cast<size_t>(h->capacity) * h->slot_size) {
+            munmap(const_cast<uint8_t*>(base_), size_);
+            throw std::runtime_error("unsupported market snapshot layout in " + path);
+        }
+    }
+
+    ~SnapshotReader() {
+        if (base_ != nullptr) {
+            munmap(const_cast<uint8_t*>(base_), size_);
+        }
+    }
+
+    SnapshotReader(const SnapshotReader&) = delete;
+    SnapshotReader& operator=(const SnapshotReader&) = delete;
+
+    const SnapshotHeader* header() const { return reinterpret_cast<const SnapshotHeader*>(base_); }
+
+    size_t timeframe_count() const { return header()->timeframe_count; }
+
+    std::string timeframe(size_t i) const {
+        return std::string(header()->timeframes[i], strnlen(header()->timeframes[i], 8));
+    }
+
+    uint32_t slots_used() const { return __atomic_load_n(&header()->slots_used, __ATOMIC_ACQUIRE); }
+
+    /** Slot index of ``symbol``, or -1. Indices are stable, so cache them. */
+    int find(const std::string& symbol) const {
+        uint32_t used = slots_used();
+        for (uint32_t i = 0; i < used; ++i) {
+            const char* name = slot(i)->symbol;
+            if (strnlen(name, kSymbolSize) == symbol.size() &&
+                std::memcmp(name, symbol.data(), symbol.size()) == 0) {
+                return static_cast<int>(i);
+            }
+        }
+        return -1;
+    }
+
+    /** Consistent copy of slot ``index``; false if it kept changing for ``max_spins`` tries. */
+    bool read(uint32_t index, SymbolSnapshot& out, int max_spins = 10000) const {
+        if (index >= slots_used()) {
+            return false;
+        }
+        const SlotHeader* s = slot(index);
+        const Bar* bars = reinterpret_cast<const Bar*>(s + 1);
+        size_t bar_count = timeframe_count();
+
+        for (int spin = 0; spin < max_spins; ++spin) {
+            uint64_t before = __atomic_load_n(&s->sequence, __ATOMIC_ACQUIRE);
+            if ((before & 1) == 0) {
+                std::memcpy(&out.quote, &s->quote, sizeof(Quote));
+                std::memcpy(out.bars, bars, bar_count * sizeof(Bar));
+                std::atomic_thread_fence(std::memory_order_acquire);
+                if (__atomic_load_n(&s->sequence, __ATOMIC_RELAXED) == before) {
+                    out.symbol.assign(s->symbol, strnlen(s->symbol, kSymbolSize));
+                    out.bar_count = bar_count;
+                    return true;
+                }
+            }
+            if ((spin & 63) == 63) {
+                std::this_thread::yield();
+            }
+        }
+        return false;
+    }
+
+    bool read(const std::string& symbol, SymbolSnapshot& out) const {
+        int index = find(symbol);
+        return index >= 0 && read(static_cast<uint32_t>(index), out);
+    }
+
+    static double mid(const Quote& quote) {
+        if (std::isnan(quote.bid) || std::isnan(quote.ask)) {
+            return quote.last;
+        }
+        return (quote.bid + quote.ask) / 2.0;
+    }
+
+private:
+    const SlotHeader* slot(uint32_t index) const {
+        return reinterpret_cast<const SlotHeader*>(
+            base_ + sizeof(SnapshotHeader) + static_cast<size_t>(index) * header()->slot_size);
+    }
+
+    const uint8_t* base_ = nullptr;
+    size_t size_ = 0;
+};
+
+} // namespace market_data
+} // namespace fxharry
@@ -0,0 +1,44 @@
+/**
+ * Print the shared market snapshot, e.g. to check what C++ strategies see.
+ * Usage: snapshot_dump [name]   (default: $FXHARRY_MARKET_SNAPSHOT)
+ */
+
+#include <cstdio>
+#include <cstdlib>
+#include <exception>
+
+#include "fxharry/market_snapshot.hpp"
+
+using fxharry::market_data::SnapshotReader;
+using fxharry::market_data::SymbolSnapshot;
+
+int main(int argc, char** argv) {
+    const char* name = argc > 1 ? argv[1] : std::getenv("FXHARRY_MARKET_SNAPSHOT");
+    try {
+        SnapshotReader snapshot(name);
+        std::printf("%llu ticks published, %u symbols\n",
+                    static_cast<unsigned long long>(snapshot.header()->published), snapshot.slots_used());
+
+        SymbolSnapshot s;
+        for (uint32_t i = 0; i < snapshot.slots_used(); ++i) {
+            if (!snapshot.read(i, s)) {
+                continue;
+            }
+            std::printf("%-10s bid %.5f ask %.5f last %.5f @ %.3f\n",
+                        s.symbol.c_str(), s.quote.bid, s.quote.ask, s.quote.last, s.quote.timestamp);
+            for (size_t t = 0; t < s.bar_count; ++t) {
+                const auto& bar = s.bars[t];
+                if (bar.bar_start == 0) {
+                    continue;
+                }
+                std::printf("  %-4s O %.5f H %.5f L %.5f C %.5f V %.2f (%llu ticks)\n",
+                            snapshot.timeframe(t).c_str(), bar.open, bar.high, bar.low, bar.close,
+                            bar.volume, static_cast<unsigned long long>(bar.tick_count));
+            }
+        }
+    } catch (const std::exception& e) {
+        std::fprintf(stderr, "%s\n", e.what());
+        return 1;
+    }
+    return 0;
+}
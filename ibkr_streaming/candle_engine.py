@@ -15,8 +15,10 @@ TIMEFRAMES = {
 }
 
 class CandleEngine:
-    def __init__(self):
+    def __init__(self, clock=None):
         self.candles = defaultdict(dict)
+        # Injectable time source so replays bucket candles by recorded time
+        self.clock = clock or time.time
         logger.info(f"CandleEngine initialized with timeframes: {list(TIMEFRAMES.keys())}")
 
     def update(self, tick):
@@ -27,10 +29,10 @@ class CandleEngine:
         
         # Validate price is not NaN or invalid
         if price is None or (isinstance(price, float) and math.isnan(price)) or price <= 0:
-            logger.warning(f"Invalid price for {symbol}: {price}, skipping candle update")
+            logger.warning("Invalid price for %s: %s, skipping candle update", symbol, price)
             return self.candles
         
-        now = int(time.time())
+        now = int(self.clock())
 
         new_candles = []
         
@@ -47,7 +49,7 @@ class CandleEngine:
                     "timestamp": bucket
                 }
                 new_candles.append(f"{symbol}:{tf}")
-                logger.debug(f"New candle created: {symbol} | {tf} | Bucket: {bucket} | Price: {price}")
+                logger.debug("New candle created: %s | %s | Bucket: %s | Price: %s", symbol, tf, bucket, price)
             else:
                 # Update existing candle
                 c = self.candles[symbol][tf][bucket]
@@ -70,9 +72,9 @@ class CandleEngine:
                 
                 # Log significant price movements
                 if c["high"] != old_high or c["low"] != old_low:
-                    logger.debug(f"Candle updated: {symbol} | {tf} | High: {c['high']} | Low: {c['low']} | Close: {c['close']}")
+                    logger.debug("Candle updated: %s | %s | High: %s | Low: %s | Close: %s", symbol, tf, c["high"], c["low"], c["close"])
 
         if new_candles:
-            logger.info(f"New candles created: {', '.join(new_candles)}")
+            logger.info("New candles created: %s", ", ".join(new_candles))
 
         return self.candles
@@ -1,7 +1,39 @@
 # ibkr_streaming/config.py
 
+import os
+
+
+def _env_map(name, default):
+    """Parse 'logger.name=number,...' into a dict"""
+    pairs = (item.split("=", 1) for item in os.getenv(name, default).split(",") if "=" in item)
+    return {key.strip(): float(value) for key, value in pairs}
+
 IBKR_HOST = "127.0.0.1"
 IBKR_PORT = 7497           # Live: 7496, Paper: 7497
 IBKR_CLIENT_ID = 102       # any unique integer
 
 NODE_GATEWAY_WS_URL = "ws://localhost:8080/ws"
+
+# Prometheus-style /metrics endpoint served by run.py; port 0 disables it
+METRICS_HOST = os.getenv("IBKR_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("IBKR_METRICS_PORT", "9108"))
+
+# Microstructure rolling windows, in ticks per symbol
+MICRO_SHORT_WINDOW = 20    # recent flow: OFI, velocity, quote rate
+MICRO_LONG_WINDOW = 200    # baseline: realized vol, mean depth / spread
+
+# Logging (see logger.py): level applies to every ibkr_streaming logger
+LOG_LEVEL = os.getenv("IBKR_LOG_LEVEL", "INFO").upper()
+LOG_DIR = os.getenv("IBKR_LOG_DIR", "logs")
+LOG_FORMAT = os.getenv("IBKR_LOG_FORMAT", "text").lower()   # text | json
+LOG_CONSOLE = os.getenv("IBKR_LOG_CONSOLE", "false").lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("IBKR_LOG_QUEUE_SIZE", "10000"))  # records beyond this are dropped
+# Hot-path modules: keep 1 in N debug records / at most N records per second per call site
+LOG_SAMPLING = _env_map(
+    "IBKR_LOG_SAMPLING",
+    "ibkr_streaming.tick_stream=100,ibkr_streaming.candle_engine=100,ibkr_streaming.ws_push=100",
+)
+LOG_RATE_LIMITS = _env_map(
+    "IBKR_LOG_RATE_LIMITS",
+    "ibkr_streaming.tick_stream=2,ibkr_streaming.candle_engine=5,ibkr_streaming.ws_push=2",
+)
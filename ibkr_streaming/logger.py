@@ -1,101 +1,249 @@
 """
-Industrial-grade logging configuration for IBKR streaming service.
-Provides file rotation, structured logging, and detailed connection tracking.
+Non-blocking logging configuration for IBKR streaming service.
+
+All ``ibkr_streaming`` loggers share one queue: the calling thread only
+filters the record and enqueues it, while a background listener thread does
+the string formatting and the rotating-file (and optional console) I/O.
+Records keep their ``%``-style arguments until the listener formats them, so
+hot-path calls should pass values as arguments rather than f-strings:
+
+    logger.debug("Tick: %s | Bid: %s", sym, bid)
+
+Hot-path modules get per-module sampling (debug records) and rate limiting
+(below ERROR) so a noisy tick loop cannot flood the queue. Everything is
+configured from the environment, see ``config.py``.
 """
 
+import atexit
+import json
 import logging
 import logging.handlers
-import os
+import queue
+import threading
 import time
 from pathlib import Path
 from datetime import datetime
 
+from .config import (
+    LOG_CONSOLE,
+    LOG_DIR,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    LOG_QUEUE_SIZE,
+    LOG_RATE_LIMITS,
+    LOG_SAMPLING,
+)
+
+ROOT_LOGGER = "ibkr_streaming"
+
+_listener = None
+_queue_handler = None
+_lock = threading.Lock()
+
+
+class MicrosecondFormatter(logging.Formatter):
+    def formatTime(self, record, datefmt=None):
+        ct = self.converter(record.created)
+        t = time.strftime('%Y-%m-%d %H:%M:%S', ct)
+        return '%s.%03d' % (t, record.msecs)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra=`` fields"""
+
+    _reserved = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record):
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in self._reserved:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records unformatted and never block the caller.
 
-def setup_logger(name: str = "ibkr_streaming", log_dir: str = "logs") -> logging.Logger:
+    The stock ``QueueHandler.prepare`` formats the message in the calling
+    thread so records can be pickled; this queue never leaves the process, so
+    formatting is left to the listener. When the queue is full the record is
+    dropped and counted instead of stalling the tick loop.
     """
-    Setup industrial-grade logger with file rotation (no console output).
-    All logs are written to files only.
-    
-    Args:
-        name: Logger name
-        log_dir: Directory to store log files
-        
-    Returns:
-        Configured logger instance
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Pass one in every ``every`` DEBUG records per call site"""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, int(every))
+        self._counts = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.pathname, record.lineno)
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        return count % self.every == 0
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per call site for records below ERROR.
+
+    The first record let through after a suppression carries the number of
+    records dropped in between as ``suppressed``.
     """
-    # Create logs directory if it doesn't exist
+
+    def __init__(self, per_second, burst=None):
+        super().__init__()
+        self.rate = float(per_second)
+        self.burst = float(burst or max(1.0, per_second))
+        self._buckets = {}
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.pathname, record.lineno)
+        now = record.created
+        tokens, last, suppressed = self._buckets.get(key, (self.burst, now, 0))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1.0:
+            self._buckets[key] = (tokens, now, suppressed + 1)
+            return False
+        if suppressed:
+            record.suppressed = suppressed
+        self._buckets[key] = (tokens - 1.0, now, 0)
+        return True
+
+
+def _build_handlers(log_dir):
     log_path = Path(log_dir)
     log_path.mkdir(parents=True, exist_ok=True)
-    
-    # Create logger
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-    
-    # Prevent duplicate handlers
-    if logger.handlers:
-        return logger
-    
-    # Detailed formatter for file logs with microseconds
-    class MicrosecondFormatter(logging.Formatter):
-        def formatTime(self, record, datefmt=None):
-            ct = self.converter(record.created)
-            t = time.strftime('%Y-%m-%d %H:%M:%S', ct)
-            s = '%s.%03d' % (t, record.msecs)
-            return s
-    
-    file_formatter = MicrosecondFormatter(
-        fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s:%(lineno)d | %(message)s'
-    )
-    
+
+    if LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = MicrosecondFormatter(
+            fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s:%(lineno)d | %(message)s'
+        )
+
     # Rotating file handler - 10MB per file, keep 10 backup files
-    log_file = log_path / f"ibkr_streaming_{datetime.now().strftime('%Y%m%d')}.log"
+    suffix = "jsonl" if LOG_FORMAT == "json" else "log"
     file_handler = logging.handlers.RotatingFileHandler(
-        filename=str(log_file),
+        filename=str(log_path / f"ibkr_streaming_{datetime.now().strftime('%Y%m%d')}.{suffix}"),
         maxBytes=10 * 1024 * 1024,  # 10MB
         backupCount=10,
         encoding='utf-8'
     )
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(file_formatter)
-    
-    # Console handler - DISABLED (logs only to files)
-    # console_handler = logging.StreamHandler()
-    # console_handler.setLevel(logging.INFO)
-    # console_handler.setFormatter(console_formatter)
-    
+    file_handler.setFormatter(formatter)
+
     # Error file handler - separate file for errors only
-    error_log_file = log_path / f"ibkr_streaming_errors_{datetime.now().strftime('%Y%m%d')}.log"
     error_handler = logging.handlers.RotatingFileHandler(
-        filename=str(error_log_file),
+        filename=str(log_path / f"ibkr_streaming_errors_{datetime.now().strftime('%Y%m%d')}.{suffix}"),
         maxBytes=5 * 1024 * 1024,  # 5MB
         backupCount=5,
         encoding='utf-8'
     )
     error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(file_formatter)
-    
-    # Add handlers to logger (only file handlers, no console)
-    logger.addHandler(file_handler)
-    # logger.addHandler(console_handler)  # Disabled - logs only to files
-    logger.addHandler(error_handler)
-    
-    # Prevent propagation to root logger
-    logger.propagate = False
-    
-    return logger
+    error_handler.setFormatter(formatter)
+
+    handlers = [file_handler, error_handler]
+    if LOG_CONSOLE:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+    return handlers
+
+
+def configure_logging(log_dir=None):
+    """Install the queue handler and start the listener thread (idempotent)"""
+    global _listener, _queue_handler
+
+    with _lock:
+        if _listener is not None:
+            return
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _queue_handler = LazyQueueHandler(log_queue)
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(LOG_LEVEL)
+        root.handlers = [_queue_handler]
+        # Prevent propagation to root logger
+        root.propagate = False
+
+        for name, every in LOG_SAMPLING.items():
+            logging.getLogger(name).addFilter(SamplingFilter(every))
+        for name, per_second in LOG_RATE_LIMITS.items():
+            logging.getLogger(name).addFilter(RateLimitFilter(per_second))
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, *_build_handlers(log_dir or LOG_DIR), respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def dropped_records():
+    """Records dropped because the queue was full"""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def setup_logger(name: str = ROOT_LOGGER, log_dir: str = None) -> logging.Logger:
+    """Kept for existing callers; all loggers share the one queue-backed setup"""
+    configure_logging(log_dir)
+    return get_logger(name)
 
 
 def get_logger(name: str = None) -> logging.Logger:
     """
-    Get or create a logger instance.
-    
+    Get a logger under the ``ibkr_streaming`` hierarchy.
+
     Args:
-        name: Logger name (defaults to 'ibkr_streaming')
-        
+        name: Logger name (defaults to 'ibkr_streaming'); names outside the
+            package (e.g. ``__main__``) are nested under it
+
     Returns:
         Logger instance
     """
-    if name is None:
-        name = "ibkr_streaming"
-    return setup_logger(name)
-
+    configure_logging()
+    if not name:
+        name = ROOT_LOGGER
+    elif name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + "."):
+        name = f"{ROOT_LOGGER}.{name}"
+    return logging.getLogger(name)
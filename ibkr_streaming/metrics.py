@@ -0,0 +1,16 @@
+# ibkr_streaming/metrics.py
+
+"""Metrics for the streaming service, served by run.py on METRICS_PORT"""
+
+from shared.utils.metrics import REGISTRY, render_prometheus, serve_metrics  # noqa: F401
+
+STAGE_HELP = "Per-stage tick path latency"
+
+INGEST_LATENCY = REGISTRY.histogram("stage_latency_seconds", STAGE_HELP, stage="ingest")
+CANDLE_LATENCY = REGISTRY.histogram("stage_latency_seconds", STAGE_HELP, stage="candle")
+MICRO_LATENCY = REGISTRY.histogram("stage_latency_seconds", STAGE_HELP, stage="microstructure")
+SEND_LATENCY = REGISTRY.histogram("stage_latency_seconds", STAGE_HELP, stage="ws_send")
+
+TICKS_PROCESSED = REGISTRY.counter("ticks_processed_total", "Ticks pushed through the pipeline")
+TICK_ERRORS = REGISTRY.counter("tick_errors_total", "Ticks that failed processing")
+WS_DROPPED = REGISTRY.counter("dropped_total", "Messages dropped", queue="ws_push")
@@ -1,19 +1,201 @@
 # ibkr_streaming/microstructure.py
 
-def compute_microstructure(tick):
-    bid = tick["bid"]
-    ask = tick["ask"]
+"""
+Per-symbol microstructure features, updated in O(1) per tick.
+
+Each symbol keeps its recent history in fixed-size ring buffers (stdlib
+``array('d')``) together with running sums, so a tick only overwrites one
+slot and adjusts a handful of totals. The sums are rebuilt from the buffers
+once per wrap-around to stop floating-point drift, which keeps the cost
+amortized O(1).
+
+Features (short window = recent flow, long window = baseline):
+
+    spread, mid, spread_bps
+    ofi               order-flow imbalance (Cont/Kukanov/Stoikov) summed over the short window
+    ofi_normalized    ofi relative to the average top-of-book depth
+    size_imbalance    (bid_size - ask_size) / (bid_size + ask_size) for this tick
+    tick_velocity_bps mid drift over the short window, in bps per second
+    quote_rate        quote updates per second over the short window
+    realized_vol_bps  sqrt of summed squared mid log-returns over the long window, in bps
+    vol_burst         short-window variance rate / long-window variance rate
+    liquidity_shift   top-of-book depth relative to its long-window mean, minus 1
+    spread_shift      spread relative to its long-window mean, minus 1
+
+Only quote changes are folded in: TickStreamer polls tickers on a timer and
+re-reads unchanged quotes, which would otherwise make quote_rate measure the
+poll rate and dilute velocity and volatility with zero returns. A tick whose
+bid, ask and sizes equal the previous one returns the previous features.
+
+Values that are not defined yet (warm-up, missing sizes, zero elapsed time)
+are None so the message stays valid JSON.
+"""
+
+import math
+from array import array
+
+from .config import MICRO_LONG_WINDOW, MICRO_SHORT_WINDOW
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator > 0 else None
+
+
+class _SymbolState:
+    __slots__ = (
+        "size", "short", "pos", "count",
+        "ts", "mid", "ret2", "ofi", "depth", "spread",
+        "sum_ret2_long", "sum_ret2_short", "sum_ofi", "sum_depth", "sum_spread",
+        "prev_bid", "prev_ask", "prev_bid_size", "prev_ask_size", "prev_mid", "last",
+    )
+
+    def __init__(self, size, short):
+        self.size = size
+        self.short = short
+        self.pos = 0  # slot the next tick is written to
+        self.count = 0  # ticks seen
+        zeros = bytes(8 * size)
+        self.ts = array("d", zeros)
+        self.mid = array("d", zeros)
+        self.ret2 = array("d", zeros)
+        self.ofi = array("d", zeros)
+        self.depth = array("d", zeros)
+        self.spread = array("d", zeros)
+        self.sum_ret2_long = self.sum_ret2_short = 0.0
+        self.sum_ofi = self.sum_depth = self.sum_spread = 0.0
+        self.prev_bid = self.prev_ask = self.prev_mid = None
+        self.prev_bid_size = self.prev_ask_size = 1.0
+        self.last = None  # features returned for the previous quote
+
+    def push(self, ts, mid, ret2, ofi, depth, spread):
+        size, short, i = self.size, self.short, self.pos
+
+        if self.count >= size:  # Slot i holds the value leaving the long window
+            self.sum_ret2_long -= self.ret2[i]
+            self.sum_depth -= self.depth[i]
+            self.sum_spread -= self.spread[i]
+        if self.count >= short:  # Value leaving the short window
+            j = (i - short) % size
+            self.sum_ret2_short -= self.ret2[j]
+            self.sum_ofi -= self.ofi[j]
+
+        self.ts[i] = ts
+        self.mid[i] = mid
+        self.ret2[i] = ret2
+        self.ofi[i] = ofi
+        self.depth[i] = depth
+        self.spread[i] = spread
+        self.sum_ret2_long += ret2
+        self.sum_ret2_short += ret2
+        self.sum_ofi += ofi
+        self.sum_depth += depth
+        self.sum_spread += spread
 
-    return {
-        "spread": ask - bid,
-        "mid": tick["mid"]
-    }
-# This is where we can later add:
+        self.count += 1
+        self.pos = (i + 1) % size
+        if self.pos == 0:
+            self._resum()
 
-# orderflow imbalance
+    def _resum(self):
+        """Rebuild running sums from the (full) buffers; once per wrap-around."""
+        self.sum_ret2_long = math.fsum(self.ret2)
+        self.sum_depth = math.fsum(self.depth)
+        self.sum_spread = math.fsum(self.spread)
+        recent = range(self.size - self.short, self.size)  # pos == 0, so the newest are at the end
+        self.sum_ret2_short = math.fsum(self.ret2[k] for k in recent)
+        self.sum_ofi = math.fsum(self.ofi[k] for k in recent)
 
-# tick velocity
+    def oldest(self, window):
+        """Slot of the oldest tick within the last ``window`` ticks."""
+        return (self.pos - min(self.count, window)) % self.size
 
-# volatility bursts
 
-# liquidity shifts
\ No newline at end of file
+class MicrostructureEngine:
+    """Stateful microstructure features for every symbol on the tick path"""
+
+    def __init__(self, short_window=MICRO_SHORT_WINDOW, long_window=MICRO_LONG_WINDOW):
+        if not 2 <= short_window <= long_window:
+            raise ValueError("Require 2 <= short_window <= long_window")
+        self.short_window = short_window
+        self.long_window = long_window
+        self.states = {}
+
+    def reset(self, symbol=None):
+        if symbol is None:
+            self.states.clear()
+        else:
+            self.states.pop(symbol, None)
+
+    def update(self, tick):
+        """Fold one tick into its symbol's state and return the feature dict"""
+        symbol = tick["symbol"]
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = _SymbolState(self.long_window, self.short_window)
+
+        bid, ask, mid = tick["bid"], tick["ask"], tick["mid"]
+        ts = tick.get("timestamp") or 0.0
+        spread = ask - bid
+        bid_size, ask_size = tick.get("bid_size"), tick.get("ask_size")
+        has_size = bid_size is not None and ask_size is not None
+        # Without sizes every quote counts as one unit, so OFI degrades to quote direction
+        qb, qa = (bid_size, ask_size) if has_size else (1.0, 1.0)
+
+        if (state.last is not None and bid == state.prev_bid and ask == state.prev_ask
+                and qb == state.prev_bid_size and qa == state.prev_ask_size):
+            return state.last  # The same quote polled again, not an update
+
+        if state.prev_mid is None:
+            ret2 = ofi = 0.0
+        else:
+            ret = math.log(mid / state.prev_mid) if state.prev_mid > 0 and mid > 0 else 0.0
+            ret2 = ret * ret
+            ofi = 0.0
+            if bid >= state.prev_bid:
+                ofi += qb
+            if bid <= state.prev_bid:
+                ofi -= state.prev_bid_size
+            if ask <= state.prev_ask:
+                ofi -= qa
+            if ask >= state.prev_ask:
+                ofi += state.prev_ask_size
+
+        state.push(ts, mid, ret2, ofi, qb + qa if has_size else 0.0, spread)
+        state.prev_bid, state.prev_ask, state.prev_mid = bid, ask, mid
+        state.prev_bid_size, state.prev_ask_size = qb, qa
+
+        n_short = min(state.count, self.short_window)
+        n_long = min(state.count, self.long_window)
+        short_oldest = state.oldest(self.short_window)
+        dt_short = ts - state.ts[short_oldest]
+        dt_long = ts - state.ts[state.oldest(self.long_window)]
+        mean_depth = state.sum_depth / n_long
+        mean_spread = state.sum_spread / n_long
+        start_mid = state.mid[short_oldest]
+
+        short_rate = _ratio(max(state.sum_ret2_short, 0.0), dt_short)
+        long_rate = _ratio(max(state.sum_ret2_long, 0.0), dt_long)
+
+        state.last = {
+            "spread": spread,
+            "mid": mid,
+            "spread_bps": spread / mid * 1e4 if mid > 0 else None,
+            "ofi": state.sum_ofi,
+            "ofi_normalized": _ratio(state.sum_ofi, n_short * mean_depth) if has_size else None,
+            "size_imbalance": _ratio(qb - qa, qb + qa) if has_size else None,
+            "tick_velocity_bps": _ratio((mid - start_mid) / start_mid * 1e4, dt_short) if start_mid > 0 else None,
+            "quote_rate": _ratio(n_short - 1, dt_short),
+            "realized_vol_bps": math.sqrt(max(state.sum_ret2_long, 0.0)) * 1e4,
+            "vol_burst": _ratio(short_rate, long_rate) if short_rate is not None and long_rate else None,
+            "liquidity_shift": _ratio(qb + qa, mean_depth) - 1 if has_size and mean_depth > 0 else None,
+            "spread_shift": _ratio(spread, mean_spread) - 1 if mean_spread > 0 else None,
+        }
+        return state.last
+
+
+_default_engine = MicrostructureEngine()
+
+
+def compute_microstructure(tick):
+    """Features for ``tick`` from the module-wide engine"""
+    return _default_engine.update(tick)
@@ -0,0 +1,201 @@
+# ibkr_streaming/replay.py
+
+"""
+Replay recorded ticks through the streaming pipeline without a broker.
+
+ReplayTickStreamer exposes the same interface as TickStreamer
+(initialize / start / get_ticks / next_ticks / subscribed), but reads ticks
+from a CSV or JSON-lines file. Supported columns / keys:
+
+    timestamp  epoch seconds or ISO-8601
+    symbol
+    bid, ask
+    bid_size, ask_size   (optional)
+
+Replay time is taken from the recorded timestamps, never from the wall clock,
+so candles and every derived value are identical between runs regardless of
+speed. ``speed`` only controls pacing: 1.0 is real time, N is N times faster
+and 0 replays as fast as the consumer can go.
+"""
+
+import asyncio
+import csv
+import json
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ReplayClock:
+    """Deterministic clock that follows the timestamp of the last replayed tick"""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+
+    def now(self) -> float:
+        return self._now
+
+    def advance_to(self, timestamp: float):
+        # Never run backwards on out-of-order records
+        if timestamp > self._now:
+            self._now = timestamp
+
+    __call__ = now
+
+
+def _parse_timestamp(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+
+
+def _optional_float(value) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+def read_ticks(path: str, symbols: Optional[Sequence[str]] = None) -> Iterator[dict]:
+    """Yield normalized ticks from a CSV or JSON-lines recording, in file order"""
+    wanted = set(symbols) if symbols else None
+    file_path = Path(path)
+    is_jsonl = file_path.suffix.lower() in (".jsonl", ".ndjson", ".json")
+
+    with file_path.open(newline="") as f:
+        records = (json.loads(line) for line in f if line.strip()) if is_jsonl else csv.DictReader(f)
+        for line_no, record in enumerate(records, start=1):
+            try:
+                symbol = record["symbol"]
+                if wanted is not None and symbol not in wanted:
+                    continue
+                bid = float(record["bid"])
+                ask = float(record["ask"])
+                if math.isnan(bid) or math.isnan(ask) or bid <= 0 or ask <= 0 or ask < bid:
+                    continue
+                yield {
+                    "symbol": symbol,
+                    "bid": bid,
+                    "ask": ask,
+                    "mid": (bid + ask) / 2.0,
+                    "spread": ask - bid,
+                    "bid_size": _optional_float(record.get("bid_size")),
+                    "ask_size": _optional_float(record.get("ask_size")),
+                    "timestamp": _parse_timestamp(record["timestamp"]),
+                }
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping malformed record {line_no} in {path}: {e}")
+
+
+class ReplayTickStreamer:
+    """Drop-in replacement for TickStreamer that replays a recording"""
+
+    poll_interval = 0.0
+
+    def __init__(self, path: str, speed: float = 1.0, symbols: Optional[Sequence[str]] = None,
+                 loop: bool = False, clock: Optional[ReplayClock] = None):
+        if speed < 0:
+            raise ValueError("speed must be >= 0 (0 = as fast as possible)")
+        self.path = path
+        self.speed = speed
+        self.symbols = list(symbols) if symbols else None
+        self.loop = loop
+        self.clock = clock or ReplayClock()
+        self.subscribed: Dict[str, Optional[dict]] = {}
+        self.finished = False
+        self.ticks_replayed = 0
+        self._ticks: Optional[Iterator[dict]] = None
+        self._pending: Optional[dict] = None
+        self._replay_origin: Optional[float] = None  # first replayed timestamp
+        self._wall_origin = 0.0
+        self._time_offset = 0.0  # added to timestamps on looped passes to keep time increasing
+        logger.info(f"ReplayTickStreamer created | File: {path} | Speed: {'max' if speed == 0 else f'{speed}x'}")
+
+    async def initialize(self):
+        """Open the recording"""
+        if not Path(self.path).exists():
+            raise FileNotFoundError(f"Replay file not found: {self.path}")
+        self._open()
+
+    async def start(self):
+        """Start the replay clock"""
+        for sym in self.symbols or ():
+            self.subscribed.setdefault(sym, None)
+        logger.info(f"Replay started | Symbols: {self.symbols or 'all in file'}")
+
+    def _open(self):
+        self._ticks = read_ticks(self.path, self.symbols)
+        self._pending = None
+
+    def _peek(self) -> Optional[dict]:
+        if self._pending is None:
+            tick = next(self._ticks, None)
+            if tick is None and self.loop and self.ticks_replayed:
+                self._open()
+                tick = next(self._ticks, None)
+                if tick is not None:
+                    # Continue the clock just after the previous pass
+                    self._time_offset = self.clock.now() + 0.001 - tick["timestamp"]
+            if tick is not None:
+                tick["timestamp"] += self._time_offset
+            self._pending = tick
+        return self._pending
+
+    def _due_in(self, timestamp: float) -> float:
+        """Wall-clock seconds until ``timestamp`` should be emitted"""
+        if self.speed == 0 or self._replay_origin is None:
+            return 0.0
+        target = self._wall_origin + (timestamp - self._replay_origin) / self.speed
+        return target - time.monotonic()
+
+    def _take_batch(self) -> Dict[str, dict]:
+        """Next run of due ticks with at most one tick per symbol"""
+        batch: Dict[str, dict] = {}
+        while True:
+            tick = self._peek()
+            if tick is None:
+                self.finished = True
+                break
+            if tick["symbol"] in batch or (batch and self._due_in(tick["timestamp"]) > 0):
+                break
+            if self._replay_origin is None:
+                self._replay_origin = tick["timestamp"]
+                self._wall_origin = time.monotonic()
+            self._pending = None
+            self.clock.advance_to(tick["timestamp"])
+            batch[tick["symbol"]] = tick
+            self.subscribed[tick["symbol"]] = tick
+            self.ticks_replayed += 1
+        return batch
+
+    def get_ticks(self) -> Dict[str, dict]:
+        """Ticks that are due now (non-blocking), one per symbol"""
+        tick = self._peek()
+        if tick is None:
+            self.finished = True
+            return {}
+        if self._due_in(tick["timestamp"]) > 0:
+            return {}
+        return self._take_batch()
+
+    async def next_ticks(self) -> Dict[str, dict]:
+        """Wait until the next recorded tick is due and return the due batch"""
+        tick = self._peek()
+        if tick is None:
+            self.finished = True
+            return {}
+        delay = self._due_in(tick["timestamp"])
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)  # Let the rest of the loop run even at max speed
+        return self._take_batch()
@@ -1,5 +1,6 @@
 # ibkr_streaming/run.py
 
+import argparse
 import asyncio
 import signal
 import sys
@@ -8,10 +9,21 @@ from datetime import datetime
 import nest_asyncio
 nest_asyncio.apply()
 from .tick_stream import TickStreamer
+from .replay import ReplayTickStreamer
 from .candle_engine import CandleEngine
-from .microstructure import compute_microstructure
-from .ws_push import push
-from .logger import get_logger
+from .microstructure import MicrostructureEngine
+from .ws_push import push, build_tick_message
+from .config import METRICS_HOST, METRICS_PORT
+from .logger import dropped_records, get_logger
+from .metrics import (
+    CANDLE_LATENCY,
+    MICRO_LATENCY,
+    REGISTRY,
+    SEND_LATENCY,
+    TICK_ERRORS,
+    TICKS_PROCESSED,
+    serve_metrics,
+)
 
 logger = get_logger(__name__)
 
@@ -25,9 +37,28 @@ def signal_handler(sig, frame):
     logger.info("Shutdown signal received. Initiating graceful shutdown...")
     shutdown_flag = True
 
-async def main():
+def parse_speed(value):
+    """Replay speed: a multiplier, or 'max' to replay as fast as possible"""
+    if value.lower() == "max":
+        return 0.0
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be > 0 or 'max'")
+    return speed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IBKR streaming service")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="Replay recorded ticks from a CSV/JSONL file instead of connecting to IBKR")
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="Replay speed multiplier, or 'max' (default: 1)")
+    parser.add_argument("--loop", action="store_true", help="Restart the replay when the file ends")
+    return parser.parse_args(argv)
+
+async def main(args=None):
     """Main execution loop for IBKR streaming service"""
     global shutdown_flag
+    args = args or parse_args([])
     
     # Register signal handlers
     signal.signal(signal.SIGINT, signal_handler)
@@ -40,15 +71,27 @@ async def main():
     
     tick_count = 0  # Initialize before try block for finally clause
     iteration = 0
+    metrics_server = None
     
     try:
+        if METRICS_PORT:
+            REGISTRY.gauge("log_records_dropped", "Log records dropped by the full log queue", fn=dropped_records)
+            metrics_server = await serve_metrics(METRICS_HOST, METRICS_PORT)
+            logger.info(f"Metrics endpoint: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        
         # Initialize components
-        logger.info("Initializing TickStreamer...")
-        tick_stream = TickStreamer()
+        if args.replay:
+            logger.info(f"Initializing ReplayTickStreamer from {args.replay}...")
+            tick_stream = ReplayTickStreamer(args.replay, speed=args.speed, loop=args.loop)
+        else:
+            logger.info("Initializing TickStreamer...")
+            tick_stream = TickStreamer()
         await tick_stream.initialize()
         
         logger.info("Initializing CandleEngine...")
-        candle_engine = CandleEngine()
+        # Replays bucket candles by recorded time so output is reproducible
+        candle_engine = CandleEngine(clock=getattr(tick_stream, "clock", None))
+        micro_engine = MicrostructureEngine()
         
         logger.info("Starting market data subscriptions...")
         await tick_stream.start()
@@ -56,66 +99,58 @@ async def main():
         logger.info("=" * 80)
         logger.info("Streaming service started successfully. Beginning data collection...")
         logger.info(f"Subscribed symbols: {list(tick_stream.subscribed.keys())}")
-        logger.info(f"Tick collection interval: 0.4 seconds (~2.5 ticks/second)")
+        if args.replay:
+            logger.info(f"Replay speed: {'max' if args.speed == 0 else f'{args.speed}x'} | Loop: {args.loop}")
+        else:
+            logger.info(f"Tick collection interval: {tick_stream.poll_interval} seconds")
         logger.info("=" * 80)
         
         while not shutdown_flag:
             iteration += 1
             try:
                 # Get tick data
-                ticks = tick_stream.get_ticks()
+                ticks = await tick_stream.next_ticks()
                 
                 if not ticks:
-                    logger.warning("No tick data received in this iteration")
-                    await asyncio.sleep(0.4)
+                    if getattr(tick_stream, "finished", False):
+                        logger.info("Replay finished")
+                        break
+                    if not args.replay:
+                        logger.warning("No tick data received in this iteration")
                     continue
                 
                 # Process each symbol
                 for sym, tick in ticks.items():
                     try:
                         # Update candles (will skip if price is invalid)
+                        start = time.perf_counter_ns()
                         candles = candle_engine.update(tick)
-                        micro = compute_microstructure(tick)
+                        CANDLE_LATENCY.record_since(start)
+                        start = time.perf_counter_ns()
+                        micro = micro_engine.update(tick)
+                        MICRO_LATENCY.record_since(start)
                         
                         tick_count += 1
+                        TICKS_PROCESSED.inc()
                         
                         # Log periodic status (every 100 ticks)
                         if tick_count % 100 == 0:
-                            logger.info(f"Processed {tick_count} ticks | Symbol: {sym} | Bid: {tick['bid']} | Ask: {tick['ask']} | Mid: {tick['mid']}")
-                        
-                        # Get latest candle for 1m timeframe (for chart display)
-                        latest_candle = None
-                        if sym in candles and "1m" in candles[sym]:
-                            # Get the most recent candle bucket
-                            candle_buckets = candles[sym]["1m"]
-                            if candle_buckets:
-                                latest_bucket = max(candle_buckets.keys())
-                                latest_candle = candle_buckets[latest_bucket]
+                            logger.info("Processed %d ticks | Symbol: %s | Bid: %s | Ask: %s | Mid: %s",
+                                        tick_count, sym, tick['bid'], tick['ask'], tick['mid'])
                         
                         # Normalize message format for frontend
-                        message = {
-                            "type": "tick",
-                            "symbol": sym,
-                            "tick": {
-                                "bid": tick["bid"],
-                                "ask": tick["ask"],
-                                "mid": tick["mid"],
-                                "spread": tick.get("spread", tick["ask"] - tick["bid"]),
-                                "timestamp": tick.get("timestamp", time.time())
-                            },
-                            "candle": latest_candle if latest_candle else {},
-                            "micro": micro
-                        }
+                        message = build_tick_message(sym, tick, candles, micro, candle_engine.clock)
                         
+                        start = time.perf_counter_ns()
                         await push(message)
+                        SEND_LATENCY.record_since(start)
                     except Exception as e:
-                        logger.error(f"Error processing tick for {sym}: {e}", exc_info=True)
+                        TICK_ERRORS.inc()
+                        logger.error("Error processing tick for %s: %s", sym, e, exc_info=True)
                 
                 # Log iteration summary every 50 iterations
                 if iteration % 50 == 0:
-                    logger.info(f"Iteration #{iteration} | Total ticks processed: {tick_count} | Active symbols: {len(ticks)}")
-                
-                await asyncio.sleep(0.4)   # ~2.5 ticks/second
+                    logger.info("Iteration #%d | Total ticks processed: %d | Active symbols: %d", iteration, tick_count, len(ticks))
                 
             except KeyboardInterrupt:
                 logger.info("Keyboard interrupt received")
@@ -129,6 +164,8 @@ async def main():
         logger.critical(f"Fatal error in main execution: {e}", exc_info=True)
         raise
     finally:
+        if metrics_server is not None:
+            metrics_server.close()
         logger.info("=" * 80)
         logger.info("IBKR Streaming Service Shutting Down")
         logger.info(f"End Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -137,7 +174,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(main(parse_args()))
     except KeyboardInterrupt:
         logger.info("Service terminated by user")
         sys.exit(0)
@@ -1,14 +1,18 @@
 # ibkr_streaming/tick_stream.py
 
+import asyncio
 import time
 from ib_async import Ticker
 from .ibkr_client import connect_ibkr
 from .symbols import SYMBOLS
 from .logger import get_logger
+from .metrics import INGEST_LATENCY
 
 logger = get_logger(__name__)
 
 class TickStreamer:
+    poll_interval = 0.4  # ~2.5 snapshots/second
+
     def __init__(self, ib=None):
         self.ib = ib
         self.subscribed = {}
@@ -73,6 +77,7 @@ class TickStreamer:
     def get_ticks(self):
         """Retrieve current tick data for all subscribed symbols"""
         import math
+        start = time.perf_counter_ns()
         ticks = {}
         for sym, ticker in self.subscribed.items():
             try:
@@ -91,11 +96,19 @@ class TickStreamer:
                 
                 # Validate prices are positive and reasonable
                 if bid <= 0 or ask <= 0 or ask < bid:
-                    logger.warning(f"Invalid price data for {sym}: bid={bid}, ask={ask}")
+                    logger.warning("Invalid price data for %s: bid=%s, ask=%s", sym, bid, ask)
                     continue
                 
                 mid = (bid + ask) / 2.0
                 spread = ask - bid
+                
+                # Top-of-book sizes (from tickSize updates), None until IB sends them
+                bid_size = ticker.bidSize
+                ask_size = ticker.askSize
+                if bid_size is None or (isinstance(bid_size, float) and math.isnan(bid_size)):
+                    bid_size = None
+                if ask_size is None or (isinstance(ask_size, float) and math.isnan(ask_size)):
+                    ask_size = None
 
                 ticks[sym] = {
                     "symbol": sym,
@@ -103,13 +116,21 @@ class TickStreamer:
                     "ask": ask,
                     "mid": mid,
                     "spread": spread,
+                    "bid_size": float(bid_size) if bid_size is not None else None,
+                    "ask_size": float(ask_size) if ask_size is not None else None,
                     "timestamp": time.time()
                 }
                 
                 # Log tick data at DEBUG level (can be enabled for detailed tracking)
-                logger.debug(f"Tick: {sym} | Bid: {bid} | Ask: {ask} | Mid: {mid}")
+                logger.debug("Tick: %s | Bid: %s | Ask: %s | Mid: %s", sym, bid, ask, mid)
             except Exception as e:
-                logger.warning(f"Error retrieving tick for {sym}: {e}")
+                logger.warning("Error retrieving tick for %s: %s", sym, e)
                 # Don't add invalid ticks to the result
         
+        INGEST_LATENCY.record_since(start)
         return ticks
+
+    async def next_ticks(self):
+        """Wait one poll interval and return the latest snapshot"""
+        await asyncio.sleep(self.poll_interval)
+        return self.get_ticks()
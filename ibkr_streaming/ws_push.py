@@ -2,9 +2,12 @@
 
 import asyncio
 import json
+import logging
+import time
 import websockets
 from .config import NODE_GATEWAY_WS_URL
 from .logger import get_logger
+from .metrics import WS_DROPPED
 
 logger = get_logger(__name__)
 
@@ -13,6 +16,31 @@ _ws_connection = None
 _connection_attempts = 0
 _last_error_ts = 0
 
+def build_tick_message(sym, tick, candles, micro, clock=time.time):
+    """Normalize a processed tick into the message format the frontend expects"""
+    # Get latest candle for 1m timeframe (for chart display)
+    latest_candle = None
+    if sym in candles and "1m" in candles[sym]:
+        # Get the most recent candle bucket
+        candle_buckets = candles[sym]["1m"]
+        if candle_buckets:
+            latest_bucket = max(candle_buckets.keys())
+            latest_candle = candle_buckets[latest_bucket]
+
+    return {
+        "type": "tick",
+        "symbol": sym,
+        "tick": {
+            "bid": tick["bid"],
+            "ask": tick["ask"],
+            "mid": tick["mid"],
+            "spread": tick.get("spread", tick["ask"] - tick["bid"]),
+            "timestamp": tick.get("timestamp", clock())
+        },
+        "candle": latest_candle if latest_candle else {},
+        "micro": micro
+    }
+
 async def push(data):
     """Push data to WebSocket gateway"""
     global _ws_connection, _connection_attempts
@@ -30,7 +58,7 @@ async def push(data):
                 connection_is_open = False
         
         if _ws_connection is None or not connection_is_open:
-            logger.debug(f"Establishing WebSocket connection to {NODE_GATEWAY_WS_URL}")
+            logger.debug("Establishing WebSocket connection to %s", NODE_GATEWAY_WS_URL)
             _connection_attempts += 1
             try:
                 _ws_connection = await websockets.connect(
@@ -42,21 +70,23 @@ async def push(data):
                 _connection_attempts = 0
             except Exception as e:
                 if _connection_attempts <= 3 or _connection_attempts % 10 == 0:
-                    logger.warning(f"WebSocket connection attempt {_connection_attempts} failed: {e}")
+                    logger.warning("WebSocket connection attempt %d failed: %s", _connection_attempts, e)
                 _ws_connection = None
+                WS_DROPPED.inc()
                 return
 
         # Send data if connection is open
         if _ws_connection is not None:
             try:
                 await _ws_connection.send(json.dumps(data))
-                try:
-                    symbol = data.get('symbol') or data.get('data', {}).get('symbol') or 'unknown'
-                    logger.debug(f"Data pushed to WebSocket: {symbol}")
-                except Exception:
-                    logger.debug("Data pushed to WebSocket")
+                if logger.isEnabledFor(logging.DEBUG):
+                    try:
+                        symbol = data.get('symbol') or data.get('data', {}).get('symbol') or 'unknown'
+                        logger.debug("Data pushed to WebSocket: %s", symbol)
+                    except Exception:
+                        logger.debug("Data pushed to WebSocket")
             except (websockets.exceptions.ConnectionClosed, AttributeError) as e:
-                logger.warning(f"WebSocket connection closed during send: {e}")
+                logger.warning("WebSocket connection closed during send: %s", e)
                 _ws_connection = None
                 # Try to reconnect immediately
                 try:
@@ -71,10 +101,13 @@ async def push(data):
                 except Exception as retry_e:
                     logger.warning(f"Failed to reconnect: {retry_e}")
                     _ws_connection = None
+                    WS_DROPPED.inc()
         
     except websockets.exceptions.ConnectionClosed:
         logger.warning("WebSocket connection closed. Will attempt to reconnect on next push.")
         _ws_connection = None
+        WS_DROPPED.inc()
     except Exception as e:
         logger.error(f"WebSocket error: {e}", exc_info=True)
         _ws_connection = None
+        WS_DROPPED.inc()
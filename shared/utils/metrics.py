@@ -0,0 +1,320 @@
+"""
+Lightweight in-process metrics shared by ``ai_core`` and ``ibkr_streaming``.
+
+* :class:`Histogram` - HDR-style log-linear histogram of integer samples
+  (nanoseconds for latencies). Recording is a few integer ops and one list
+  increment, well under a microsecond, with ~3% relative precision.
+* :class:`Counter` and :class:`Gauge`; gauges may be callbacks evaluated at
+  scrape time (queue depths, connection counts).
+* :func:`render_prometheus` - Prometheus text exposition (histograms are
+  exported as summaries with p50/p90/p99/p999 quantiles, in seconds).
+* :func:`serve_metrics` - a dependency-free asyncio HTTP endpoint for
+  processes that do not run a web framework.
+
+Hot paths should look metrics up once and keep the object:
+
+    CANDLE_LATENCY = REGISTRY.histogram("stage_latency_seconds", stage="candle")
+    start = time.perf_counter_ns()
+    ...
+    CANDLE_LATENCY.record_since(start)
+
+Updates are not locked; under threads a concurrent increment can
+occasionally be lost, which is acceptable for monitoring.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import math
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+PRECISION_BITS = 6  # 2**(6-1) = 32 sub-buckets per power of two, ~3% error
+MAX_VALUE_BITS = 44  # ~4.9 hours in nanoseconds; larger samples are clamped
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_SUB = 1 << PRECISION_BITS
+_HALF = _SUB >> 1
+_MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+_BUCKETS = _SUB + (MAX_VALUE_BITS - PRECISION_BITS) * _HALF
+
+
+def _bucket_value(index: int) -> float:
+    """Midpoint of the value range covered by ``index``."""
+    if index < _SUB:
+        return float(index)
+    offset = index - _SUB
+    shift = offset // _HALF + 1
+    low = (_HALF + offset % _HALF) << shift
+    return low + (1 << shift) / 2.0
+
+
+class Histogram:
+    """Log-linear histogram of non-negative integer samples."""
+
+    __slots__ = ("name", "labels", "scale", "counts", "count", "total", "max")
+
+    def __init__(self, name: str, labels: Labels = (), scale: float = 1e-9):
+        self.name = name
+        self.labels = labels
+        self.scale = scale  # multiplier to export units (ns -> seconds by default)
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        if value > _MAX_VALUE:
+            value = _MAX_VALUE
+        # Values below _SUB are exact; above, each power of two gets _HALF buckets
+        if value < _SUB:
+            index = value if value > 0 else 0
+        else:
+            shift = value.bit_length() - PRECISION_BITS
+            index = _SUB + (shift - 1) * _HALF + ((value >> shift) - _HALF)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def record_since(self, start_ns: int) -> None:
+        """Record ``perf_counter_ns() - start_ns``."""
+        self.record(time.perf_counter_ns() - start_ns)
+
+    def time(self) -> "_Timer":
+        """Context manager recording the elapsed nanoseconds of its block."""
+        return _Timer(self)
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile ``q`` (0..1), in recorded units."""
+        if not self.count:
+            return math.nan
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            if bucket:
+                seen += bucket
+                if seen >= rank:
+                    return min(_bucket_value(index), float(self.max))
+        return float(self.max)
+
+    def reset(self) -> None:
+        self.counts = [0] * _BUCKETS
+        self.count = self.total = self.max = 0
+
+    def summary(self) -> Dict[str, float]:
+        """Quantiles, mean and max in exported units."""
+        result = {"count": self.count}
+        if self.count:
+            for q in QUANTILES:
+                result[f"p{q * 100:g}".replace(".", "")] = self.quantile(q) * self.scale
+            result["mean"] = self.total / self.count * self.scale
+            result["max"] = self.max * self.scale
+        return result
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.record(time.perf_counter_ns() - self.start)
+
+
+class Counter:
+    __slots__ = ("name", "labels", "value")
+
+    def __init__(self, name: str, labels: Labels = ()):
+        self.name = name
+        self.labels = labels
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+
+class Gauge:
+    __slots__ = ("name", "labels", "value", "fn")
+
+    def __init__(self, name: str, labels: Labels = (), fn: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.labels = labels
+        self.value = 0.0
+        self.fn = fn
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def read(self) -> float:
+        if self.fn is None:
+            return self.value
+        try:
+            return float(self.fn())
+        except Exception:
+            return math.nan
+
+
+class Registry:
+    """Named metrics, one instance per (name, labels)."""
+
+    def __init__(self):
+        self._metrics: Dict[Tuple[str, Labels], object] = {}
+        self._help: Dict[str, str] = {}
+
+    def _get(self, cls, name: str, help_text: str, labels: Dict[str, str], **kwargs):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._metrics[key] = cls(name, key[1], **kwargs)
+            if help_text:
+                self._help[name] = help_text
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as {type(metric).__name__}")
+        return metric
+
+    def histogram(self, name: str, help: str = "", **labels) -> Histogram:
+        return self._get(Histogram, name, help, labels)
+
+    def counter(self, name: str, help: str = "", **labels) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = "", fn: Optional[Callable[[], float]] = None, **labels) -> Gauge:
+        gauge = self._get(Gauge, name, help, labels)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def metrics(self) -> Iterator[object]:
+        return iter(list(self._metrics.values()))
+
+    def help(self, name: str) -> str:
+        return self._help.get(name, "")
+
+    def snapshot(self) -> Dict[str, List[Dict[str, object]]]:
+        """JSON-friendly view of every metric."""
+        result: Dict[str, List[Dict[str, object]]] = {}
+        for metric in self.metrics():
+            entry: Dict[str, object] = {"labels": dict(metric.labels)}
+            if isinstance(metric, Histogram):
+                entry.update(metric.summary())
+            elif isinstance(metric, Counter):
+                entry["value"] = metric.value
+            else:
+                entry["value"] = metric.read()
+            result.setdefault(metric.name, []).append(entry)
+        return result
+
+
+REGISTRY = Registry()
+
+
+def timed(histogram: Histogram):
+    """Decorator recording the duration of a sync or async function."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.record_since(start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record_since(start)
+        return wrapper
+    return decorator
+
+
+# -- exposition -----------------------------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def render_prometheus(registry: Registry = REGISTRY) -> str:
+    """Render all metrics in the Prometheus text format."""
+    by_name: Dict[str, List[object]] = {}
+    for metric in registry.metrics():
+        by_name.setdefault(metric.name, []).append(metric)
+
+    lines = []
+    for name in sorted(by_name):
+        family = by_name[name]
+        kind = {Histogram: "summary", Counter: "counter", Gauge: "gauge"}[type(family[0])]
+        if registry.help(name):
+            lines.append(f"# HELP {name} {registry.help(name)}")
+        lines.append(f"# TYPE {name} {kind}")
+        for metric in family:
+            if isinstance(metric, Histogram):
+                for q in QUANTILES:
+                    value = metric.quantile(q) * metric.scale
+                    lines.append(f"{name}{_format_labels(metric.labels, (('quantile', str(q)),))} "
+                                 f"{_format_value(value)}")
+                lines.append(f"{name}_sum{_format_labels(metric.labels)} {_format_value(metric.total * metric.scale)}")
+                lines.append(f"{name}_count{_format_labels(metric.labels)} {metric.count}")
+            elif isinstance(metric, Counter):
+                lines.append(f"{name}{_format_labels(metric.labels)} {metric.value}")
+            else:
+                lines.append(f"{name}{_format_labels(metric.labels)} {_format_value(metric.read())}")
+    return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(host: str, port: int, registry: Registry = REGISTRY) -> asyncio.AbstractServer:
+    """Serve ``GET /metrics`` over plain HTTP/1.0 on the running event loop."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain headers
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, content_type, body = "200 OK", CONTENT_TYPE, render_prometheus(registry).encode()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+            writer.write(
+                f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
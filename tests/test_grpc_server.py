@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("grpc")
+pb2 = pytest.importorskip("ai_core.ai_service_pb2")
+
+from ai_core.core.container import container
+from ai_core.grpc_server import AICoreService
+from ai_core.strategy_engine.market_data.event_bus import TICK, MarketEvent
+
+
+@pytest.fixture
+def service():
+    container.override("strategy_manager", object())
+    container.override("market_data_service", object())
+    try:
+        yield AICoreService()
+    finally:
+        container.reset()
+
+
+def tick(symbol, **data):
+    data.setdefault("timestamp", "2024-01-02T10:00:00")
+    return MarketEvent(TICK, symbol, TICK, data, 0.0)
+
+
+def test_bid_only_quote_before_full_quote_is_skipped(service):
+    assert service._to_update(tick("EURUSD", bid=1.1)) is None
+
+
+def test_bid_only_quote_takes_ask_from_last_full_quote(service):
+    service._to_update(tick("EURUSD", bid=1.1, ask=1.1002))
+
+    update = service._to_update(tick("EURUSD", bid=1.1001))
+
+    assert update.bid == pytest.approx(1.1001)
+    assert update.ask == pytest.approx(1.1002)
+    assert update.last == pytest.approx(1.10015)
+
+
+def test_full_quote_is_forwarded(service):
+    update = service._to_update(tick("GBPUSD", bid=1.25, ask=1.2502, last=1.2501))
+
+    assert (update.symbol, update.last) == ("GBPUSD", pytest.approx(1.2501))